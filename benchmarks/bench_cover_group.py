@@ -0,0 +1,109 @@
+"""Benchmark closing every shutter of a building at once.
+
+A service call on a group or area runs the close_cover of every shutter
+entity concurrently. Every entity sends its command through the shutter
+command path of the coordinator, which queues it with the commands of the
+other entities and shows the state the shutter reports after the command
+until a single refresh verifies the group. Compare that with a script that
+closes the shutters one by one. The time that matters is until the last
+shutter starts moving. The cloud also rate limits the commands.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from custom_components.openmotics.commands import OpenMoticsCommandQueue
+from custom_components.openmotics.coordinator import OpenMoticsDataUpdateCoordinator
+from custom_components.openmotics.ratelimit import (
+    PRIORITY_COMMAND,
+    OpenMoticsRateLimiter,
+)
+
+SHUTTERS = 60
+# The round trip of a command over the gateway and over the cloud
+GATEWAY_LATENCY = 0.03
+CLOUD_LATENCY = 0.15
+
+
+class FakeApi:
+    """Api that starts a shutter halfway through the round trip of its command."""
+
+    def __init__(self, latency: float, limiter: OpenMoticsRateLimiter | None) -> None:
+        """Initialize the fake api."""
+        self._latency = latency
+        self._limiter = limiter
+        self.started: list[float] = []
+
+    async def shutter_down(self, installation_id, shutter_id) -> None:
+        """Move a shutter down."""
+        if self._limiter is not None:
+            await self._limiter.async_acquire(PRIORITY_COMMAND)
+        await asyncio.sleep(self._latency / 2)
+        self.started.append(time.perf_counter())
+        await asyncio.sleep(self._latency / 2)
+
+
+class FakeCoordinator:
+    """The parts of the coordinator the shutter command path uses."""
+
+    install_id = 1
+
+    # The command path of the shutter entities
+    async_shutter_command = OpenMoticsDataUpdateCoordinator.async_shutter_command
+
+    def __init__(self, api: FakeApi) -> None:
+        """Initialize the fake coordinator."""
+        self.api = api
+        self.commands = OpenMoticsCommandQueue()
+        # The states the verification refresh checks
+        self.optimistic: dict[tuple, dict] = {}
+
+    def async_set_optimistic(self, category: str, device_id, status: dict) -> None:
+        """Keep the expected status until the verification refresh."""
+        self.optimistic[(category, device_id)] = status
+
+
+async def close_sequential(coordinator: FakeCoordinator) -> None:
+    """Close every shutter after the previous one, like a script does."""
+    for shutter_id in range(SHUTTERS):
+        await coordinator.async_shutter_command(shutter_id, "down")
+
+
+async def close_group(coordinator: FakeCoordinator) -> None:
+    """Close all shutters concurrently, like a service call on a group does."""
+    await asyncio.gather(
+        *(
+            coordinator.async_shutter_command(shutter_id, "down")
+            for shutter_id in range(SHUTTERS)
+        )
+    )
+
+
+async def time_to_last_shutter(close, latency: float, limited: bool) -> tuple:
+    """Return the seconds until the last shutter moves and the batches sent."""
+    api = FakeApi(latency, OpenMoticsRateLimiter() if limited else None)
+    coordinator = FakeCoordinator(api)
+    start = time.perf_counter()
+    await close(coordinator)
+    assert len(coordinator.optimistic) == SHUTTERS
+    return max(api.started) - start, coordinator.commands.batches_sent
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(f"{SHUTTERS} shutters, time until the last one moves")
+    print(f"{'transport':>10} {'one by one (s)':>15} {'group (s)':>10} {'batches':>8}")
+    for name, latency, limited in (
+        ("gateway", GATEWAY_LATENCY, False),
+        ("cloud", CLOUD_LATENCY, True),
+    ):
+        sequential, _ = asyncio.run(
+            time_to_last_shutter(close_sequential, latency, limited)
+        )
+        group, batches = asyncio.run(time_to_last_shutter(close_group, latency, limited))
+        print(f"{name:>10} {sequential:>15.2f} {group:>10.2f} {batches:>8}")
+
+
+if __name__ == "__main__":
+    main()
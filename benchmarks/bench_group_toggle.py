@@ -0,0 +1,67 @@
+"""Benchmark toggling a group of 100 lights.
+
+Home Assistant calls the entities of a group one by one. Compare sending
+every command on its own, one after the other, with the command queue of
+the coordinator that batches the commands and sends them concurrently.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from custom_components.openmotics.commands import OpenMoticsCommandQueue
+
+LIGHTS = 100
+LATENCY = 0.05
+
+
+class FakeApi:
+    """Api that answers every command after a fixed latency."""
+
+    def __init__(self) -> None:
+        """Initialize the fake api."""
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def output_turn_off(self, installation_id, output_id) -> dict:
+        """Turn off an output."""
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(LATENCY)
+        self.in_flight -= 1
+        return {"id": output_id}
+
+
+async def toggle_sequential() -> tuple:
+    """Send the commands one after the other."""
+    api = FakeApi()
+    start = time.perf_counter()
+    for output_id in range(LIGHTS):
+        await api.output_turn_off(1, output_id)
+    return time.perf_counter() - start, api.max_in_flight
+
+
+async def toggle_queued() -> tuple:
+    """Send the commands through the command queue."""
+    api = FakeApi()
+    queue = OpenMoticsCommandQueue()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            queue.async_send(("outputs", output_id), api.output_turn_off, 1, output_id)
+            for output_id in range(LIGHTS)
+        )
+    )
+    return time.perf_counter() - start, api.max_in_flight
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(f"{LIGHTS} lights, {LATENCY * 1000:.0f} ms per request")
+    for name, toggle in (("sequential", toggle_sequential), ("queued", toggle_queued)):
+        elapsed, in_flight = asyncio.run(toggle())
+        print(f"{name:>10}: {elapsed * 1000:8.1f} ms, {in_flight} requests in flight")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Benchmark the cost of a coordinator refresh as installations grow.
+
+Compares the per-entity linear scan of the output list with the id-keyed
+index that the coordinator builds once per refresh.
+"""
+from __future__ import annotations
+
+from custom_components.openmotics.models import index_models
+
+from .common import best_of, make_outputs
+
+SIZES = (50, 100, 250, 500, 1000)
+
+
+def refresh_linear(outputs: list) -> None:
+    """Every entity scans the whole list to find its own status."""
+    for entity_id in range(len(outputs)):
+        for output in outputs:
+            if output["local_id"] == entity_id:
+                break
+
+
+def refresh_indexed(outputs: list) -> None:
+    """The coordinator indexes once, every entity does a dict lookup."""
+    index = index_models(outputs)
+    for entity_id in range(len(outputs)):
+        index.get(entity_id)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(f"{'outputs':>8} {'linear (ms)':>12} {'indexed (ms)':>13}")
+    for size in SIZES:
+        outputs = make_outputs(size)
+        linear = best_of(lambda: refresh_linear(outputs), number=3)
+        indexed = best_of(lambda: refresh_indexed(outputs))
+        print(f"{size:>8} {linear:>12.3f} {indexed:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
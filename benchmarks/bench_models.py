@@ -0,0 +1,69 @@
+"""Benchmark the memory and property access of the device configuration.
+
+Compares the raw API records the entities used to hold, with their location
+looked up on every access, with the slotted models built once per refresh.
+"""
+from __future__ import annotations
+
+import json
+import tracemalloc
+
+from custom_components.openmotics.models import index_models
+
+from .common import best_of, make_outputs
+
+SIZES = (1000, 5000)
+
+
+def room_of_record(record: dict):
+    """Look up the room the way the entities did with the raw record."""
+    location = record["location"]
+    try:
+        return location["room_id"]
+    except KeyError:
+        return "N/A"
+
+
+def load_records(payload: str) -> dict:
+    """Index the raw records without their status, like the entities held them."""
+    records = {}
+    for record in json.loads(payload):
+        record.pop("status")
+        records[record["local_id"]] = record
+    return records
+
+
+def held_memory(build) -> float:
+    """Return the memory in KiB held by the result of build."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size / 1024
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(
+        f"{'outputs':>8} {'records (KiB)':>14} {'models (KiB)':>13}"
+        f" {'record room (ms)':>17} {'model room (ms)':>16}"
+    )
+    for size in SIZES:
+        payload = json.dumps(make_outputs(size))
+        records_memory = held_memory(lambda: load_records(payload))
+        models_memory = held_memory(lambda: index_models(json.loads(payload)))
+        records = load_records(payload)
+        models = index_models(json.loads(payload))
+        record_access = best_of(
+            lambda: [room_of_record(record) for record in records.values()]
+        )
+        model_access = best_of(lambda: [model.room for model in models.values()])
+        print(
+            f"{size:>8} {records_memory:>14.0f} {models_memory:>13.0f}"
+            f" {record_access:>17.3f} {model_access:>16.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark the parsing of large status responses.
+
+Compares decoding the whole response and copying the statuses out of it
+with the incremental parser, which decodes the devices one by one while
+the response is received in chunks.
+"""
+from __future__ import annotations
+
+import json
+import tracemalloc
+
+from custom_components.openmotics.api import CHUNK_SIZE
+from custom_components.openmotics.parser import StatusStreamParser
+
+from .common import best_of, make_outputs
+
+SIZES = (1000, 5000)
+
+
+def make_response(count: int) -> bytes:
+    """Return a status response with all fields, as if fields was ignored."""
+    return json.dumps({"data": {"outputs": make_outputs(count), "shutters": []}}).encode()
+
+
+def parse_full(response: bytes) -> dict:
+    """Decode the whole document, then index the statuses."""
+    overview = json.loads(response)["data"]
+    return {
+        category: {
+            device["local_id"]: device.get("status")
+            for device in overview.get(category) or []
+        }
+        for category in ("outputs", "shutters", "sensors")
+    }
+
+
+def parse_stream(response: bytes) -> dict:
+    """Parse the response while it is received in chunks."""
+    parser = StatusStreamParser()
+    for start in range(0, len(response), CHUNK_SIZE):
+        parser.feed(response[start : start + CHUNK_SIZE])
+    return parser.close()
+
+
+def peak_memory(func, response: bytes) -> float:
+    """Return the peak memory in KiB allocated by a parse."""
+    tracemalloc.start()
+    func(response)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main() -> None:
+    """Run the benchmark."""
+    print(
+        f"{'outputs':>8} {'size (KiB)':>11} {'full (ms)':>10} {'stream (ms)':>12}"
+        f" {'full peak (KiB)':>16} {'stream peak (KiB)':>18}"
+    )
+    for size in SIZES:
+        response = make_response(size)
+        assert parse_full(response) == parse_stream(response)
+        full = best_of(lambda: parse_full(response), number=3)
+        stream = best_of(lambda: parse_stream(response), number=3)
+        print(
+            f"{size:>8} {len(response) / 1024:>11.0f} {full:>10.2f} {stream:>12.2f}"
+            f" {peak_memory(parse_full, response):>16.0f}"
+            f" {peak_memory(parse_stream, response):>18.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
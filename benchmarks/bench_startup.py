@@ -0,0 +1,115 @@
+"""Benchmark the time until the entities can be created at startup.
+
+With a cold cache the coordinator logs in and fetches the installation, the
+configuration and the status from the cloud, like the setup of the entry
+does. With a warm cache it loads them from the Home Assistant storage and
+the live data follows in the background. Both run the real coordinator on a
+test instance of Home Assistant, only the cloud client is replaced by one
+that answers after a typical round trip.
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import ExitStack, contextmanager
+import copy
+import time
+from unittest.mock import patch
+
+from homeassistant.const import CONF_CLIENT_ID, CONF_CLIENT_SECRET
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+    mock_storage,
+)
+
+from custom_components.openmotics.cache import to_cache
+from custom_components.openmotics.const import CONF_INSTALLATION_ID, DOMAIN
+from custom_components.openmotics.coordinator import OpenMoticsDataUpdateCoordinator
+from custom_components.openmotics.models import index_models
+
+from .common import make_outputs
+
+API = "custom_components.openmotics.coordinator.OpenMoticsApiClient"
+OUTPUTS = 500
+# Typical cloud round trips of the setup requests
+LOGIN_LATENCY = 0.3
+CONFIGURATION_LATENCY = 0.6
+STATUS_LATENCY = 0.4
+
+
+@contextmanager
+def mock_cloud(outputs: list):
+    """Patch the cloud client to answer after a typical round trip."""
+
+    def answer(latency: float, result):
+        async def request(*args):
+            await asyncio.sleep(latency)
+            return copy.deepcopy(result)
+
+        return request
+
+    status = {
+        "outputs": {output["local_id"]: output["status"] for output in outputs},
+        "shutters": {},
+        "sensors": {},
+    }
+    with ExitStack() as stack:
+        for name, latency, result in (
+            ("get_token", LOGIN_LATENCY, "abc"),
+            ("get_installation", CONFIGURATION_LATENCY, {"id": 1, "name": "Home"}),
+            ("get_configuration", CONFIGURATION_LATENCY, {"outputs": outputs}),
+            ("get_status", STATUS_LATENCY, status),
+        ):
+            stack.enter_context(
+                patch(f"{API}.{name}", side_effect=answer(latency, result))
+            )
+        yield
+
+
+async def startup(outputs: list, warm: bool) -> float:
+    """Return the seconds until the coordinator has the data of the entities."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_CLIENT_ID: "client",
+            CONF_CLIENT_SECRET: "secret",
+            CONF_INSTALLATION_ID: 1,
+        },
+    )
+    storage = {}
+    if warm:
+        storage[f"{DOMAIN}.{entry.entry_id}"] = {
+            "version": 1,
+            "data": to_cache(
+                {"outputs": index_models(outputs)},
+                {"outputs": {output["local_id"]: output["status"] for output in outputs}},
+            ),
+        }
+    hass = await async_test_home_assistant(asyncio.get_running_loop())
+    try:
+        with mock_cloud(outputs), mock_storage(storage):
+            coordinator = OpenMoticsDataUpdateCoordinator(hass, entry)
+            start = time.perf_counter()
+            # The same path as the setup of the entry
+            if not await coordinator.async_load_cache():
+                await coordinator.async_setup_live()
+            elapsed = time.perf_counter() - start
+            assert len(coordinator.configuration["outputs"]) == len(outputs)
+            await coordinator.async_unload()
+    finally:
+        await hass.async_stop(force=True)
+    return elapsed
+
+
+def main() -> None:
+    """Run the benchmark."""
+    outputs = make_outputs(OUTPUTS)
+    cold = asyncio.run(startup(outputs, warm=False))
+    warm = asyncio.run(startup(outputs, warm=True))
+    print(f"{OUTPUTS} outputs")
+    print(f"cold cache: {cold * 1000:8.1f} ms")
+    print(f"warm cache: {warm * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
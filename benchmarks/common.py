@@ -0,0 +1,25 @@
+"""Helpers shared by the benchmarks."""
+from __future__ import annotations
+
+import timeit
+
+
+def make_outputs(count: int) -> list:
+    """Return a synthetic list of outputs like the status API returns it."""
+    return [
+        {
+            "id": 1000 + idx,
+            "local_id": idx,
+            "name": f"Output {idx}",
+            "type": "LIGHT" if idx % 3 else "OUTLET",
+            "capabilities": ["ON_OFF", "RANGE"] if idx % 2 else ["ON_OFF"],
+            "location": {"floor_id": idx % 4, "room_id": idx % 20},
+            "status": {"on": bool(idx % 2), "value": idx % 101, "locked": False},
+        }
+        for idx in range(count)
+    ]
+
+
+def best_of(stmt, number: int = 10, repeat: int = 5) -> float:
+    """Return the best time of a statement in milliseconds per call."""
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1000
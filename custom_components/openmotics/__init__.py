@@ -10,7 +10,6 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import timedelta
 import logging
 from typing import Any, Generic, TypeVar
 
@@ -25,11 +24,12 @@ from homeassistant.const import (
     CONF_PORT,
     CONF_VERIFY_SSL,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 
 # from homeassistant.core import Config, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.event import async_track_time_interval
 
 # from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
@@ -45,14 +45,21 @@ import voluptuous as vol
 
 from .const import (
     CONF_INSTALLATION_ID,
+    CONFIGURATION_INTERVAL,
+    COVER,
     DEFAULT_HOST,
     DEFAULT_PORT,
     DEFAULT_VERIFY_SSL,
     DOMAIN,
+    LIGHT,
     PLATFORMS,
+    SCENE,
+    SENSOR,
+    SWITCH,
 )
+from .cache import OpenMoticsCache
 from .coordinator import OpenMoticsDataUpdateCoordinator
-from .exceptions import CannotConnect
+from .exceptions import CannotConnect, OpenMoticsException
 
 # from openmotics.clients.exceptions import APIException
 
@@ -74,10 +81,18 @@ CONFIG_SCHEMA = vol.Schema(
     extra=vol.ALLOW_EXTRA,
 )
 
-SCAN_INTERVAL = timedelta(seconds=30)
-
 _LOGGER = logging.getLogger(__name__)
 
+# The category of the devices of the entities of every platform, the first
+# categories kept the device when devices were identified by local id only
+PLATFORM_CATEGORIES = {
+    LIGHT: "outputs",
+    SWITCH: "outputs",
+    COVER: "shutters",
+    SCENE: "groupactions",
+    SENSOR: "sensors",
+}
+
 
 # async def async_setup_entry(
 #     hass: core.HomeAssistant, config: config_entries.ConfigEntry
@@ -133,13 +148,35 @@ async def async_setup_openmotics_installation(
         identifiers={(DOMAIN, openmotics_installation["id"])},
         manufacturer="OpenMotics",
         name=openmotics_installation["name"],
-        model=openmotics_installation["gateway_model"],
-        sw_version=openmotics_installation["version"],
+        model=openmotics_installation.get("gateway_model"),
+        sw_version=openmotics_installation.get("version"),
     )
 
     return True
 
 
+async def _async_setup_live(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: OpenMoticsDataUpdateCoordinator,
+) -> None:
+    """Fetch the live installation, configuration and status."""
+    installation = await coordinator.async_setup_live()
+    await async_setup_openmotics_installation(hass, entry, installation)
+
+
+async def _async_setup_live_background(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: OpenMoticsDataUpdateCoordinator,
+) -> None:
+    """Replace the cached data with live data, the polls retry on errors."""
+    try:
+        await _async_setup_live(hass, entry, coordinator)
+    except OpenMoticsException as err:
+        _LOGGER.warning("Unable to connect to OpenMoticsApi, using the cache: %s", err)
+
+
 async def async_setup_entry(
     hass: core.HomeAssistant, entry: config_entries.ConfigEntry
 ):
@@ -149,29 +186,113 @@ async def async_setup_entry(
 
     """Set up OpenMotics from a config entry."""
     coordinator = OpenMoticsDataUpdateCoordinator(hass, entry=entry)
-    await coordinator.async_config_entry_first_refresh()
-
-    if not await coordinator.get_token():
-        raise ConfigEntryNotReady(f"Unable to connect to OpenMoticsApi")
-
-    await coordinator.async_refresh()
-
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady(f"Unable to connect to OpenMoticsApi")
+    if await coordinator.async_load_cache():
+        # Create the entities from the cache, the live data follows in the background
+        hass.async_create_task(_async_setup_live_background(hass, entry, coordinator))
+    else:
+        try:
+            await _async_setup_live(hass, entry, coordinator)
+        except OpenMoticsException as err:
+            await coordinator.async_unload()
+            raise ConfigEntryNotReady(
+                f"Unable to connect to OpenMoticsApi: {err}"
+            ) from err
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
     # Set up all platforms for this device/entry.
     hass.config_entries.async_setup_platforms(entry, PLATFORMS)
 
+    # The polls only start once the setup succeeded
+    coordinator.async_start_updates()
+
+    # State changes are pushed, polling is only a fallback
+    coordinator.async_start_events()
+
+    # The configuration rarely changes, refresh it now and then
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            coordinator.async_background_refresh_configuration,
+            CONFIGURATION_INTERVAL,
+        )
+    )
+
+    # Sensors change more often than the rest, they are polled on their own
+    if coordinator.configuration["sensors"]:
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass,
+                coordinator.async_refresh_sensors,
+                coordinator.sensor_scan_interval,
+            )
+        )
+
+    # Reload the entry when the options change
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    return True
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate an entry of an older version."""
+    if entry.version == 1:
+        _async_migrate_device_identifiers(hass, entry)
+        entry.version = 2
+        hass.config_entries.async_update_entry(entry)
+        _LOGGER.debug("Migrated the OpenMotics entry %s to version 2", entry.title)
     return True
 
 
+@callback
+def _async_migrate_device_identifiers(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Add the category to the identifiers of the devices.
+
+    Outputs, shutters and sensors each number their local ids from 0, so the
+    identifier of a device by local id alone was shared by several devices.
+    Every old device keeps the first category of its entities, the entities
+    of the other categories move to a new device when they are added.
+    """
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+    prefix = f"{entry.data.get(CONF_INSTALLATION_ID)}-"
+    for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id):
+        local_id = next(
+            (
+                str(identifier)[len(prefix) :]
+                for domain, identifier in device.identifiers
+                if domain == DOMAIN and str(identifier).startswith(prefix)
+            ),
+            "",
+        )
+        # The device of the installation has an identifier of its own
+        if not local_id.isdigit():
+            continue
+        domains = {
+            entity.domain
+            for entity in er.async_entries_for_device(
+                entity_registry, device.id, include_disabled_entities=True
+            )
+        }
+        for platform, category in PLATFORM_CATEGORIES.items():
+            if platform in domains:
+                device_registry.async_update_device(
+                    device.id,
+                    new_identifiers={(DOMAIN, f"{prefix}{category}-{local_id}")},
+                )
+                break
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry):
     """Handle options update."""
     await hass.config_entries.async_reload(entry.entry_id)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cache of a removed entry."""
+    await OpenMoticsCache(hass, entry.entry_id, dict).async_remove()
+
+
 async def async_unload_entry(hass, config_entry):
     """Unload a config entry."""
     unload_ok = all(
@@ -183,7 +304,9 @@ async def async_unload_entry(hass, config_entry):
         )
     )
     if unload_ok:
-        hass.data[DOMAIN].pop(config_entry)
-        hass.data.pop(DOMAIN)
+        coordinator = hass.data[DOMAIN].pop(config_entry.entry_id)
+        await coordinator.async_unload()
+        if not hass.data[DOMAIN]:
+            hass.data.pop(DOMAIN)
 
     return unload_ok
@@ -0,0 +1,87 @@
+"""Sharing of the cloud client between the installations of an account."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import OpenMoticsApiClient
+from .const import DOMAIN_DATA
+
+_LOGGER = logging.getLogger(__name__)
+
+# The maximum number of polls per minute of all installations of an account
+POLL_BUDGET = 60
+
+
+class OpenMoticsPollScheduler:
+    """Spread the polls of the installations of an account evenly.
+
+    Every poll waits for a slot, and the slots are at least 60 / budget
+    seconds apart. Installations that would poll at the same moment are
+    staggered, and the traffic of an account never exceeds the budget.
+    """
+
+    def __init__(self, budget: float = POLL_BUDGET) -> None:
+        """Initialize the scheduler, budget is the number of polls per minute."""
+        self._spacing = 60 / budget
+        self._next_slot = 0.0
+        # The number of polls that had to wait for a slot
+        self.delayed = 0
+
+    async def async_slot(self) -> None:
+        """Wait until the next free slot."""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._spacing
+        if slot > now:
+            self.delayed += 1
+            await asyncio.sleep(slot - now)
+
+
+class OpenMoticsAccount:
+    """The cloud client and poll scheduler shared by the installations of an account."""
+
+    def __init__(self, api: OpenMoticsApiClient) -> None:
+        """Initialize the account."""
+        self.api = api
+        self.scheduler = OpenMoticsPollScheduler()
+        # The config entries using the account
+        self.entries: set[str] = set()
+
+
+@callback
+def async_get_account(
+    hass: HomeAssistant,
+    key: tuple,
+    entry_id: str,
+    create_api: Callable[[], OpenMoticsApiClient],
+) -> OpenMoticsAccount:
+    """Return the account of the credentials in key, creating it if needed."""
+    accounts: dict[tuple, OpenMoticsAccount] = hass.data.setdefault(DOMAIN_DATA, {})
+    account = accounts.get(key)
+    if account is None:
+        account = accounts[key] = OpenMoticsAccount(create_api())
+    account.entries.add(entry_id)
+    _LOGGER.debug("%s installations share an OpenMotics account", len(account.entries))
+    return account
+
+
+@callback
+def async_release_account(
+    hass: HomeAssistant, account: OpenMoticsAccount, entry_id: str
+) -> None:
+    """Stop using an account, it is closed when no installation uses it anymore."""
+    account.entries.discard(entry_id)
+    if account.entries:
+        return
+    account.api.close()
+    accounts = hass.data.get(DOMAIN_DATA, {})
+    for key, value in list(accounts.items()):
+        if value is account:
+            accounts.pop(key)
+    if not accounts:
+        hass.data.pop(DOMAIN_DATA, None)
@@ -0,0 +1,302 @@
+"""Asynchronous client for the OpenMotics cloud API.
+
+    The client runs on the Home Assistant event loop and shares the aiohttp
+    client session of Home Assistant, so no executor threads are involved.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable
+
+import aiohttp
+import async_timeout
+
+from .auth import OpenMoticsTokenManager
+from .const import CONFIGURATION_CATEGORIES, DEFAULT_HOST, DEFAULT_PORT
+from .exceptions import ApiError, CannotConnect, InvalidAuth, TooManyRequests
+from .parser import StatusStreamParser
+from .ratelimit import (
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+    OpenMoticsRateLimiter,
+    backoff_delay,
+    parse_retry_after,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+API_PATH = "/api/v1"
+TOKEN_PATH = "/authentication/oauth2/token"
+REQUEST_TIMEOUT = 10
+# The size of the chunks a streamed response is parsed in
+CHUNK_SIZE = 64 * 1024
+# The number of times a throttled request is retried
+MAX_RETRIES = 3
+
+
+class TokenRejected(Exception):
+    """The API rejected the access token."""
+
+
+class OpenMoticsApiClient:
+    """Asyncio client for the OpenMotics cloud API."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        client_id: str,
+        client_secret: str,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+    ) -> None:
+        """Initialize the client."""
+        self._session = session
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._base_url = f"https://{host}:{port}{API_PATH}"
+        self.tokens = OpenMoticsTokenManager(self._async_login)
+        self.limiter = OpenMoticsRateLimiter()
+        # The number of requests the API throttled
+        self.throttled = 0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the client session."""
+        return self._session
+
+    @property
+    def token(self) -> str | None:
+        """Return the current access token."""
+        return self.tokens.token
+
+    @property
+    def ws_url(self) -> str:
+        """Return the base url of the websockets."""
+        return f"wss{self._base_url[5:]}"
+
+    async def get_valid_token(self) -> str:
+        """Return a valid token, logging in when needed."""
+        return await self.tokens.async_get_token()
+
+    async def get_token(self) -> str:
+        """Return the access token, logging in unless the current one is still valid."""
+        return await self.tokens.async_get_token()
+
+    def close(self) -> None:
+        """Stop refreshing the token in the background."""
+        self.tokens.close()
+
+    async def _async_login(self) -> dict:
+        """Request an access token with the client credentials grant."""
+        data = {
+            "grant_type": "client_credentials",
+            "client_id": self._client_id,
+            "client_secret": self._client_secret,
+        }
+        try:
+            async with async_timeout.timeout(REQUEST_TIMEOUT), self._session.post(
+                f"{self._base_url}{TOKEN_PATH}", data=data
+            ) as response:
+                if response.status in (400, 401, 403):
+                    raise InvalidAuth("Invalid client_id or client_secret")
+                response.raise_for_status()
+                token = await response.json()
+        except asyncio.TimeoutError as err:
+            raise CannotConnect("Timeout requesting a token") from err
+        except aiohttp.ClientError as err:
+            raise CannotConnect(f"Error requesting a token: {err}") from err
+
+        if not isinstance(token, dict) or "access_token" not in token:
+            raise InvalidAuth("No access token in the response")
+        return token
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        priority: int = PRIORITY_POLL,
+        parser: Callable[[], StatusStreamParser] | None = None,
+        **kwargs,
+    ) -> Any:
+        """Do an authenticated request and return the data of the response.
+
+        When the token is rejected, the request is retried once with a new one.
+        A throttled request is retried after the delay the API asked for, or
+        after a jittered exponential backoff. When a parser is given, the
+        response is parsed with it while it is received.
+        """
+        rejected = False
+        attempt = 0
+        while True:
+            await self.limiter.async_acquire(priority)
+            token = await self.get_valid_token()
+            try:
+                return await self._request_with_token(
+                    method, path, token, parser, **kwargs
+                )
+            except TokenRejected as err:
+                if rejected:
+                    raise InvalidAuth(f"Not authorized to {method} {path}") from err
+                rejected = True
+                self.tokens.invalidate(token)
+            except TooManyRequests as err:
+                self.throttled += 1
+                if attempt >= MAX_RETRIES:
+                    raise
+                delay = err.retry_after
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                attempt += 1
+                _LOGGER.debug("Throttled on %s %s, retrying in %.1fs", method, path, delay)
+                # Hold back all requests, not only this one
+                self.limiter.pause(delay)
+
+    async def _request_with_token(
+        self,
+        method: str,
+        path: str,
+        token: str,
+        parser: Callable[[], StatusStreamParser] | None = None,
+        **kwargs,
+    ) -> Any:
+        """Do a request with the given token."""
+        headers = {"Authorization": f"Bearer {token}"}
+        try:
+            # The response is released on every exit, also when it is not read
+            async with async_timeout.timeout(REQUEST_TIMEOUT), self._session.request(
+                method, f"{self._base_url}{path}", headers=headers, **kwargs
+            ) as response:
+                if response.status == 401:
+                    raise TokenRejected
+                if response.status == 429:
+                    raise TooManyRequests(
+                        f"Too many requests on {method} {path}",
+                        parse_retry_after(response.headers.get("Retry-After")),
+                    )
+                if response.status == 403:
+                    raise InvalidAuth(f"Not authorized to {method} {path}")
+                if response.status >= 400:
+                    raise ApiError(
+                        f"Error {response.status} on {method} {path}: "
+                        f"{await response.text()}"
+                    )
+                if parser is not None:
+                    stream = parser()
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        stream.feed(chunk)
+                    return stream.close()
+                # Not every response has a JSON content type, an empty body is None
+                result = await response.json(content_type=None)
+        except ValueError as err:
+            raise ApiError(f"Invalid response on {method} {path}: {err}") from err
+        except asyncio.TimeoutError as err:
+            raise CannotConnect(f"Timeout on {method} {path}") from err
+        except aiohttp.ClientError as err:
+            raise CannotConnect(f"Error on {method} {path}: {err}") from err
+
+        if isinstance(result, dict) and "data" in result:
+            return result["data"]
+        return result
+
+    async def get_installations(self) -> list:
+        """Return all installations the client has access to."""
+        return await self._request("GET", "/base/installations")
+
+    async def get_installation(self, installation_id: str) -> dict:
+        """Return the details of an installation."""
+        return await self._request("GET", f"/base/installations/{installation_id}")
+
+    async def get_configuration(self, installation_id: str) -> dict:
+        """Return the configured devices of an installation by category."""
+        results = await asyncio.gather(
+            *(
+                self._request("GET", f"/base/installations/{installation_id}/{category}")
+                for category in CONFIGURATION_CATEGORIES
+            )
+        )
+        return dict(zip(CONFIGURATION_CATEGORIES, results))
+
+    async def get_status(self, installation_id: str) -> dict:
+        """Return the live status of the devices of an installation.
+
+        Only the id and the status of the devices are requested, and the
+        response is parsed while it is received, straight into the status
+        indexed by category and local id.
+        """
+        return await self._request(
+            "GET",
+            f"/base/installations/{installation_id}/status",
+            parser=StatusStreamParser,
+            params={"fields": "local_id,status"},
+        )
+
+    async def get_sensor_status(self, installation_id: str) -> dict:
+        """Return the live status of the sensors of an installation by local id."""
+        sensors = await self._request(
+            "GET",
+            f"/base/installations/{installation_id}/sensors",
+            params={"fields": "local_id,status"},
+        )
+        return {sensor["local_id"]: sensor.get("status") for sensor in sensors or []}
+
+    async def output_turn_on(
+        self, installation_id: str, output_id: int, value: int | None = None
+    ) -> dict | None:
+        """Turn on an output, optionally with a dimmer value (0..100)."""
+        payload = {} if value is None else {"value": value}
+        return await self._request(
+            "POST",
+            f"/base/installations/{installation_id}/outputs/{output_id}/turn_on",
+            json=payload,
+            priority=PRIORITY_COMMAND,
+        )
+
+    async def output_turn_off(
+        self, installation_id: str, output_id: int
+    ) -> dict | None:
+        """Turn off an output."""
+        return await self._request(
+            "POST",
+            f"/base/installations/{installation_id}/outputs/{output_id}/turn_off",
+            priority=PRIORITY_COMMAND,
+        )
+
+    async def shutter_up(self, installation_id: str, shutter_id: int) -> dict | None:
+        """Move a shutter up."""
+        return await self._request(
+            "POST",
+            f"/base/installations/{installation_id}/shutters/{shutter_id}/up",
+            priority=PRIORITY_COMMAND,
+        )
+
+    async def shutter_down(
+        self, installation_id: str, shutter_id: int
+    ) -> dict | None:
+        """Move a shutter down."""
+        return await self._request(
+            "POST",
+            f"/base/installations/{installation_id}/shutters/{shutter_id}/down",
+            priority=PRIORITY_COMMAND,
+        )
+
+    async def shutter_stop(
+        self, installation_id: str, shutter_id: int
+    ) -> dict | None:
+        """Stop a shutter."""
+        return await self._request(
+            "POST",
+            f"/base/installations/{installation_id}/shutters/{shutter_id}/stop",
+            priority=PRIORITY_COMMAND,
+        )
+
+    async def groupaction_trigger(
+        self, installation_id: str, groupaction_id: int
+    ) -> dict | None:
+        """Trigger a group action (scene)."""
+        return await self._request(
+            "POST",
+            f"/base/installations/{installation_id}"
+            f"/groupactions/{groupaction_id}/trigger",
+            priority=PRIORITY_COMMAND,
+        )
@@ -0,0 +1,98 @@
+"""OAuth2 token lifecycle for the OpenMotics API."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from .exceptions import OpenMoticsException
+
+_LOGGER = logging.getLogger(__name__)
+
+# Refresh the token this many seconds before it expires
+REFRESH_MARGIN = 60
+# Assume this lifetime when the token response has no expires_in
+DEFAULT_EXPIRES_IN = 3600
+
+
+class OpenMoticsTokenManager:
+    """Keep a valid access token.
+
+    The token is refreshed in the background before it expires. When several
+    requests need a new token at the same time, a single login is done and
+    its result is shared by all of them.
+    """
+
+    def __init__(self, login: Callable[[], Awaitable[dict]]) -> None:
+        """Initialize the manager, login returns the token response."""
+        self._login = login
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._login_task: asyncio.Future | None = None
+        self._refresh_timer: asyncio.TimerHandle | None = None
+        # The number of logins done
+        self.logins = 0
+
+    @property
+    def token(self) -> str | None:
+        """Return the current token."""
+        return self._token
+
+    @property
+    def valid(self) -> bool:
+        """Return True if there is a token that did not expire."""
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    async def async_get_token(self) -> str:
+        """Return a valid token, logging in when needed."""
+        if self.valid:
+            return self._token
+        return await self.async_login()
+
+    async def async_login(self) -> str:
+        """Log in, or wait for the login that is already in progress."""
+        if self._login_task is None:
+            self._login_task = asyncio.ensure_future(self._async_login())
+        # A cancelled waiter must not cancel the login of the others
+        return await asyncio.shield(self._login_task)
+
+    def invalidate(self, token: str | None) -> None:
+        """Forget a rejected token, unless it was already replaced."""
+        if token == self._token:
+            self._token = None
+
+    def close(self) -> None:
+        """Stop the background refresh."""
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+    async def _async_login(self) -> str:
+        """Do the actual login and schedule the next refresh."""
+        try:
+            response = await self._login()
+            self.logins += 1
+            expires_in = response.get("expires_in") or DEFAULT_EXPIRES_IN
+            self._token = response["access_token"]
+            self._expires_at = time.monotonic() + expires_in
+            self._schedule_refresh(expires_in)
+            return self._token
+        finally:
+            self._login_task = None
+
+    def _schedule_refresh(self, expires_in: float) -> None:
+        """Refresh the token in the background before it expires."""
+        self.close()
+        delay = max(expires_in - REFRESH_MARGIN, expires_in / 2)
+        self._refresh_timer = asyncio.get_running_loop().call_later(
+            delay, lambda: asyncio.ensure_future(self._async_refresh())
+        )
+
+    async def _async_refresh(self) -> None:
+        """Refresh the token, the current one stays valid until it expires."""
+        self._refresh_timer = None
+        try:
+            await self.async_login()
+        except OpenMoticsException as err:
+            _LOGGER.warning("Could not refresh the OpenMotics token: %s", err)
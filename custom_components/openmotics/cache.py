@@ -0,0 +1,99 @@
+"""Persistent cache of the installation for a fast startup."""
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import CONFIGURATION_CATEGORIES, DOMAIN, STATUS_CATEGORIES
+from .models import index_models
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Saves are delayed, so the refreshes within this delay only write to disk once
+SAVE_DELAY = 60
+
+
+def to_cache(configuration: dict, data: dict | None) -> dict:
+    """Return the configuration and status in a JSON serializable form."""
+    return {
+        "configuration": {
+            category: [
+                model.as_dict() for model in configuration.get(category, {}).values()
+            ]
+            for category in CONFIGURATION_CATEGORIES
+        },
+        # JSON keys are strings, so the statuses are stored as pairs
+        "status": {
+            category: [
+                [device_id, status]
+                for device_id, status in (data or {}).get(category, {}).items()
+            ]
+            for category in STATUS_CATEGORIES
+        },
+    }
+
+
+def from_cache(cache: dict) -> tuple[dict, dict]:
+    """Return the configuration and status stored by to_cache."""
+    configuration = {
+        category: index_models(cache["configuration"].get(category, []))
+        for category in CONFIGURATION_CATEGORIES
+    }
+    data = {
+        category: {
+            device_id: status for device_id, status in cache["status"].get(category, [])
+        }
+        for category in STATUS_CATEGORIES
+    }
+    return configuration, data
+
+
+class OpenMoticsCache:
+    """Store the last known configuration and status of an installation."""
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, data_func: Callable[[], dict]
+    ) -> None:
+        """Initialize the cache, data_func returns the data to store."""
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._data_func = data_func
+        # True from a scheduled save until it is written
+        self._save_scheduled = False
+
+    async def async_load(self) -> tuple[dict, dict] | None:
+        """Return the cached configuration and status, if any."""
+        try:
+            cache = await self._store.async_load()
+            if cache:
+                return from_cache(cache)
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring the invalid OpenMotics cache: %s", err)
+        return None
+
+    def async_save(self) -> None:
+        """Schedule a save, the data is only collected when it is written.
+
+        Scheduling again restarts the delay of the store, so while a save is
+        scheduled the refreshes polled more often than the delay keep it.
+        """
+        if self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(self._async_collect, SAVE_DELAY)
+
+    async def async_save_now(self) -> None:
+        """Write the data right away, replacing a scheduled save."""
+        await self._store.async_save(self._async_collect())
+
+    def _async_collect(self) -> dict:
+        """Return the data to write, a later change schedules a new save."""
+        self._save_scheduled = False
+        return self._data_func()
+
+    async def async_remove(self) -> None:
+        """Remove the cache."""
+        await self._store.async_remove()
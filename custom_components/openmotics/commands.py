@@ -0,0 +1,144 @@
+"""Batching of the commands sent to OpenMotics."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from .latency import smoothed_latency
+
+_LOGGER = logging.getLogger(__name__)
+
+# Commands issued within this many seconds are sent as one batch
+COMMAND_WINDOW = 0.05
+# The maximum number of commands in flight at the same time
+MAX_PARALLEL_COMMANDS = 8
+
+
+class OpenMoticsCommandQueue:
+    """Collect the commands issued within a short window and send them at once.
+
+    Home Assistant calls the entities of a group or area one by one, this
+    queue turns those calls into a single batch. The last command for an
+    output within a window wins. The batch is sent as one bulk request when
+    a bulk sender is available, otherwise the commands are sent concurrently
+    with at most ``max_parallel`` requests in flight. The commands for an
+    output are sent in order, a batch waits until the command of a previous
+    batch for the same output is sent.
+    """
+
+    def __init__(
+        self,
+        send_bulk: Callable[[dict], Awaitable[dict]] | None = None,
+        window: float = COMMAND_WINDOW,
+        max_parallel: int = MAX_PARALLEL_COMMANDS,
+    ) -> None:
+        """Initialize the queue."""
+        self._send_bulk = send_bulk
+        self._window = window
+        self._semaphore = asyncio.Semaphore(max_parallel)
+        self._pending: dict[Any, tuple] = {}
+        self._waiters: dict[Any, list[asyncio.Future]] = {}
+        self._flush_task: asyncio.Task | None = None
+        # Done once the batch that sends the last command for a key is sent
+        self._sending: dict[Any, asyncio.Future] = {}
+        # The number of commands and batches sent
+        self.commands_sent = 0
+        self.batches_sent = 0
+        # The moving average of the seconds a command takes, None until measured
+        self.latency: float | None = None
+
+    @property
+    def pending(self) -> int:
+        """Return the number of commands waiting to be sent."""
+        return len(self._pending)
+
+    async def async_send(
+        self, key, send: Callable[..., Awaitable[Any]], *args
+    ) -> Any:
+        """Queue a command and return its result once the batch is sent.
+
+        ``key`` identifies the device, ``send(*args)`` sends the command.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = (send, *args)
+        self._waiters.setdefault(key, []).append(future)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._async_flush())
+        return await future
+
+    async def _async_flush(self) -> None:
+        """Send the commands collected during the window."""
+        await asyncio.sleep(self._window)
+        pending, self._pending = self._pending, {}
+        waiters, self._waiters = self._waiters, {}
+        self._flush_task = None
+        self.batches_sent += 1
+        self.commands_sent += len(pending)
+        _LOGGER.debug("Sending a batch of %s commands", len(pending))
+
+        # A command of a previous batch can still be on its way
+        previous = {key: self._sending.get(key) for key in pending}
+        loop = asyncio.get_running_loop()
+        sent = {key: loop.create_future() for key in pending}
+        self._sending.update(sent)
+        try:
+            results = await self._async_send_batch(pending, previous, sent)
+        finally:
+            for key, future in sent.items():
+                if not future.done():
+                    future.set_result(None)
+                if self._sending.get(key) is future:
+                    del self._sending[key]
+
+        for key, futures in waiters.items():
+            result = results.get(key)
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def _async_send_batch(
+        self, pending: dict, previous: dict, sent: dict
+    ) -> dict:
+        """Send a batch of commands and return their results by key."""
+        if self._send_bulk is not None and len(pending) > 1:
+            waiting = [future for future in previous.values() if future is not None]
+            try:
+                if waiting:
+                    await asyncio.wait(waiting)
+                return await self._send_bulk(pending)
+            except Exception as err:  # pylint: disable=broad-except
+                return {key: err for key in pending}
+        keys = list(pending)
+        outcomes = await asyncio.gather(
+            *(
+                self._async_send_one(previous[key], sent[key], *pending[key])
+                for key in keys
+            ),
+            return_exceptions=True,
+        )
+        return dict(zip(keys, outcomes))
+
+    async def _async_send_one(
+        self, previous: asyncio.Future | None, sent: asyncio.Future, send, *args
+    ) -> Any:
+        """Send a single command once the previous command for its key is sent.
+
+        The number of parallel requests is bounded.
+        """
+        if previous is not None:
+            # Waiting does not cancel the shared future when this is cancelled
+            await asyncio.wait([previous])
+        try:
+            async with self._semaphore:
+                start = time.monotonic()
+                result = await send(*args)
+        finally:
+            sent.set_result(None)
+        self.latency = smoothed_latency(self.latency, time.monotonic() - start)
+        return result
@@ -3,27 +3,47 @@ from __future__ import annotations
 
 import logging
 import voluptuous as vol
-import asyncio
 
 from homeassistant import config_entries
 from homeassistant.const import (
     CONF_CLIENT_ID,
     CONF_CLIENT_SECRET,
     CONF_HOST,
+    CONF_PASSWORD,
     CONF_PORT,
+    CONF_SCAN_INTERVAL,
+    CONF_USERNAME,
     CONF_VERIFY_SSL,
 )
-from oauthlib.oauth2.rfc6749.errors import InvalidClientError
-from pyopenmotics.openmotics import BackendClient
-from pyopenmotics.exceptions import OpenMoticsError
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from .api import OpenMoticsApiClient
 from .const import (
+    CONF_GATEWAY,
     CONF_INSTALLATION_ID,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_SENSOR_PRECISION,
+    CONF_SENSOR_SCAN_INTERVAL,
+    CONF_STALENESS_BUDGET,
+    CONF_TRANSPORT,
+    CONF_VERIFY_DELAY,
+    DEFAULT_GATEWAY_PORT,
     DEFAULT_HOST,
+    DEFAULT_MAX_SCAN_INTERVAL,
     DEFAULT_PORT,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SENSOR_PRECISION,
+    DEFAULT_SENSOR_SCAN_INTERVAL,
+    DEFAULT_STALENESS_BUDGET,
+    DEFAULT_VERIFY_DELAY,
     DEFAULT_VERIFY_SSL,
     DOMAIN,
+    TRANSPORT_CLOUD,
+    TRANSPORT_HYBRID,
+    TRANSPORT_LOCAL,
 )
+from .gateway import OpenMoticsGatewayClient, create_gateway_session
 
 # from .coordinator import get_backendclient
 from .exceptions import CannotConnect, InvalidAuth
@@ -39,6 +59,24 @@ BACKENDCLIENT_CONFIG = vol.Schema(
     }
 )
 
+GATEWAY_CONFIG = vol.Schema(
+    {
+        vol.Required(CONF_HOST): str,
+        vol.Required(CONF_USERNAME): str,
+        vol.Required(CONF_PASSWORD): str,
+        vol.Optional(CONF_PORT, default=DEFAULT_GATEWAY_PORT): int,
+        vol.Optional(CONF_VERIFY_SSL, default=DEFAULT_VERIFY_SSL): bool,
+    }
+)
+
+TRANSPORT_CONFIG = vol.Schema(
+    {
+        vol.Required(CONF_TRANSPORT, default=TRANSPORT_CLOUD): vol.In(
+            [TRANSPORT_CLOUD, TRANSPORT_LOCAL, TRANSPORT_HYBRID]
+        ),
+    }
+)
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -46,40 +84,117 @@ _LOGGER = logging.getLogger(__name__)
 class OpenMoticsFlowHandler(config_entries.ConfigFlow):
     """Handle a config flow for OpenMotics."""
 
-    VERSION = 1
-    CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
+    VERSION = 2
+    CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_PUSH
 
     def __init__(self) -> None:
         """Create a new instance of the flow handler."""
         self.config = {}
+        self.transport = TRANSPORT_CLOUD
         self.installation_id = None
         self.installations = {}
         self.clientid = None
         self.client_secret = None
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OpenMoticsOptionsFlowHandler(config_entry)
+
     async def async_step_import(self, user_input=None):
         """Occurs when a previously entry setup fails and is re-initiated."""
-        return await self.async_step_user(user_input)
+        return await self.async_step_cloud(user_input)
 
-    def async_show_form_step_user(self, errors):
-        """Show the form belonging to the user step."""
+    def async_show_form_step_cloud(self, errors):
+        """Show the form belonging to the cloud step."""
         schema = BACKENDCLIENT_CONFIG
         if (self.clientid is None and self.client_secret is None) or errors:
             schema = BACKENDCLIENT_CONFIG
 
-        return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
+        return self.async_show_form(step_id="cloud", data_schema=schema, errors=errors)
 
     async def async_step_user(self, user_input=None):
         # """Handle external yaml configuration."""
         # if self._async_current_entries():
         #     _LOGGER.warning("Only one configuration of OpenMotics is allowed.")
         #     return self.async_abort(reason="single_instance_allowed")
-        """Handle a flow initiated by the user."""
+        """Handle a flow initiated by the user, ask how to reach the installation."""
+        if user_input is None:
+            return self.async_show_form(step_id="user", data_schema=TRANSPORT_CONFIG)
+
+        self.transport = user_input[CONF_TRANSPORT]
+        if self.transport == TRANSPORT_LOCAL:
+            return await self.async_step_local()
+        # A hybrid entry asks for the gateway once the installation is selected
+        return await self.async_step_cloud()
+
+    async def _async_fetch_installations(self, api, fetch: bool = True) -> dict:
+        """Verify the authentication and fetch the installations, return the errors."""
+        errors = {}
+        try:
+            await api.get_token()
+
+            if fetch:
+                self.installations = await api.get_installations()
+
+        except CannotConnect:
+            errors["base"] = "cannot_connect"
+        except InvalidAuth:
+            errors["base"] = "invalid_auth"
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Unexpected exception")
+            errors["base"] = "unknown"
+        finally:
+            api.close()
+        return errors
+
+    async def async_step_local(self, user_input=None):
+        """Handle the connection to the local API of a gateway."""
+        errors = {}
+
+        if user_input is not None:
+            gateway = {
+                CONF_HOST: user_input[CONF_HOST],
+                CONF_USERNAME: user_input[CONF_USERNAME],
+                CONF_PASSWORD: user_input[CONF_PASSWORD],
+                CONF_PORT: user_input[CONF_PORT],
+                CONF_VERIFY_SSL: user_input[CONF_VERIFY_SSL],
+            }
+            session = create_gateway_session(gateway[CONF_VERIFY_SSL])
+            api = OpenMoticsGatewayClient(
+                session,
+                username=gateway[CONF_USERNAME],
+                password=gateway[CONF_PASSWORD],
+                host=gateway[CONF_HOST],
+                port=gateway[CONF_PORT],
+            )
+            try:
+                # A hybrid entry already selected the installation in the cloud
+                errors = await self._async_fetch_installations(
+                    api, fetch=self.transport != TRANSPORT_HYBRID
+                )
+            finally:
+                await session.close()
+            if not errors and self.transport == TRANSPORT_HYBRID:
+                self.config[CONF_GATEWAY] = gateway
+                return await self.async_step_create_entry()
+            if not errors:
+                self.config = {CONF_TRANSPORT: TRANSPORT_LOCAL, **gateway}
+                return await self.async_step_select_installation()
+
+        return self.async_show_form(
+            step_id="local", data_schema=GATEWAY_CONFIG, errors=errors
+        )
+
+    async def async_step_cloud(self, user_input=None):
+        """Handle the connection to the cloud."""
         errors = {}
 
         if user_input is not None:
 
             self.config = {
+                CONF_TRANSPORT: self.transport,
                 CONF_CLIENT_ID: user_input[CONF_CLIENT_ID],
                 CONF_CLIENT_SECRET: user_input[CONF_CLIENT_SECRET],
                 CONF_HOST: user_input[CONF_HOST],
@@ -87,57 +202,29 @@ class OpenMoticsFlowHandler(config_entries.ConfigFlow):
                 CONF_VERIFY_SSL: user_input[CONF_VERIFY_SSL],
             }
 
-            try:
-                # Create a backendclient object and verify authentication.
-                if self.config[CONF_HOST] == DEFAULT_HOST:
-                    backendclient = BackendClient(
-                        client_id=self.config[CONF_CLIENT_ID],
-                        client_secret=self.config[CONF_CLIENT_SECRET],
-                    )
-                else:
-                    backendclient = BackendClient(
-                        client_id=self.config[CONF_CLIENT_ID],
-                        client_secret=self.config[CONF_CLIENT_SECRET],
-                        server=self.config[CONF_HOST],
-                        port=self.config[CONF_PORT],
-                        ssl=self.config[CONF_VERIFY_SSL],
-                    )
-                await self.hass.async_add_executor_job(backendclient.get_token)
-
-                self.installations = await self.hass.async_add_executor_job(
-                    backendclient.base.installations.all
-                )
-
-            # TODO: add proper error handling
-            except (
-                asyncio.TimeoutError,
-                OpenMoticsError,
-            ) as err:
-                _LOGGER.error(err)
-                raise CannotConnect from err
-
-            except KeyError as err:
-                raise InvalidAuth from err
-            except RuntimeError as err:
-                raise CannotConnect from err
-            except InvalidClientError as err:
-                raise InvalidAuth from err
-            except CannotConnect:
-                errors["base"] = "cannot_connect"
-            except InvalidAuth:
-                errors["base"] = "invalid_auth"
-            except Exception:  # pylint: disable=broad-except
-                _LOGGER.exception("Unexpected exception")
-                errors["base"] = "unknown"
+            # Create an api client and verify authentication.
+            host = self.config[CONF_HOST]
+            api = OpenMoticsApiClient(
+                async_get_clientsession(
+                    self.hass,
+                    verify_ssl=host == DEFAULT_HOST or self.config[CONF_VERIFY_SSL],
+                ),
+                client_id=self.config[CONF_CLIENT_ID],
+                client_secret=self.config[CONF_CLIENT_SECRET],
+                host=host,
+                port=self.config[CONF_PORT],
+            )
+            errors = await self._async_fetch_installations(api)
             if errors:
-                return self.async_show_form_step_user(errors)
+                return self.async_show_form_step_cloud(errors)
 
         if len(self.installations) > 0:
             # show selection form
             return await self.async_step_select_installation()
 
-        errors["base"] = "discovery_error"
-        return self.async_show_form_step_user(errors)
+        if user_input is not None:
+            errors["base"] = "discovery_error"
+        return self.async_show_form_step_cloud(errors)
 
     async def async_step_select_installation(self, user_input=None):
         """Ask user to select the Installation ID to use."""
@@ -164,18 +251,13 @@ class OpenMoticsFlowHandler(config_entries.ConfigFlow):
             )
 
         self.installation_id = user_input[CONF_INSTALLATION_ID]
+        if self.transport == TRANSPORT_HYBRID:
+            return await self.async_step_local()
         return await self.async_step_create_entry()
 
     async def async_step_create_entry(self, data=None):
         """Create a config entry at completion of a flow and authorization of the app."""
-        data = {
-            CONF_HOST: self.config[CONF_HOST],
-            CONF_CLIENT_ID: self.config[CONF_CLIENT_ID],
-            CONF_CLIENT_SECRET: self.config[CONF_CLIENT_SECRET],
-            CONF_INSTALLATION_ID: self.installation_id,
-            CONF_PORT: self.config[CONF_PORT],
-            CONF_VERIFY_SSL: self.config[CONF_VERIFY_SSL],
-        }
+        data = {**self.config, CONF_INSTALLATION_ID: self.installation_id}
 
         unique_id = self.construct_unique_id(
             self.config[CONF_HOST], self.installation_id
@@ -188,3 +270,63 @@ class OpenMoticsFlowHandler(config_entries.ConfigFlow):
     def construct_unique_id(host: str, install_id: str) -> str:
         """Construct the unique id from the ssdp discovery or user_step."""
         return f"{host}-{install_id}"
+
+
+class OpenMoticsOptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of OpenMotics."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the polling options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_SCAN_INTERVAL,
+                        default=options.get(
+                            CONF_SCAN_INTERVAL,
+                            int(DEFAULT_SCAN_INTERVAL.total_seconds()),
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                    vol.Optional(
+                        CONF_MAX_SCAN_INTERVAL,
+                        default=options.get(
+                            CONF_MAX_SCAN_INTERVAL,
+                            int(DEFAULT_MAX_SCAN_INTERVAL.total_seconds()),
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                    vol.Optional(
+                        CONF_VERIFY_DELAY,
+                        default=options.get(CONF_VERIFY_DELAY, DEFAULT_VERIFY_DELAY),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_STALENESS_BUDGET,
+                        default=options.get(
+                            CONF_STALENESS_BUDGET,
+                            int(DEFAULT_STALENESS_BUDGET.total_seconds()),
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=60)),
+                    vol.Optional(
+                        CONF_SENSOR_SCAN_INTERVAL,
+                        default=options.get(
+                            CONF_SENSOR_SCAN_INTERVAL,
+                            int(DEFAULT_SENSOR_SCAN_INTERVAL.total_seconds()),
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=5)),
+                    vol.Optional(
+                        CONF_SENSOR_PRECISION,
+                        default=options.get(
+                            CONF_SENSOR_PRECISION, DEFAULT_SENSOR_PRECISION
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                }
+            ),
+        )
@@ -19,10 +19,63 @@ to late. 28 seconds is better.
 """
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
 
+"""
+When nothing happens in the installation, the interval between polls grows
+with ADAPTIVE_BACKOFF up to DEFAULT_MAX_SCAN_INTERVAL. A command or a detected
+change brings it back to the scan interval for at least ACTIVE_PERIOD.
+"""
+DEFAULT_MAX_SCAN_INTERVAL = timedelta(minutes=5)
+ADAPTIVE_BACKOFF = 1.5
+ACTIVE_PERIOD = timedelta(minutes=5)
+
+"""
+While the event websocket is connected, state changes are pushed and a full
+poll is only needed now and then to reconcile missed events.
+"""
+DEFAULT_RECONCILE_INTERVAL = timedelta(minutes=10)
+
+"""
+After a burst of commands the optimistic states are verified with a single
+refresh, this many seconds after the first command of the burst.
+"""
+DEFAULT_VERIFY_DELAY = 2
+
+"""
+When a refresh fails the last known status is kept. A device only becomes
+unavailable once its status was not confirmed for the staleness budget.
+"""
+DEFAULT_STALENESS_BUDGET = timedelta(minutes=15)
+
+"""
+Sensors change more often than the other devices, so their values are polled
+on their own at the sensor scan interval, unless they are pushed. A sensor
+only writes its state when its value changed by at least the precision.
+"""
+DEFAULT_SENSOR_SCAN_INTERVAL = timedelta(seconds=15)
+DEFAULT_SENSOR_PRECISION = 0.1
+
+"""
+The configuration of the installation (names, locations, capabilities, ...)
+rarely changes, it is only fetched at setup and once in a while. The polls
+only fetch the live status of the devices.
+"""
+CONFIGURATION_INTERVAL = timedelta(hours=12)
+CONFIGURATION_CATEGORIES = ("outputs", "shutters", "groupactions", "sensors")
+STATUS_CATEGORIES = ("outputs", "shutters", "sensors")
+
 DEFAULT_HOST = "cloud.openmotics.com"
 DEFAULT_PORT = 443
 DEFAULT_VERIFY_SSL = False
 
+"""
+An installation is reached through the cloud, directly through the local
+API of its gateway on the LAN, or through both with automatic failover.
+"""
+TRANSPORT_CLOUD = "cloud"
+TRANSPORT_LOCAL = "local"
+TRANSPORT_HYBRID = "hybrid"
+DEFAULT_GATEWAY_PORT = 443
+
 """
 Get a list of all modules attached and registered with the master.
 :returns:
@@ -73,7 +126,14 @@ PLATFORMS = [LIGHT, SWITCH, COVER, SCENE, SENSOR]
 
 # Configuration and options
 CONF_ENABLED = "enabled"
+CONF_GATEWAY = "gateway"
 CONF_INSTALLATION_ID = "installation_id"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_SENSOR_PRECISION = "sensor_precision"
+CONF_SENSOR_SCAN_INTERVAL = "sensor_scan_interval"
+CONF_STALENESS_BUDGET = "staleness_budget"
+CONF_TRANSPORT = "transport"
+CONF_VERIFY_DELAY = "verify_delay"
 
 # Defaults
 DEFAULT_NAME = DOMAIN
@@ -2,34 +2,133 @@
 from __future__ import annotations
 
 import asyncio
+from datetime import timedelta
 import logging
-from async_timeout import timeout
+import time
+from typing import Any, Awaitable
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_CLIENT_ID,
     CONF_CLIENT_SECRET,
     CONF_HOST,
+    CONF_PASSWORD,
     CONF_PORT,
+    CONF_SCAN_INTERVAL,
+    CONF_USERNAME,
     CONF_VERIFY_SSL,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.exceptions import ConfigEntryNotReady
-
-from pyopenmotics.openmotics import BackendClient
-from pyopenmotics.exceptions import OpenMoticsError
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .account import OpenMoticsAccount, async_get_account, async_release_account
+from .api import OpenMoticsApiClient
+from .cache import OpenMoticsCache, to_cache
+from .commands import OpenMoticsCommandQueue
 from .const import (
+    ACTIVE_PERIOD,
+    ADAPTIVE_BACKOFF,
+    CONF_GATEWAY,
     CONF_INSTALLATION_ID,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_SENSOR_SCAN_INTERVAL,
+    CONF_STALENESS_BUDGET,
+    CONF_TRANSPORT,
+    CONF_VERIFY_DELAY,
+    CONFIGURATION_CATEGORIES,
+    DEFAULT_GATEWAY_PORT,
     DEFAULT_HOST,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_PORT,
+    DEFAULT_RECONCILE_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_SENSOR_SCAN_INTERVAL,
+    DEFAULT_STALENESS_BUDGET,
+    DEFAULT_VERIFY_DELAY,
     DOMAIN,
+    TRANSPORT_CLOUD,
+    TRANSPORT_HYBRID,
+    TRANSPORT_LOCAL,
+)
+from .exceptions import OpenMoticsException
+from .gateway import OpenMoticsGatewayClient, create_gateway_session
+from .models import (
+    ACTION_OUTPUT_TOGGLE,
+    GROUP_ACTION_STATES,
+    DeviceModel,
+    index_models,
 )
-from .exceptions import CannotConnect, InvalidAuth
+from .router import OpenMoticsTransportRouter
+from .websocket import EVENT_CATEGORIES, WS_PATH, OpenMoticsEventListener
 
 _LOGGER = logging.getLogger(__name__)
 
+# Changes of these devices mean the installation is in use, sensors drift
+ACTIVITY_CATEGORIES = ("outputs", "shutters")
+# The state a shutter reports after a command
+SHUTTER_COMMAND_STATES = {"up": "GOING_UP", "down": "GOING_DOWN", "stop": "STOPPED"}
+
+
+def changed_devices(old: dict | None, new: dict) -> set:
+    """Return the (category, id) of the devices that differ between two snapshots."""
+    changed = set()
+    for category, devices in new.items():
+        old_devices = (old or {}).get(category, {})
+        for device_id, device in devices.items():
+            # A new device is reported even when its status is None
+            if device_id not in old_devices or old_devices[device_id] != device:
+                changed.add((category, device_id))
+        for device_id in old_devices.keys() - devices.keys():
+            changed.add((category, device_id))
+    return changed
+
+
+def unavailable_reason(status) -> str | None:
+    """Return why the status makes a device unavailable, or None if it is available."""
+    if status is None:
+        return "missing"
+    if isinstance(status, dict) and status.get("online") is False:
+        # The module of the device does not respond
+        return "offline"
+    return None
+
+
+class AdaptivePollInterval:
+    """Poll fast while the installation is in use and back off when it is idle."""
+
+    def __init__(
+        self,
+        minimum: timedelta,
+        maximum: timedelta,
+        backoff: float = ADAPTIVE_BACKOFF,
+        active_period: timedelta = ACTIVE_PERIOD,
+    ) -> None:
+        """Initialize the interval."""
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.interval = minimum
+        self._backoff = backoff
+        self._active_period = active_period.total_seconds()
+        self._last_activity: float | None = None
+
+    def activity(self) -> None:
+        """Register user activity or a detected change."""
+        self._last_activity = time.monotonic()
+        self.interval = self.minimum
+
+    def next(self) -> timedelta:
+        """Return the interval until the next poll."""
+        if (
+            self._last_activity is not None
+            and time.monotonic() - self._last_activity < self._active_period
+        ):
+            self.interval = self.minimum
+        else:
+            self.interval = min(self.interval * self._backoff, self.maximum)
+        return self.interval
+
 
 class OpenMoticsDataUpdateCoordinator(DataUpdateCoordinator):
     """A OpenMotics Data Update Coordinator."""
@@ -40,89 +139,640 @@ class OpenMoticsDataUpdateCoordinator(DataUpdateCoordinator):
             hass,
             _LOGGER,
             name=DOMAIN,
-            #update_interval=DEFAULT_SCAN_INTERVAL,
+            update_interval=DEFAULT_SCAN_INTERVAL,
         )
         self.hass = hass
-        # self.entry = entry
+        self.entry = entry
         self._install_id = entry.data.get(CONF_INSTALLATION_ID)
+        self.poll_interval = AdaptivePollInterval(
+            timedelta(
+                seconds=entry.options.get(
+                    CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL.total_seconds()
+                )
+            ),
+            timedelta(
+                seconds=entry.options.get(
+                    CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL.total_seconds()
+                )
+            ),
+        )
+        self.update_interval = self.poll_interval.minimum
+        self.sensor_scan_interval = timedelta(
+            seconds=entry.options.get(
+                CONF_SENSOR_SCAN_INTERVAL,
+                DEFAULT_SENSOR_SCAN_INTERVAL.total_seconds(),
+            )
+        )
+        self._sensor_poll_running = False
 
         """Set up a OpenMotics controller"""
-        if entry.data.get(CONF_HOST) == DEFAULT_HOST:
-            self.backendclient = BackendClient(
-                client_id=entry.data.get(CONF_CLIENT_ID),
-                client_secret=entry.data.get(CONF_CLIENT_SECRET),
+        # The clients are closed by the coordinator that created them
+        self._account: OpenMoticsAccount | None = None
+        self._gateway: OpenMoticsGatewayClient | None = None
+        self._session = None
+        transport = entry.data.get(CONF_TRANSPORT)
+        if transport == TRANSPORT_LOCAL:
+            self.api = self._create_gateway_client(entry.data)
+        elif transport == TRANSPORT_HYBRID:
+            self.api = OpenMoticsTransportRouter(
+                {
+                    TRANSPORT_LOCAL: self._create_gateway_client(
+                        entry.data[CONF_GATEWAY]
+                    ),
+                    TRANSPORT_CLOUD: self._create_cloud_client(entry.data),
+                },
+                self._install_id,
             )
         else:
-            self.backendclient = BackendClient(
-                client_id=entry.data.get(CONF_CLIENT_ID),
-                client_secret=entry.data.get(CONF_CLIENT_SECRET),
-                server=entry.data.get(CONF_HOST),
-                port=entry.data.get(CONF_PORT),
-                ssl=entry.data.get(CONF_VERIFY_SSL),
+            self.api = self._create_cloud_client(entry.data)
+        # The static configuration of the devices, by category and local id
+        self.configuration: dict[str, dict[int, DeviceModel]] = {
+            category: {} for category in CONFIGURATION_CATEGORIES
+        }
+        self._unknown_devices: set[tuple] = set()
+        self.cache = OpenMoticsCache(hass, entry.entry_id, self._cache_data)
+        # True while the status comes from the cache instead of a live refresh
+        self.stale = False
+        # When the status of every device was last confirmed (monotonic time)
+        self.updated_at: dict[tuple, float] = {}
+        self._staleness_budget = entry.options.get(
+            CONF_STALENESS_BUDGET, DEFAULT_STALENESS_BUDGET.total_seconds()
+        )
+        # The devices whose status was not confirmed within the budget
+        self._expired: set[tuple] = set()
+        # The devices that are unavailable according to their status, and why
+        self._unavailable: dict[tuple, str] = {}
+        # The duration in seconds of every phase of the setup
+        self.setup_timings: dict[str, float] = {}
+        self._device_listeners: dict[tuple, list[CALLBACK_TYPE]] = {}
+        self._changed_devices: set[tuple] = set()
+        # The number of entities notified by the last refresh
+        self.touched_entities = 0
+        # Optimistic states waiting for the verification refresh
+        self._optimistic: dict[tuple, dict] = {}
+        self._verify_delay = entry.options.get(CONF_VERIFY_DELAY, DEFAULT_VERIFY_DELAY)
+        self._verify_unsub: CALLBACK_TYPE | None = None
+        # The number of optimistic states the verification did not confirm
+        self.rollbacks = 0
+        self.commands = OpenMoticsCommandQueue()
+        # The number of commands not sent, the output was in that state already
+        self.suppressed_commands = 0
+        # Only the cloud pushes events, the gateway is polled
+        self.event_listener: OpenMoticsEventListener | None = None
+        if self.api.ws_url is not None:
+            self.event_listener = OpenMoticsEventListener(
+                self.api.session,
+                f"{self.api.ws_url}{WS_PATH}",
+                self.api.get_valid_token,
+                self._install_id,
+                self._async_handle_event,
+                self._async_handle_connection,
             )
+        # Removes the listener that notifies the entities, and stops the polls
+        self._dispatch_unsub: CALLBACK_TYPE | None = None
 
-    async def get_token(self) -> bool:
-        """Login to OpenMotics cloud / gateway."""
-        _LOGGER.debug(
-            "Logging in via get_token..........................................................................."
+    def _create_cloud_client(self, data: dict) -> OpenMoticsApiClient:
+        """Return the client for the cloud API, shared by the installations of an account."""
+        host = data.get(CONF_HOST, DEFAULT_HOST)
+        port = data.get(CONF_PORT, DEFAULT_PORT)
+        # The cloud always uses a proper certificate
+        verify_ssl = host == DEFAULT_HOST or data.get(CONF_VERIFY_SSL)
+        self._account = async_get_account(
+            self.hass,
+            (host, port, data.get(CONF_CLIENT_ID), data.get(CONF_CLIENT_SECRET)),
+            self.entry.entry_id,
+            lambda: OpenMoticsApiClient(
+                async_get_clientsession(self.hass, verify_ssl=verify_ssl),
+                client_id=data.get(CONF_CLIENT_ID),
+                client_secret=data.get(CONF_CLIENT_SECRET),
+                host=host,
+                port=port,
+            ),
         )
-        try:
-            await self.hass.async_add_executor_job(self.backendclient.get_token)
+        return self._account.api
 
-        except asyncio.TimeoutError:
-            _LOGGER.error("Timeout connecting to the OpenMoticsApi")
-            raise CannotConnect
+    def _create_gateway_client(self, data: dict) -> OpenMoticsGatewayClient:
+        """Return a client for the local API of the gateway."""
+        # A dedicated pool keeps the connections to the gateway open
+        self._session = create_gateway_session(data.get(CONF_VERIFY_SSL))
+        self._gateway = OpenMoticsGatewayClient(
+            self._session,
+            username=data.get(CONF_USERNAME),
+            password=data.get(CONF_PASSWORD),
+            host=data.get(CONF_HOST),
+            port=data.get(CONF_PORT, DEFAULT_GATEWAY_PORT),
+        )
+        return self._gateway
 
-        except OpenMoticsError as err:
-            _LOGGER.error("Error connecting to the OpenMoticsApi")
-            # _LOGGER.error(err)
-            raise ConfigEntryNotReady(
-                f"Unable to connect to OpenMoticsApi: {err}"
-            ) from err
+    def _cache_data(self) -> dict:
+        """Return the data to store in the cache."""
+        return to_cache(self.configuration, self.data)
 
+    async def async_load_cache(self) -> bool:
+        """Start from the cached configuration and status, if there is a cache."""
+        cached = await self.cache.async_load()
+        if cached is None:
+            return False
+        self.configuration, self.data = cached
+        self.stale = True
+        # The staleness budget of the cached status starts now
+        self._async_confirm_devices()
+        self._async_update_configured_availability()
         return True
 
+    async def _async_timed(self, phase: str, awaitable: Awaitable) -> Any:
+        """Await a setup phase and keep its duration."""
+        start = time.monotonic()
+        try:
+            return await awaitable
+        finally:
+            self.setup_timings[phase] = round(time.monotonic() - start, 3)
+
+    async def async_setup_live(self) -> dict:
+        """Log in once, then fetch everything else concurrently.
+
+        Returns the details of the installation.
+        """
+        start = time.monotonic()
+        await self._async_timed("login", self.api.get_token())
+        installation, _, data = await asyncio.gather(
+            self._async_timed(
+                "installation", self.api.get_installation(self.install_id)
+            ),
+            self._async_timed("configuration", self.async_refresh_configuration()),
+            self._async_timed("status", self.api.get_status(self.install_id)),
+        )
+        self.async_set_updated_data(self._async_process_status(data))
+        self.setup_timings["total"] = round(time.monotonic() - start, 3)
+        _LOGGER.debug("OpenMotics setup timings in seconds: %s", self.setup_timings)
+        return installation
+
+    async def async_refresh_configuration(self) -> None:
+        """Fetch the configuration of the installation."""
+        configuration = await self.api.get_configuration(self.install_id)
+        # The models drop the status, it is polled separately
+        new_configuration = {
+            category: index_models(configuration.get(category) or [])
+            for category in CONFIGURATION_CATEGORIES
+        }
+        known = {
+            category: devices.keys() for category, devices in self.configuration.items()
+        }
+        self.configuration = new_configuration
+        self._async_update_configured_availability()
+        if any(known.values()) and known != {
+            category: devices.keys() for category, devices in new_configuration.items()
+        }:
+            _LOGGER.info("The OpenMotics configuration changed, reloading")
+            # The reloaded entry starts from the cache, so it has to be current
+            await self.cache.async_save_now()
+            self.hass.async_create_task(
+                self.hass.config_entries.async_reload(self.entry.entry_id)
+            )
+        else:
+            self.cache.async_save()
+
+    async def async_background_refresh_configuration(self, _now=None) -> None:
+        """Refresh the configuration, only logging the errors."""
+        try:
+            await self.async_refresh_configuration()
+        except OpenMoticsException as err:
+            _LOGGER.warning("Could not refresh the OpenMotics configuration: %s", err)
+
     async def _async_update_data(self) -> dict:
-        """Fetch data from API endpoint.
+        """Fetch the live status of the devices.
 
-        This is the place to pre-process the data to lookup tables so entities can quickly look up their data.
+        The status is indexed by category and local id, so entities can quickly look up their data.
         """
-        overview = {}
+        if self._account is not None:
+            # Stay within the poll budget of the account
+            await self._account.scheduler.async_slot()
+        try:
+            data = await self.api.get_status(self.install_id)
 
+        except OpenMoticsException as err:
+            # The last known status is kept, only expired devices change
+            self._async_expire_devices()
+            raise UpdateFailed(f"Could not retrieve the status: {err}") from err
+        return self._async_process_status(data)
+
+    async def async_refresh_sensors(self, _now=None) -> None:
+        """Refresh only the sensors, between the polls of the full status."""
+        if self.data is None or self.events_connected or self._sensor_poll_running:
+            # The sensor values are pushed, or a poll is still running
+            return
+        self._sensor_poll_running = True
         try:
-            overview = await self.hass.async_add_executor_job(
-                self.backendclient.base.installations.status_by_id, self.install_id
-            )
+            if self._account is not None:
+                await self._account.scheduler.async_slot()
+            sensors = await self.api.get_sensor_status(self.install_id)
+        except OpenMoticsException as err:
+            # The full poll handles the errors, and expires the sensors
+            _LOGGER.debug("Could not refresh the OpenMotics sensors: %s", err)
+            return
+        finally:
+            self._sensor_poll_running = False
+        now = time.monotonic()
+        statuses = self.data["sensors"]
+        changed = set()
+        for sensor_id, status in sensors.items():
+            if sensor_id not in statuses:
+                # New sensors are picked up by the full poll
+                continue
+            key = ("sensors", sensor_id)
+            self.updated_at[key] = now
+            if key in self._expired:
+                self._expired.discard(key)
+                changed.add(key)
+            if statuses[sensor_id] != status:
+                statuses[sensor_id] = status
+                changed.add(key)
+        self._async_update_availability(self.data, changed)
+        for category, device_id in changed:
+            self.async_update_device_listeners(category, device_id)
+
+    @callback
+    def _async_confirm_devices(self, data: dict | None = None) -> None:
+        """Mark the status of the devices as confirmed now."""
+        now = time.monotonic()
+        for category, statuses in (self.data if data is None else data).items():
+            for device_id in statuses:
+                self.updated_at[(category, device_id)] = now
+        # The expired devices become available again
+        self._changed_devices |= self._expired
+        self._expired = set()
+
+    @callback
+    def _async_expire_devices(self) -> None:
+        """Find the devices whose status was not confirmed within the budget."""
+        deadline = time.monotonic() - self._staleness_budget
+        expired = {key for key, updated in self.updated_at.items() if updated < deadline}
+        just_expired = expired - self._expired
+        self._expired = expired
+        # Home Assistant does not notify the listeners after a second failed
+        # refresh in a row, so the devices that just expired are notified here
+        for category, device_id in just_expired:
+            self.async_update_device_listeners(category, device_id)
+
+    def is_expired(self, category: str, device_id) -> bool:
+        """Return True if the status of a device is older than the budget."""
+        return (category, device_id) in self._expired
+
+    def is_available(self, category: str, device_id) -> bool:
+        """Return True if the device has a recent status that reports it working."""
+        key = (category, device_id)
+        return key not in self._unavailable and key not in self._expired
 
-        except OpenMoticsError as err:
-            _LOGGER.error("Could not retrieve the data from the OpenMotics API")
-            _LOGGER.error("Too many errors: %s", err)
-            return {
-                "lights": {},
-                "outputs": {},
-                "groupactions": {},
-                "shutters": {},
-                "sensors": {},
-            }
-        # Store data in a way Home Assistant can easily consume it
+    @property
+    def unavailable_devices(self) -> dict[tuple, str]:
+        """Return why each unavailable device is unavailable."""
         return {
-            "lights": overview["lights"],
-            "outputs": overview["outputs"],
-            "groupactions": overview["groupactions"],
-            "shutters": overview["shutters"],
-            "sensors": overview["sensors"],
+            **{key: "stale" for key in self._expired},
+            **self._unavailable,
+        }
+
+    @callback
+    def _async_update_availability(self, data: dict, keys) -> set[tuple]:
+        """Update the availability of some devices, return the ones that changed."""
+        changed = set()
+        for key in keys:
+            category, device_id = key
+            if category not in data:
+                # Devices without a status, like group actions, are always available
+                continue
+            reason = unavailable_reason(data[category].get(device_id))
+            if reason == self._unavailable.get(key):
+                continue
+            if reason is None:
+                del self._unavailable[key]
+            else:
+                self._unavailable[key] = reason
+            changed.add(key)
+        return changed
+
+    @callback
+    def _async_update_configured_availability(self) -> None:
+        """Update the availability of all configured devices.
+
+        Configured devices can be missing from the status, so they are not
+        covered by the changes found on a refresh.
+        """
+        if self.data is None:
+            return
+        changed = self._async_update_availability(
+            self.data,
+            [
+                (category, device_id)
+                for category, devices in self.configuration.items()
+                for device_id in devices
+            ],
+        )
+        for category, device_id in changed:
+            self.async_update_device_listeners(category, device_id)
+
+    @callback
+    def _async_process_status(self, data: dict) -> dict:
+        """Merge a fetched status with the local state and find the changes."""
+        self.cache.async_save()
+        self._async_confirm_devices(data)
+        if self.stale:
+            # Every entity drops its assumed state
+            self.stale = False
+            self._changed_devices |= set(self._device_listeners)
+        # Keep the optimistic states that are not verified yet
+        for (category, device_id), status in self._optimistic.items():
+            statuses = data.get(category, {})
+            if device_id in statuses:
+                statuses[device_id] = {**(statuses[device_id] or {}), **status}
+        unknown = {
+            (category, device_id)
+            for category, statuses in data.items()
+            for device_id in statuses.keys() - self.configuration[category].keys()
         }
+        if unknown - self._unknown_devices:
+            # A device was added since the configuration was fetched
+            self.hass.async_create_task(self.async_background_refresh_configuration())
+        self._unknown_devices = unknown
+        changed = changed_devices(self.data, data)
+        if any(category in ACTIVITY_CATEGORIES for category, _ in changed):
+            self.poll_interval.activity()
+        # Only the changed devices can change their availability
+        self._async_update_availability(data, changed)
+        self._changed_devices |= changed
+        # While the websocket pushes the changes, polling only reconciles
+        self.update_interval = (
+            DEFAULT_RECONCILE_INTERVAL
+            if self.events_connected
+            else self.poll_interval.next()
+        )
+        return data
+
+    def get_configuration(self, category: str, device_id) -> DeviceModel | None:
+        """Return the configuration of a device, or None if it is unknown."""
+        return self.configuration[category].get(device_id)
+
+    def get_status(self, category: str, device_id):
+        """Return the live status of a device, or None if it is unknown."""
+        if self.data is None:
+            return None
+        return self.data[category].get(device_id)
+
+    def _is_known_output_state(self, output_id, on: bool, value=None) -> bool:
+        """Return True if an output is known to be in a state already."""
+        if self.stale or not self.is_available("outputs", output_id):
+            return False
+        status = self.get_status("outputs", output_id)
+        if not isinstance(status, dict) or status.get("on") is not on:
+            return False
+        return value is None or status.get("value") in (None, value)
+
+    async def async_output_turn_on(self, output_id, value: int | None = None):
+        """Turn on an output, batched with the other commands."""
+        if self._is_known_output_state(output_id, True, value):
+            # The output is on at the value already
+            self.suppressed_commands += 1
+            return None
+        return await self.commands.async_send(
+            ("outputs", output_id),
+            self.api.output_turn_on,
+            self.install_id,
+            output_id,
+            value,
+        )
+
+    async def async_output_turn_off(self, output_id):
+        """Turn off an output, batched with the other commands."""
+        if self._is_known_output_state(output_id, False):
+            self.suppressed_commands += 1
+            return None
+        return await self.commands.async_send(
+            ("outputs", output_id),
+            self.api.output_turn_off,
+            self.install_id,
+            output_id,
+        )
+
+    async def async_shutter_command(self, shutter_id, command: str):
+        """Move a shutter up or down or stop it, batched with the other commands."""
+        result = await self.commands.async_send(
+            ("shutters", shutter_id),
+            getattr(self.api, f"shutter_{command}"),
+            self.install_id,
+            shutter_id,
+        )
+        # Verified with the other commands of the burst by a single refresh
+        self.async_set_optimistic(
+            "shutters", shutter_id, {"state": SHUTTER_COMMAND_STATES[command]}
+        )
+        return result
+
+    async def async_trigger_group_action(self, groupaction_id) -> None:
+        """Trigger a group action and show its predicted result right away."""
+        await self.commands.async_send(
+            ("groupactions", groupaction_id),
+            self.api.groupaction_trigger,
+            self.install_id,
+            groupaction_id,
+        )
+        model = self.get_configuration("groupactions", groupaction_id)
+        predicted = self.predict_group_action(model.actions if model else ())
+        # The predicted devices are verified together by a single refresh
+        for (category, device_id), status in predicted.items():
+            self.async_set_optimistic(category, device_id, status)
+
+    def predict_group_action(self, actions) -> dict[tuple, dict]:
+        """Return the status the basic actions of a group action give the devices."""
+        predicted: dict[tuple, dict] = {}
+        for action_type, number in actions:
+            if action_type == ACTION_OUTPUT_TOGGLE:
+                key = ("outputs", number)
+                current = predicted.get(key) or self.get_status(*key)
+                if not isinstance(current, dict):
+                    continue
+                predicted[key] = {"on": not current.get("on")}
+            elif action_type in GROUP_ACTION_STATES:
+                category, status = GROUP_ACTION_STATES[action_type]
+                key = (category, number)
+                predicted[key] = {**predicted.get(key, {}), **status}
+            # Other actions are left to the verification refresh
+        return predicted
+
+    @callback
+    def async_add_device_listener(
+        self, category: str, device_id, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for updates of a single device."""
+        key = (category, device_id)
+        self._device_listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove the device listener."""
+            listeners = self._device_listeners.get(key, [])
+            if update_callback in listeners:
+                listeners.remove(update_callback)
+            if not listeners:
+                self._device_listeners.pop(key, None)
+
+        return remove_listener
+
+    @callback
+    def async_update_device_listeners(self, category: str, device_id) -> None:
+        """Notify the listeners of a single device."""
+        for update_callback in list(self._device_listeners.get((category, device_id), [])):
+            update_callback()
+
+    @callback
+    def async_start_updates(self) -> None:
+        """Start the polls and notify the entities of the devices that change.
+
+        Registering the listener starts the refresh timer, so it is only done
+        once the setup succeeded.
+        """
+        if self._dispatch_unsub is None:
+            # Entities listen per device, this listener notifies the changed ones
+            self._dispatch_unsub = self.async_add_listener(
+                self._async_dispatch_changes
+            )
+
+    @callback
+    def _async_dispatch_changes(self) -> None:
+        """Notify the listeners of the devices changed by the last refresh."""
+        changed, self._changed_devices = self._changed_devices, set()
+        touched = 0
+        for category, device_id in changed:
+            listeners = self._device_listeners.get((category, device_id), [])
+            touched += len(listeners)
+            for update_callback in list(listeners):
+                update_callback()
+        self.touched_entities = touched
+        _LOGGER.debug(
+            "%s devices changed, %s entities updated", len(changed), touched
+        )
+
+    @callback
+    def _async_apply_status(self, category: str, device_id, status) -> bool:
+        """Apply a (partial) status to a device and notify its listeners."""
+        statuses = (self.data or {}).get(category)
+        if statuses is None or device_id not in statuses:
+            return False
+        current = statuses[device_id]
+        if isinstance(status, dict) and isinstance(current, dict):
+            statuses[device_id] = {**current, **status}
+        else:
+            statuses[device_id] = status
+        self._async_update_availability(self.data, [(category, device_id)])
+        self.async_update_device_listeners(category, device_id)
+        return True
+
+    @callback
+    def async_set_optimistic(self, category: str, device_id, status: dict) -> None:
+        """Show the expected status of a device until a refresh verifies it."""
+        current = self.get_status(category, device_id)
+        if isinstance(current, dict) and all(
+            current.get(key) == value for key, value in status.items()
+        ):
+            # Nothing changes, so there is nothing to verify
+            return
+        if not self._async_apply_status(category, device_id, status):
+            return
+        self.poll_interval.activity()
+        key = (category, device_id)
+        self._optimistic[key] = {**self._optimistic.get(key, {}), **status}
+        # A burst of commands is verified with a single refresh
+        if self._verify_unsub is None:
+            self._verify_unsub = async_call_later(
+                self.hass, self._verify_delay, self._async_verify
+            )
+
+    async def _async_verify(self, _now=None) -> None:
+        """Refresh and roll back the optimistic states that did not happen."""
+        self._verify_unsub = None
+        pending, self._optimistic = self._optimistic, {}
+        await self.async_refresh()
+        if not self.last_update_success:
+            return
+        for (category, device_id), expected in pending.items():
+            status = self.get_status(category, device_id) or {}
+            if any(status.get(key) != value for key, value in expected.items()):
+                # The refresh already notified the entity of the real status
+                self.rollbacks += 1
+                _LOGGER.debug(
+                    "Rolled back %s %s: expected %s, got %s",
+                    category,
+                    device_id,
+                    expected,
+                    status,
+                )
+
+    @callback
+    def _async_handle_event(self, event: dict) -> None:
+        """Apply a pushed change event to the indexed data."""
+        if self.data is None:
+            return
+        category = EVENT_CATEGORIES[event["type"]]
+        data = event.get("data") or {}
+        # A pushed status is authoritative, no need to verify it anymore
+        self._optimistic.pop((category, data.get("id")), None)
+        if self._async_apply_status(category, data.get("id"), data.get("status")):
+            self.updated_at[(category, data.get("id"))] = time.monotonic()
+            self._expired.discard((category, data.get("id")))
+
+    @callback
+    def _async_handle_connection(self, connected: bool) -> None:
+        """Poll slowly while events are pushed, fall back to polling otherwise."""
+        _LOGGER.debug("OpenMotics event websocket connected: %s", connected)
+        self.update_interval = (
+            DEFAULT_RECONCILE_INTERVAL if connected else self.poll_interval.minimum
+        )
+        if not connected:
+            # Catch up on the changes we missed while the websocket was down
+            self.hass.async_create_task(self.async_request_refresh())
+
+    @property
+    def events_connected(self) -> bool:
+        """Return True while state changes are pushed."""
+        return self.event_listener is not None and self.event_listener.connected
+
+    @callback
+    def async_start_events(self) -> None:
+        """Start listening for pushed state changes."""
+        if self.event_listener is not None:
+            self.event_listener.start()
+
+    async def async_stop_events(self) -> None:
+        """Stop listening for pushed state changes."""
+        if self.event_listener is not None:
+            await self.event_listener.stop()
+
+    async def async_unload(self) -> None:
+        """Stop all background work of the coordinator."""
+        if self._dispatch_unsub is not None:
+            # The last listener cancels the refresh timer
+            self._dispatch_unsub()
+            self._dispatch_unsub = None
+        if self._verify_unsub is not None:
+            self._verify_unsub()
+            self._verify_unsub = None
+        await self.async_stop_events()
+        if isinstance(self.api, OpenMoticsTransportRouter):
+            self.api.close()
+        if self._gateway is not None:
+            self._gateway.close()
+            await self._session.close()
+        if self._account is not None:
+            async_release_account(self.hass, self._account, self.entry.entry_id)
+
+    @property
+    def account(self) -> OpenMoticsAccount | None:
+        """Return the cloud account shared with the other installations."""
+        return self._account
 
     @property
     def install_id(self) -> str:
         """Return the name of the device."""
         return self._install_id
 
-    @property
-    def backenclient(self) -> str:
-        """Return the backendclient."""
-        return self.backendclient
-
 
 # async def get_backendclient(hass, client_id, client_secret, server, port, ssl):
 #     """Create a backendclient object and verify authentication."""
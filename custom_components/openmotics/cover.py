@@ -2,12 +2,15 @@
 from __future__ import annotations
 
 import logging
+import time
 
 from homeassistant.components.cover import (
     ATTR_CURRENT_POSITION,
     ATTR_POSITION,
     SUPPORT_CLOSE,
     SUPPORT_OPEN,
+    SUPPORT_SET_POSITION,
+    SUPPORT_STOP,
     CoverEntity,
 )
 from homeassistant.const import (
@@ -17,15 +20,24 @@ from homeassistant.const import (
     STATE_OPENING,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 
-from .const import DOMAIN, NOT_IN_USE
+from .const import DOMAIN
 from .coordinator import OpenMoticsDataUpdateCoordinator
 from .entity import OpenMoticsDevice
+from .models import DeviceModel
 
 _LOGGER = logging.getLogger(__name__)
 
+# The position of a moving shutter is updated this many seconds apart
+POSITION_UPDATE_INTERVAL = 1
+
+# The direction a shutter moves in, opening is going up
+DIRECTION_UP = 1
+DIRECTION_DOWN = -1
+
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Component doesn't support configuration through configuration.yaml."""
@@ -42,12 +54,8 @@ async def async_setup_entry(
 
     coordinator: OpenMoticsDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    for om_cover in coordinator.data["shutters"]:
-        if (
-            om_cover["name"] is None
-            or om_cover["name"] == ""
-            or om_cover["name"] == NOT_IN_USE
-        ):
+    for om_cover in coordinator.configuration["shutters"].values():
+        if not om_cover.in_use:
             continue
         # print("- {}".format(om_cover))
         entities.append(OpenMoticsShutter(coordinator, om_cover))
@@ -59,16 +67,87 @@ async def async_setup_entry(
     async_add_entities(entities)
 
 
+class ShutterPosition:
+    """Estimate the position of a shutter from its travel times.
+
+    The position is 0 when the shutter is closed (down) and 100 when it is
+    open (up). While the shutter moves, the position follows from the time
+    it has been moving and the time it takes to travel all the way.
+    """
+
+    def __init__(self, travel_up: float | None, travel_down: float | None) -> None:
+        """Initialize the position, it is unknown until the shutter is at an end."""
+        self._travel = {DIRECTION_UP: travel_up, DIRECTION_DOWN: travel_down}
+        self._position: float | None = None
+        self._since = 0.0
+        self.direction = 0
+
+    @property
+    def can_estimate(self) -> bool:
+        """Return True if both travel times are known."""
+        return all(self._travel.values())
+
+    def current(self, now: float | None = None) -> float | None:
+        """Return the estimated position."""
+        if not self.direction or not self.can_estimate:
+            return self._position
+        now = time.monotonic() if now is None else now
+        end = 100.0 if self.direction == DIRECTION_UP else 0.0
+        elapsed = now - self._since
+        travel = self._travel[self.direction]
+        if self._position is None:
+            # Only a full travel tells where the shutter is
+            return end if elapsed >= travel else None
+        moved = self.direction * elapsed / travel * 100
+        return min(100.0, max(0.0, self._position + moved))
+
+    def start(self, direction: int, now: float | None = None) -> None:
+        """Start moving in a direction from the current position."""
+        now = time.monotonic() if now is None else now
+        self._position = self.current(now)
+        self._since = now
+        self.direction = direction
+
+    def stop(self, position: float | None = None, now: float | None = None) -> None:
+        """Stop moving, at the given position or where it is estimated."""
+        self._position = self.current(now) if position is None else position
+        self.direction = 0
+
+    def time_to(self, target: float) -> float | None:
+        """Return the seconds to travel from the current position to the target."""
+        position = self.current()
+        if position is None or not self.can_estimate:
+            return None
+        direction = DIRECTION_UP if target > position else DIRECTION_DOWN
+        return abs(target - position) / 100 * self._travel[direction]
+
+
 class OpenMoticsShutter(OpenMoticsDevice, CoverEntity):
     """Representation of a OpenMotics shutter."""
 
     coordinator: OpenMoticsDataUpdateCoordinator
+    _category = "shutters"
 
-    def __init__(self, coordinator: OpenMoticsDataUpdateCoordinator, om_shutter):
+    def __init__(
+        self, coordinator: OpenMoticsDataUpdateCoordinator, om_shutter: DeviceModel
+    ):
         """Initialize the shutter."""
         super().__init__(coordinator, om_shutter, "cover")
         self.coordinator = coordinator
-        self._current_position = None
+        self._position = ShutterPosition(om_shutter.travel_up, om_shutter.travel_down)
+        # The state last reported by OpenMotics
+        self._reported_state: str | None = None
+        self._tick_unsub: CALLBACK_TYPE | None = None
+        self._stop_unsub: CALLBACK_TYPE | None = None
+        self._target: int | None = None
+
+    @property
+    def supported_features(self) -> int:
+        """Flag supported features."""
+        features = SUPPORT_OPEN | SUPPORT_CLOSE | SUPPORT_STOP
+        if self._position.can_estimate:
+            features |= SUPPORT_SET_POSITION
+        return features
 
     @property
     def is_closed(self):
@@ -77,32 +156,156 @@ class OpenMoticsShutter(OpenMoticsDevice, CoverEntity):
             return None
         return self.current_cover_position == 0
 
+    @property
+    def is_opening(self) -> bool:
+        """Return if the cover is opening."""
+        return self._position.direction == DIRECTION_UP
+
+    @property
+    def is_closing(self) -> bool:
+        """Return if the cover is closing."""
+        return self._position.direction == DIRECTION_DOWN
+
     @property
     def current_cover_position(self):
         """Return the current position of cover."""
         # None is unknown, 0 is closed, 100 is fully open.
-        return self._current_position
+        position = self._position.current()
+        return None if position is None else round(position)
 
     async def async_open_cover(self, **kwargs):
         """Open the window cover."""
-        await self.hass.async_add_executor_job(
-            self.coordinator.backenclient.base.installations.shutters.up,
-            self.install_id,
-            self.device_id,
-        )
+        self._async_cancel_stop()
+        await self.coordinator.async_shutter_command(self.device_id, "up")
+        self._async_start(DIRECTION_UP)
 
     async def async_close_cover(self, **kwargs):
-        """Open the window cover."""
-        await self.hass.async_add_executor_job(
-            self.coordinator.backenclient.base.installations.shutters.down,
-            self.install_id,
-            self.device_id,
-        )
+        """Close the window cover."""
+        self._async_cancel_stop()
+        await self.coordinator.async_shutter_command(self.device_id, "down")
+        self._async_start(DIRECTION_DOWN)
 
     async def async_stop_cover(self, **kwargs):
         """Stop the window cover."""
-        await self.hass.async_add_executor_job(
-            self.coordinator.backenclient.base.installations.shutters.stop,
-            self.install_id,
-            self.device_id,
+        self._async_cancel_stop()
+        await self.coordinator.async_shutter_command(self.device_id, "stop")
+        self._async_stop()
+
+    async def async_set_cover_position(self, **kwargs):
+        """Move the window cover to a position, stopping it at the computed time."""
+        target = kwargs[ATTR_POSITION]
+        if target in (0, 100):
+            # The shutter stops by itself at the end
+            if target:
+                await self.async_open_cover()
+            else:
+                await self.async_close_cover()
+            return
+        position = self._position.current()
+        duration = self._position.time_to(target)
+        if position is None or duration is None:
+            _LOGGER.warning(
+                "The position of %s is unknown, open or close it first", self.name
+            )
+            return
+        if round(position) == target:
+            return
+        self._async_cancel_stop()
+        if target > position:
+            await self.coordinator.async_shutter_command(self.device_id, "up")
+            self._async_start(DIRECTION_UP)
+        else:
+            await self.coordinator.async_shutter_command(self.device_id, "down")
+            self._async_start(DIRECTION_DOWN)
+        self._target = target
+        self._stop_unsub = async_call_later(
+            self.hass, duration, self._async_stop_at_target
         )
+
+    async def _async_stop_at_target(self, _now=None) -> None:
+        """Stop the shutter at the position it was sent to."""
+        self._stop_unsub = None
+        target, self._target = self._target, None
+        await self.coordinator.async_shutter_command(self.device_id, "stop")
+        self._async_stop(target)
+
+    async def async_update(self):
+        """Follow the state reported by OpenMotics."""
+        status = self.coordinator.get_status("shutters", self.device_id) or {}
+        state = status.get("state")
+        state = None if state is None else str(state).upper()
+        if state == self._reported_state:
+            # Polls during the travel do not disturb the estimate
+            return
+        self._reported_state = state
+        if state in ("UP", "DOWN", "STOPPED"):
+            # Stopped by itself or from elsewhere, a timed stop is not needed
+            self._async_cancel_stop()
+        if state == "UP":
+            self._async_stop(100, write=False)
+        elif state == "DOWN":
+            self._async_stop(0, write=False)
+        elif state == "GOING_UP" and not self.is_opening:
+            self._async_start(DIRECTION_UP, write=False)
+        elif state == "GOING_DOWN" and not self.is_closing:
+            self._async_start(DIRECTION_DOWN, write=False)
+        elif state == "STOPPED" and self._position.direction:
+            self._async_stop(write=False)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop the timers of the shutter."""
+        self._async_cancel_stop()
+        self._async_cancel_tick()
+
+    @callback
+    def _async_start(self, direction: int, write: bool = True) -> None:
+        """Follow the shutter moving in a direction."""
+        self._position.start(direction)
+        if self._position.can_estimate:
+            self._async_schedule_tick()
+        if write:
+            self.async_write_ha_state()
+
+    @callback
+    def _async_stop(self, position: float | None = None, write: bool = True) -> None:
+        """Stop following the shutter, at a known or the estimated position."""
+        self._position.stop(position)
+        self._async_cancel_tick()
+        if write:
+            self.async_write_ha_state()
+
+    @callback
+    def _async_schedule_tick(self) -> None:
+        """Update the estimated position in a moment."""
+        if self._tick_unsub is None:
+            self._tick_unsub = async_call_later(
+                self.hass, POSITION_UPDATE_INTERVAL, self._async_tick
+            )
+
+    @callback
+    def _async_tick(self, _now=None) -> None:
+        """Write the estimated position of the moving shutter."""
+        self._tick_unsub = None
+        if not self._position.direction:
+            return
+        if self._position.current() in (0, 100):
+            # The shutter reached the end and stops by itself
+            self._position.stop()
+        else:
+            self._async_schedule_tick()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_tick(self) -> None:
+        """Stop updating the estimated position."""
+        if self._tick_unsub is not None:
+            self._tick_unsub()
+            self._tick_unsub = None
+
+    @callback
+    def _async_cancel_stop(self) -> None:
+        """Cancel the stop at a target position."""
+        self._target = None
+        if self._stop_unsub is not None:
+            self._stop_unsub()
+            self._stop_unsub = None
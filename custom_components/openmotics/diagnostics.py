@@ -0,0 +1,44 @@
+"""Diagnostics support for OpenMotics."""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import OpenMoticsDataUpdateCoordinator
+from .router import OpenMoticsTransportRouter
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return the diagnostics of a config entry, without any credentials."""
+    coordinator: OpenMoticsDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    diagnostics = {
+        "setup_timings": coordinator.setup_timings,
+        "stale": coordinator.stale,
+        "events_connected": coordinator.events_connected,
+        "update_interval": coordinator.update_interval.total_seconds(),
+        "rollbacks": coordinator.rollbacks,
+        "unavailable_devices": {
+            f"{category}.{device_id}": reason
+            for (category, device_id), reason in (
+                coordinator.unavailable_devices.items()
+            )
+        },
+        "commands": {
+            "sent": coordinator.commands.commands_sent,
+            "batches": coordinator.commands.batches_sent,
+            "suppressed": coordinator.suppressed_commands,
+        },
+    }
+    if coordinator.account is not None:
+        diagnostics["account"] = {
+            "installations": len(coordinator.account.entries),
+            "delayed_polls": coordinator.account.scheduler.delayed,
+            "throttled": coordinator.account.api.throttled,
+            "rate_limiter": coordinator.account.api.limiter.diagnostics(),
+        }
+    if isinstance(coordinator.api, OpenMoticsTransportRouter):
+        diagnostics["transports"] = coordinator.api.diagnostics()
+    return diagnostics
@@ -12,10 +12,11 @@ from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 # from homeassistant.helpers.restore_state import RestoreEntity
 
-# from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import callback
 
 from .const import DOMAIN
 from .coordinator import OpenMoticsDataUpdateCoordinator
+from .models import DeviceModel
 
 
 class OpenMoticsDevice(CoordinatorEntity, Entity):
@@ -23,46 +24,44 @@ class OpenMoticsDevice(CoordinatorEntity, Entity):
 
     coordinator: OpenMoticsDataUpdateCoordinator
 
+    # The category of the coordinator data the device belongs to
+    _category: str = "outputs"
+    # The name of the entity, when it differs from the name of the device
+    _attr_name: str | None = None
+
     def __init__(
         self,
         coordinator,
-        device,
+        device: DeviceModel,
         device_type,
     ) -> None:
         """Initialize the device."""
         super().__init__(coordinator)
-        self.backendclient = coordinator.backendclient
+        self.api = coordinator.api
         self._install_id = coordinator.install_id
-        self._is_available = True
-        self._device = device
-        self._sid = device["local_id"]
-        self._idx = device["id"]
-        self._name = device["name"]
+        # The model is shared with the configuration of the coordinator
+        self._device: DeviceModel = device
         self._type = device_type
         self._state = None
         self._extra_state_attributes = {}
-        # Because polling is so common, Home Assistant by default assumes that your entity is based on polling.
-        # But it's set anyway to True
-        self._poll: bool = True
+        # The coordinator notifies the entity when its device changed,
+        # so there is no need for Home Assistant to poll the entity.
+        self._poll: bool = False
 
     @property
     def should_poll(self)-> bool:
-        """Enable polling."""
+        """Disable polling."""
         return self._poll
 
     @property
     def name(self) -> str:
-        """Return the name of the device."""
-        return self._name
+        """Return the name of the entity, the name of the device unless set."""
+        return self._attr_name or self._device.name
 
     @property
     def floor(self) -> str:
         """Return the floor of the device."""
-        location = self._device["location"]
-        try:
-            return location["floor_id"]
-        except KeyError:
-            return "N/A"
+        return self._device.floor
 
     @property
     def is_on(self)-> bool:
@@ -72,11 +71,7 @@ class OpenMoticsDevice(CoordinatorEntity, Entity):
     @property
     def room(self) -> str:
         """Return the room of the device."""
-        location = self._device["location"]
-        try:
-            return location["room_id"]
-        except KeyError:
-            return "N/A"
+        return self._device.room
 
     @property
     def unique_id(self) -> str:
@@ -86,7 +81,7 @@ class OpenMoticsDevice(CoordinatorEntity, Entity):
     @property
     def device_id(self) -> str:
         """Return a unique ID."""
-        return self._sid
+        return self._device.local_id
 
     @property
     def type(self) -> str:
@@ -99,23 +94,48 @@ class OpenMoticsDevice(CoordinatorEntity, Entity):
         """Return the installation ID."""
         return self._install_id
 
+    @property
+    def assumed_state(self) -> bool:
+        """Return True while the state comes from the cache."""
+        return self.coordinator.stale
+
     @property
     def available(self) -> bool:
-        """If device is available."""
-        # return self._state is not None
-        return self._is_available
+        """Return True if the device reports a recent, working status."""
+        return self.coordinator.is_available(self._category, self.device_id)
 
     @property
     def device_info(self)-> DeviceInfo:
         """Return information about the device."""
         return DeviceInfo(
-            identifiers={(DOMAIN, self.unique_id)},
-            name=self._name,
-            id=self._sid,
+            # Outputs, shutters and sensors each number their local ids from 0
+            identifiers={
+                (DOMAIN, f"{self.install_id}-{self._category}-{self.device_id}")
+            },
+            name=self._device.name,
+            id=self._device.local_id,
             installation=self._install_id,
             manufacturer="OpenMotics",
         )
 
-    # async def _async_update_callback(self) -> None:
-    #     """Update the entity."""
-    #     await self.async_update_ha_state(True)
+    async def async_added_to_hass(self) -> None:
+        """Listen for updates of this device only.
+
+        The listener of CoordinatorEntity, which writes the state of every
+        entity on every refresh, is deliberately not registered.
+        """
+        await Entity.async_added_to_hass(self)
+        await self.async_update()
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(
+                self._category, self.device_id, self._async_update_callback
+            )
+        )
+
+    async def async_update(self) -> None:
+        """Refresh the state of the device from the coordinator data."""
+
+    @callback
+    def _async_update_callback(self) -> None:
+        """Update the entity."""
+        self.async_schedule_update_ha_state(True)
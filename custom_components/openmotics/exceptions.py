@@ -1,4 +1,6 @@
 """Errors for the OpenMotics component."""
+from __future__ import annotations
+
 from homeassistant.exceptions import HomeAssistantError
 
 
@@ -28,3 +30,16 @@ class UserLevel(OpenMoticsException):
 
 class InvalidAuth(OpenMoticsException):
     """Authentication failed."""
+
+
+class ApiError(OpenMoticsException):
+    """The OpenMotics API returned an error."""
+
+
+class TooManyRequests(ApiError):
+    """The OpenMotics API throttled the requests."""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        """Initialize the error with the delay the API asked for."""
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -0,0 +1,342 @@
+"""Asynchronous client for the local API of an OpenMotics gateway.
+
+    The gateway is reached over the LAN, bypassing the cloud. The records of
+    the gateway are translated into the format of the cloud API, so the
+    coordinator and the entities work the same with both transports.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import aiohttp
+import async_timeout
+
+from .api import REQUEST_TIMEOUT, TokenRejected
+from .auth import OpenMoticsTokenManager
+from .const import OPENMOTICS_OUTPUT_TYPE_TO_NAME
+from .exceptions import ApiError, CannotConnect, InvalidAuth
+
+_LOGGER = logging.getLogger(__name__)
+
+# The number of connections kept open to the gateway
+GATEWAY_CONNECTIONS = 4
+# Idle connections to the gateway are kept open this many seconds
+GATEWAY_KEEPALIVE = 60
+# The lifetime in seconds of a token of the gateway
+GATEWAY_TOKEN_TIMEOUT = 3600
+
+# The gateway uses 255 for a room or floor that is not set
+NO_LOCATION = 255
+DIMMER_MODULE_TYPES = ("D", "d")
+SENSOR_QUANTITIES = ("temperature", "humidity", "brightness")
+
+CONFIGURATION_PATHS = {
+    "outputs": "/get_output_configurations",
+    "shutters": "/get_shutter_configurations",
+    "groupactions": "/get_group_action_configurations",
+    "sensors": "/get_sensor_configurations",
+}
+
+
+def create_gateway_session(verify_ssl: bool) -> aiohttp.ClientSession:
+    """Return a session with a small pool of keep-alive connections."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=GATEWAY_CONNECTIONS,
+            keepalive_timeout=GATEWAY_KEEPALIVE,
+            ssl=None if verify_ssl else False,
+        )
+    )
+
+
+def _location(config: dict) -> dict:
+    """Return the location of a gateway record like the cloud does."""
+    return {
+        f"{key}_id": config[key]
+        for key in ("floor", "room")
+        if config.get(key) not in (None, NO_LOCATION)
+    }
+
+
+def output_from_gateway(config: dict) -> dict:
+    """Translate the configuration of an output."""
+    capabilities = ["ON_OFF"]
+    if config.get("module_type") in DIMMER_MODULE_TYPES:
+        capabilities.append("RANGE")
+    return {
+        "id": config["id"],
+        "local_id": config["id"],
+        "name": config.get("name"),
+        "type": OPENMOTICS_OUTPUT_TYPE_TO_NAME.get(
+            config.get("type"), "generic"
+        ).upper(),
+        "capabilities": capabilities,
+        "location": _location(config),
+    }
+
+
+def device_from_gateway(config: dict) -> dict:
+    """Translate the configuration of a shutter, group action or sensor."""
+    device = {
+        key: value
+        for key, value in config.items()
+        if key not in ("id", "room", "floor")
+    }
+    device.update(
+        id=config["id"], local_id=config["id"], location=_location(config)
+    )
+    return device
+
+
+def sensor_quantities(values: dict, physical_quantity: str | None = None) -> list:
+    """Return the quantities a sensor of the gateway measures.
+
+    Newer gateways report the single quantity of a sensor, like the cloud
+    does. The others report every quantity the sensor has a value for.
+    """
+    if physical_quantity:
+        return [physical_quantity]
+    return [quantity for quantity in SENSOR_QUANTITIES if quantity in values] or [
+        "temperature"
+    ]
+
+
+class OpenMoticsGatewayClient:
+    """Asyncio client for the local API of an OpenMotics gateway."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        username: str,
+        password: str,
+        host: str,
+        port: int = 443,
+        use_ssl: bool = True,
+    ) -> None:
+        """Initialize the client."""
+        self._session = session
+        self._username = username
+        self._password = password
+        self._host = host
+        self._base_url = f"{'https' if use_ssl else 'http'}://{host}:{port}"
+        self.tokens = OpenMoticsTokenManager(self._async_login)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the client session."""
+        return self._session
+
+    @property
+    def token(self) -> str | None:
+        """Return the current token."""
+        return self.tokens.token
+
+    @property
+    def ws_url(self) -> None:
+        """Return None, the events of the gateway are not supported."""
+        return None
+
+    async def get_valid_token(self) -> str:
+        """Return a valid token, logging in when needed."""
+        return await self.tokens.async_get_token()
+
+    async def get_token(self) -> str:
+        """Return the token, logging in unless the current one is still valid."""
+        return await self.tokens.async_get_token()
+
+    def close(self) -> None:
+        """Stop refreshing the token in the background."""
+        self.tokens.close()
+
+    async def _async_login(self) -> dict:
+        """Log in on the gateway with a username and password."""
+        data = {
+            "username": self._username,
+            "password": self._password,
+            "accept_terms": "true",
+            "timeout": GATEWAY_TOKEN_TIMEOUT,
+        }
+        try:
+            async with async_timeout.timeout(REQUEST_TIMEOUT), self._session.post(
+                f"{self._base_url}/login", data=data
+            ) as response:
+                if response.status in (401, 403):
+                    raise InvalidAuth("Invalid username or password")
+                response.raise_for_status()
+                result = await response.json(content_type=None)
+        except asyncio.TimeoutError as err:
+            raise CannotConnect("Timeout logging in on the gateway") from err
+        except (aiohttp.ClientError, ValueError) as err:
+            raise CannotConnect(f"Error logging in on the gateway: {err}") from err
+
+        if not isinstance(result, dict) or not result.get("token"):
+            raise InvalidAuth(f"Login refused: {result}")
+        return {"access_token": result["token"], "expires_in": GATEWAY_TOKEN_TIMEOUT}
+
+    async def _request(self, path: str, **params) -> dict:
+        """Call the gateway and return the response.
+
+        When the token is rejected, the call is retried once with a new one.
+        """
+        token = await self.get_valid_token()
+        try:
+            return await self._request_with_token(path, token, params)
+        except TokenRejected:
+            self.tokens.invalidate(token)
+        token = await self.get_valid_token()
+        try:
+            return await self._request_with_token(path, token, params)
+        except TokenRejected as err:
+            raise InvalidAuth(f"Not authorized to call {path}") from err
+
+    async def _request_with_token(self, path: str, token: str, params: dict) -> dict:
+        """Call the gateway with the given token."""
+        # Not every gateway version reads the token from the headers
+        params = {**params, "token": token}
+        try:
+            # The response is released on every exit, also when it is not read
+            async with async_timeout.timeout(REQUEST_TIMEOUT), self._session.post(
+                f"{self._base_url}{path}", data=params
+            ) as response:
+                if response.status == 401:
+                    raise TokenRejected
+                if response.status >= 400:
+                    raise ApiError(
+                        f"Error {response.status} on {path}: {await response.text()}"
+                    )
+                result = await response.json(content_type=None)
+        except asyncio.TimeoutError as err:
+            raise CannotConnect(f"Timeout on {path}") from err
+        except (aiohttp.ClientError, ValueError) as err:
+            raise CannotConnect(f"Error on {path}: {err}") from err
+
+        if not isinstance(result, dict):
+            raise ApiError(f"Invalid response on {path}: {result}")
+        if result.get("success") is False:
+            if result.get("msg") == "invalid_token":
+                raise TokenRejected
+            raise ApiError(f"Error on {path}: {result.get('msg')}")
+        return result
+
+    async def get_installations(self) -> list:
+        """Return the gateway as the only installation."""
+        return [await self.get_installation(self._host)]
+
+    async def get_installation(self, installation_id: str) -> dict:
+        """Return the details of the gateway."""
+        version = await self._request("/get_version")
+        return {
+            "id": installation_id,
+            "name": f"OpenMotics gateway {self._host}",
+            "gateway_model": "OpenMotics gateway",
+            "version": version.get("gateway"),
+        }
+
+    async def get_configuration(self, installation_id: str) -> dict:
+        """Return the configured devices of the gateway by category."""
+        *results, values = await asyncio.gather(
+            *(self._request(path) for path in CONFIGURATION_PATHS.values()),
+            self._async_sensor_values(),
+        )
+        configuration = {}
+        for category, result in zip(CONFIGURATION_PATHS, results):
+            translate = (
+                output_from_gateway if category == "outputs" else device_from_gateway
+            )
+            configuration[category] = [
+                translate(config) for config in result.get("config") or []
+            ]
+        for sensor in configuration["sensors"]:
+            quantities = sensor_quantities(
+                values.get(sensor["local_id"], {}), sensor.get("physical_quantity")
+            )
+            # A status of the cloud only holds the value of a single quantity
+            sensor["physical_quantity"] = quantities[0]
+            sensor["physical_quantities"] = quantities
+        return configuration
+
+    async def get_status(self, installation_id: str) -> dict:
+        """Return the live status of the devices by category and local id."""
+        outputs, shutters, sensors = await asyncio.gather(
+            self._request("/get_output_status"),
+            self._request("/get_shutter_status"),
+            self.get_sensor_status(installation_id),
+        )
+        return {
+            "outputs": {
+                output["id"]: {
+                    "on": bool(output.get("status")),
+                    "value": output.get("dimmer"),
+                }
+                for output in outputs.get("status") or []
+            },
+            "shutters": {
+                int(shutter_id): {**detail, "state": str(detail.get("state")).upper()}
+                for shutter_id, detail in (shutters.get("detail") or {}).items()
+            },
+            "sensors": sensors,
+        }
+
+    async def get_sensor_status(self, installation_id: str) -> dict:
+        """Return the status of the sensors by local id, a value per quantity."""
+        return await self._async_sensor_values()
+
+    async def _async_sensor_values(self) -> dict[int, dict]:
+        """Return the values of the sensors by local id and quantity."""
+        results = await asyncio.gather(
+            *(
+                self._request(f"/get_sensor_{quantity}_status")
+                for quantity in SENSOR_QUANTITIES
+            )
+        )
+        sensors: dict[int, dict] = {}
+        # The sensor values are lists indexed by the sensor id
+        for quantity, values in zip(SENSOR_QUANTITIES, results):
+            for sensor_id, value in enumerate(values.get("status") or []):
+                if value is not None:
+                    sensors.setdefault(sensor_id, {})[quantity] = value
+        return sensors
+
+    async def output_turn_on(
+        self, installation_id: str, output_id: int, value: int | None = None
+    ) -> dict | None:
+        """Turn on an output, optionally with a dimmer value (0..100)."""
+        params = {"id": output_id, "is_on": "true"}
+        if value is not None:
+            params["dimmer"] = value
+        await self._request("/set_output", **params)
+        return None if value is None else {"value": value}
+
+    async def output_turn_off(
+        self, installation_id: str, output_id: int
+    ) -> dict | None:
+        """Turn off an output."""
+        await self._request("/set_output", id=output_id, is_on="false")
+        return None
+
+    async def shutter_up(self, installation_id: str, shutter_id: int) -> dict | None:
+        """Move a shutter up."""
+        await self._request("/do_shutter_up", id=shutter_id)
+        return None
+
+    async def shutter_down(
+        self, installation_id: str, shutter_id: int
+    ) -> dict | None:
+        """Move a shutter down."""
+        await self._request("/do_shutter_down", id=shutter_id)
+        return None
+
+    async def shutter_stop(
+        self, installation_id: str, shutter_id: int
+    ) -> dict | None:
+        """Stop a shutter."""
+        await self._request("/do_shutter_stop", id=shutter_id)
+        return None
+
+    async def groupaction_trigger(
+        self, installation_id: str, groupaction_id: int
+    ) -> dict | None:
+        """Trigger a group action (scene)."""
+        await self._request("/do_group_action", group_action_id=groupaction_id)
+        return None
@@ -0,0 +1,12 @@
+"""Moving average of the latency of the OpenMotics API."""
+from __future__ import annotations
+
+# The weight of a new latency sample in the moving average
+LATENCY_SMOOTHING = 0.2
+
+
+def smoothed_latency(average: float | None, sample: float) -> float:
+    """Return the moving average of the latency in seconds with a new sample."""
+    if average is None:
+        return sample
+    return average + LATENCY_SMOOTHING * (sample - average)
@@ -1,7 +1,9 @@
 """Support for HomeAssistant lights."""
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from typing import ValuesView
 
 from homeassistant.components.light import (
@@ -20,16 +22,22 @@ from homeassistant.components.light import (
 )
 from homeassistant.config_entries import ConfigEntry
 # from homeassistant.const import STATE_OFF, STATE_ON
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 
-from .const import DOMAIN, NOT_IN_USE
+from .const import DOMAIN
 from .coordinator import OpenMoticsDataUpdateCoordinator
 from .entity import OpenMoticsDevice
+from .exceptions import OpenMoticsException
 
 _LOGGER = logging.getLogger(__name__)
 
+# The shortest time between two steps of a transition
+MIN_STEP_INTERVAL = 0.25
+# Steps are at least this many command latencies apart, not to flood the API
+STEP_LATENCY_FACTOR = 2
+
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Component doesn't support configuration through configuration.yaml."""
@@ -46,16 +54,12 @@ async def async_setup_entry(
 
     coordinator: OpenMoticsDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    for om_light in coordinator.data["outputs"]:
-        if (
-            om_light["name"] is None
-            or om_light["name"] == ""
-            or om_light["name"] == NOT_IN_USE
-        ):
+    for om_light in coordinator.configuration["outputs"].values():
+        if not om_light.in_use:
             continue
 
         # Outputs can contain outlets and lights, so filter out only the lights
-        if om_light["type"] == "LIGHT":
+        if om_light.type == "LIGHT":
             # print("- {}".format(om_light))
             entities.append(OpenMoticsOutputLight(coordinator, om_light))
 
@@ -66,14 +70,40 @@ async def async_setup_entry(
     async_add_entities(entities)
 
 
+def _brightness_to_percentage(byt: int) -> int:
+    """Convert brightness from absolute 0..255 to percentage."""
+    if byt <= 0:
+        return 0
+    # Any brightness keeps the light on
+    return max(1, round((byt * 100.0) / 255.0))
+
+
+# The conversions are looked up, not computed on every update and command
+BRIGHTNESS_TO_PERCENTAGE = tuple(_brightness_to_percentage(byt) for byt in range(256))
+PERCENTAGE_TO_BRIGHTNESS = tuple(round((percent * 255.0) / 100.0) for percent in range(101))
+
+
 def brightness_to_percentage(byt):
     """Convert brightness from absolute 0..255 to percentage."""
-    return round((byt * 100.0) / 255.0)
+    return BRIGHTNESS_TO_PERCENTAGE[byt]
+
+
+def brightness_from_percentage(percent, current=None):
+    """Convert percentage to absolute value 0..255.
 
+    The current brightness is kept when it converts to the same percentage,
+    so a brightness set in Home Assistant does not drift after a refresh.
+    """
+    if current is not None and BRIGHTNESS_TO_PERCENTAGE[current] == percent:
+        return current
+    return PERCENTAGE_TO_BRIGHTNESS[percent]
 
-def brightness_from_percentage(percent):
-    """Convert percentage to absolute value 0..255."""
-    return round((percent * 255.0) / 100.0)
+
+def step_interval(latency: float | None) -> float:
+    """Return the seconds between two steps of a transition."""
+    if latency is None:
+        return MIN_STEP_INTERVAL
+    return max(MIN_STEP_INTERVAL, latency * STEP_LATENCY_FACTOR)
 
 
 class OpenMoticsOutputLight(OpenMoticsDevice, LightEntity):
@@ -89,12 +119,15 @@ class OpenMoticsOutputLight(OpenMoticsDevice, LightEntity):
         self._brightness = None
         self._attr_supported_color_modes = set()
 
-        if "RANGE" in device["capabilities"]:
+        if "RANGE" in device.capabilities:
         #     self._attr_supported_color_modes.add(COLOR_MODE_BRIGHTNESS)
         # if not self.supported_color_modes:
         #     self._attr_supported_color_modes = {COLOR_MODE_ONOFF}
             self._attr_supported_color_modes = {COLOR_MODE_BRIGHTNESS}
             self._attr_color_mode = COLOR_MODE_BRIGHTNESS
+            self._attr_supported_features = SUPPORT_TRANSITION
+        # The running transition, a newer command cancels it
+        self._transition: asyncio.Task | None = None
 
 
     # @property
@@ -119,66 +152,148 @@ class OpenMoticsOutputLight(OpenMoticsDevice, LightEntity):
 
     async def async_turn_on(self, **kwargs):
         """Turn device on."""
+        await self._async_cancel_transition()
+        if kwargs.get(ATTR_TRANSITION) and "RANGE" in self._device.capabilities:
+            self._async_start_transition(
+                brightness_to_percentage(kwargs.get(ATTR_BRIGHTNESS, 255)),
+                kwargs[ATTR_TRANSITION],
+            )
+            return
+        status = {"on": True}
         if ATTR_BRIGHTNESS in kwargs:
             # Openmotics brightness (value) is between 0..100
             _LOGGER.debug("Turning on light: %s brightness %s", self.device_id, kwargs[ATTR_BRIGHTNESS])
-            response = await self.hass.async_add_executor_job(
-                self.coordinator.backenclient.base.installations.outputs.turn_on,
-                self.install_id,
+            status["value"] = brightness_to_percentage(kwargs[ATTR_BRIGHTNESS])
+            response = await self.coordinator.async_output_turn_on(
                 self.device_id,
-                brightness_to_percentage(kwargs[ATTR_BRIGHTNESS]), #value
+                status["value"],
             )
         else: 
             _LOGGER.debug("Turning on light: %s", self.device_id)
-            response = await self.hass.async_add_executor_job(
-                self.coordinator.backenclient.base.installations.outputs.turn_on,
-                self.install_id,
+            response = await self.coordinator.async_output_turn_on(
                 self.device_id,
             )
 
         # Turns on a specified Output object.
         # The call can optionally receive a JSON object that states the value
         # in case the Output is dimmable.
-        if response:
-            try:
-                _LOGGER.debug("Light turned on: %s response OM %s", self.device_id, response["value"])
-                self._brightness = brightness_from_percentage(response["value"])
-            except KeyError:
-                self._brightness = None
-        # self._state = STATE_ON
-        self._state = True
-        await self.coordinator.async_request_refresh()
-        # await self.coordinator.async_refresh()
-        
+        if response and "value" in response:
+            _LOGGER.debug("Light turned on: %s response OM %s", self.device_id, response["value"])
+            status["value"] = response["value"]
+        if ATTR_BRIGHTNESS in kwargs:
+            # Kept by the refresh as long as the percentage matches
+            self._brightness = kwargs[ATTR_BRIGHTNESS]
+        # Show the new state right away, a refresh verifies it later on
+        self.coordinator.async_set_optimistic("outputs", self.device_id, status)
+
     async def async_turn_off(self, **kwargs):
         """Turn devicee off."""
-        _LOGGER.debug("Turning on light: %s", self.device_id)
-        await self.hass.async_add_executor_job(
-            self.coordinator.backenclient.base.installations.outputs.turn_off,
-            self.install_id,
+        await self._async_cancel_transition()
+        if kwargs.get(ATTR_TRANSITION) and "RANGE" in self._device.capabilities:
+            self._async_start_transition(0, kwargs[ATTR_TRANSITION])
+            return
+        _LOGGER.debug("Turning off light: %s", self.device_id)
+        await self.coordinator.async_output_turn_off(
             self.device_id,
         )
-        # self._state = STATE_OFF
-        self._state = False
-        await self.coordinator.async_request_refresh()
-        # await self.coordinator.async_refresh()
+        self.coordinator.async_set_optimistic("outputs", self.device_id, {"on": False})
+
+    @callback
+    def _async_start_transition(self, target: int, duration: float) -> None:
+        """Start a transition to a brightness percentage, 0 turns the light off."""
+        self._transition = self.hass.async_create_task(
+            self._async_transition(target, duration)
+        )
+
+    async def _async_cancel_transition(self) -> None:
+        """Cancel the pending steps of the running transition.
+
+        Waits until the transition stopped, a step the command queue already
+        sends is sent before the command that follows.
+        """
+        transition, self._transition = self._transition, None
+        if transition is not None:
+            transition.cancel()
+            # Does not raise the cancellation of the transition
+            await asyncio.wait([transition])
+
+    async def _async_transition(self, target: int, duration: float) -> None:
+        """Step the brightness to the target over the duration.
+
+        A step is only sent when the brightness changed, and the steps are
+        spaced by the measured command latency, so a slow API gets fewer
+        and larger steps.
+        """
+        start = 0
+        if self._state and self._brightness is not None:
+            start = brightness_to_percentage(self._brightness)
+        sent = start
+        begin = time.monotonic()
+        try:
+            while True:
+                elapsed = time.monotonic() - begin
+                if elapsed >= duration:
+                    break
+                value = round(start + (target - start) * elapsed / duration)
+                if value != sent and value > 0:
+                    # The coordinator has to know the step, or it takes a
+                    # newer command for the state before the transition as
+                    # a no-op
+                    step = {"on": True, "value": value}
+                    try:
+                        await self.coordinator.async_output_turn_on(
+                            self.device_id, value
+                        )
+                    except asyncio.CancelledError:
+                        # The command queue sends the step all the same
+                        self.coordinator.async_set_optimistic(
+                            "outputs", self.device_id, step
+                        )
+                        raise
+                    sent = value
+                    self.coordinator.async_set_optimistic(
+                        "outputs", self.device_id, step
+                    )
+                    self._state = True
+                    self._brightness = brightness_from_percentage(value)
+                    self.async_write_ha_state()
+                await asyncio.sleep(step_interval(self.coordinator.commands.latency))
+            if target:
+                await self.coordinator.async_output_turn_on(self.device_id, target)
+                status = {"on": True, "value": target}
+            else:
+                await self.coordinator.async_output_turn_off(self.device_id)
+                status = {"on": False}
+        except OpenMoticsException as err:
+            _LOGGER.warning("Transition of %s failed: %s", self.name, err)
+            return
+        finally:
+            if self._transition is asyncio.current_task():
+                self._transition = None
+        self.coordinator.async_set_optimistic("outputs", self.device_id, status)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the running transition."""
+        await self._async_cancel_transition()
 
     async def async_update(self):
         """Refresh the state of the light."""
-        for om_light in self.coordinator.data["outputs"]:
-            if om_light["id"] == self.device_id:
-                if om_light["status"] is not None:
-                    status = om_light["status"]
-                    if status["on"] is True:
-                        # self._state = STATE_ON
-                        self._state = True
-                    else:
-                        # self._state = STATE_OFF
-                        self._state = False
-                    # if a light is not dimmable, the value field is not present.
-                    try:
-                        self._brightness = brightness_from_percentage(status["value"])
-                    except KeyError:
-                        self._brightness = None
-                else:
-                    self._state = None
+        if self._transition is not None:
+            # The transition shows the brightness it sent
+            return
+        status = self.coordinator.get_status("outputs", self.device_id)
+        if status is not None:
+            if status["on"] is True:
+                # self._state = STATE_ON
+                self._state = True
+            else:
+                # self._state = STATE_OFF
+                self._state = False
+            # if a light is not dimmable, the value field is not present.
+            value = status.get("value")
+            if value is None:
+                self._brightness = None
+            else:
+                self._brightness = brightness_from_percentage(value, self._brightness)
+        else:
+            self._state = None
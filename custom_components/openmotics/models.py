@@ -0,0 +1,179 @@
+"""Compact models of the configured devices of an installation."""
+from __future__ import annotations
+
+import sys
+from typing import Iterable
+
+from .const import NOT_IN_USE
+
+# The floor or room of a device without a location
+LOCATION_UNKNOWN = "N/A"
+
+# The basic actions of a group action, by action type, with the category of
+# the device in their action number and the status they give it
+ACTION_OUTPUT_TOGGLE = 162
+GROUP_ACTION_STATES = {
+    100: ("shutters", {"state": "GOING_UP"}),
+    101: ("shutters", {"state": "GOING_DOWN"}),
+    102: ("shutters", {"state": "STOPPED"}),
+    160: ("outputs", {"on": False}),
+    161: ("outputs", {"on": True}),
+    # Turn on a dimmer at 10 to 100 %
+    **{
+        176 + step: ("outputs", {"on": True, "value": (step + 1) * 10})
+        for step in range(10)
+    },
+}
+
+# Equal capability sets are shared between the devices
+_capabilities: dict[frozenset, frozenset] = {}
+
+
+def _shared_capabilities(capabilities: Iterable[str] | None) -> frozenset:
+    """Return the shared set of the given capabilities."""
+    capabilities = frozenset(capabilities or ())
+    return _capabilities.setdefault(capabilities, capabilities)
+
+
+def parse_actions(actions) -> tuple[tuple[int, int], ...]:
+    """Return the (type, number) pairs of the basic actions of a group action."""
+    try:
+        if isinstance(actions, str):
+            values = [int(value) for value in actions.split(",") if value.strip()]
+        elif isinstance(actions, (list, tuple)):
+            values = [int(value) for value in actions]
+        else:
+            return ()
+    except (TypeError, ValueError):
+        return ()
+    return tuple(zip(values[0::2], values[1::2]))
+
+
+class DeviceModel:
+    """The configuration of a device, built once from its API record.
+
+    The model is shared by the configuration index of the coordinator and
+    the entities of the device. It only keeps the fields the integration
+    uses, with the location and capabilities resolved up front.
+    """
+
+    __slots__ = (
+        "local_id",
+        "id",
+        "name",
+        "type",
+        "capabilities",
+        "floor",
+        "room",
+        "physical_quantity",
+        "physical_quantities",
+        "travel_up",
+        "travel_down",
+        "actions",
+    )
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        local_id: int,
+        id: int | None = None,  # pylint: disable=redefined-builtin
+        name: str | None = None,
+        type: str | None = None,  # pylint: disable=redefined-builtin
+        capabilities: Iterable[str] | None = None,
+        floor=LOCATION_UNKNOWN,
+        room=LOCATION_UNKNOWN,
+        physical_quantity: str | None = None,
+        travel_up: float | None = None,
+        travel_down: float | None = None,
+        actions=None,
+        physical_quantities: Iterable[str] | None = None,
+    ) -> None:
+        """Initialize the model."""
+        self.local_id = local_id
+        self.id = id
+        self.name = name
+        self.type = None if type is None else sys.intern(type)
+        self.capabilities = _shared_capabilities(capabilities)
+        self.floor = floor
+        self.room = room
+        # The quantity a sensor reports as its value
+        self.physical_quantity = physical_quantity
+        # All quantities a sensor measures, a gateway sensor can measure several
+        if not physical_quantities:
+            physical_quantities = [physical_quantity] if physical_quantity else []
+        self.physical_quantities = tuple(map(sys.intern, physical_quantities))
+        # The seconds a shutter takes to fully open and close, if known
+        self.travel_up = travel_up or None
+        self.travel_down = travel_down or None
+        # The basic actions of a group action
+        self.actions = parse_actions(actions)
+
+    @classmethod
+    def from_api(cls, record: dict) -> DeviceModel:
+        """Return the model of a configuration record of the API."""
+        location = record.get("location") or {}
+        return cls(
+            record["local_id"],
+            record.get("id"),
+            record.get("name"),
+            record.get("type"),
+            record.get("capabilities"),
+            location.get("floor_id", LOCATION_UNKNOWN),
+            location.get("room_id", LOCATION_UNKNOWN),
+            record.get("physical_quantity"),
+            record.get("timer_up"),
+            record.get("timer_down"),
+            record.get("actions"),
+            record.get("physical_quantities"),
+        )
+
+    def as_dict(self) -> dict:
+        """Return the model as a configuration record of the API."""
+        location = {}
+        if self.floor != LOCATION_UNKNOWN:
+            location["floor_id"] = self.floor
+        if self.room != LOCATION_UNKNOWN:
+            location["room_id"] = self.room
+        record = {
+            "id": self.id,
+            "local_id": self.local_id,
+            "name": self.name,
+            "type": self.type,
+            "capabilities": sorted(self.capabilities),
+            "location": location,
+        }
+        if self.physical_quantity is not None:
+            record["physical_quantity"] = self.physical_quantity
+        if self.physical_quantities not in ((), (self.physical_quantity,)):
+            record["physical_quantities"] = list(self.physical_quantities)
+        if self.travel_up is not None:
+            record["timer_up"] = self.travel_up
+        if self.travel_down is not None:
+            record["timer_down"] = self.travel_down
+        if self.actions:
+            record["actions"] = ",".join(
+                str(value) for action in self.actions for value in action
+            )
+        return record
+
+    @property
+    def in_use(self) -> bool:
+        """Return True if the device is named and in use."""
+        return bool(self.name) and self.name != NOT_IN_USE
+
+    def __eq__(self, other) -> bool:
+        """Return True if both models hold the same configuration."""
+        if not isinstance(other, DeviceModel):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        """Return the representation of the model."""
+        return f"DeviceModel({self.as_dict()!r})"
+
+
+def index_models(records: Iterable[dict]) -> dict[int, DeviceModel]:
+    """Return the models of configuration records by their local id."""
+    models = map(DeviceModel.from_api, records)
+    return {model.local_id: model for model in models}
@@ -0,0 +1,159 @@
+"""Incremental parsing of the status response of the cloud API."""
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Generator, Iterable
+
+from .const import STATUS_CATEGORIES
+
+WHITESPACE = " \t\n\r"
+
+_skip_whitespace = re.compile(r"[ \t\n\r]*").match
+
+_decoder = json.JSONDecoder()
+
+
+class StatusStreamParser:
+    """Parse a status response chunk by chunk into compact records.
+
+    Only the structure of the document is walked by this parser: every
+    device is decoded on its own as soon as it is complete, reduced to its
+    local id and status, and dropped. The full document is never held in
+    memory, neither as text nor as nested dicts.
+
+    The response looks like ``{"data": {"outputs": [{...}, ...], ...}}``,
+    the ``data`` wrapper is optional.
+    """
+
+    def __init__(self, categories: Iterable[str] = STATUS_CATEGORIES) -> None:
+        """Initialize the parser."""
+        self.result: dict[str, dict] = {category: {} for category in categories}
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._done = False
+        self._parser = self._parse_document()
+        next(self._parser)
+
+    def feed(self, chunk: bytes) -> None:
+        """Parse the next chunk of the response."""
+        # Drop the part of the buffer that was parsed already
+        self._buffer = self._buffer[self._pos :] + self._text.decode(chunk)
+        self._pos = 0
+        self._resume()
+
+    def close(self) -> dict[str, dict]:
+        """Return the statuses by category and local id."""
+        self._eof = True
+        self._buffer = self._buffer[self._pos :] + self._text.decode(b"", final=True)
+        self._pos = 0
+        self._resume()
+        if not self._done:
+            raise ValueError("Incomplete status response")
+        return self.result
+
+    def _resume(self) -> None:
+        """Parse as far as the buffer allows."""
+        if self._done:
+            return
+        try:
+            self._parser.send(None)
+        except StopIteration:
+            self._done = True
+
+    def _more(self) -> Generator:
+        """Wait for more data."""
+        if self._eof:
+            raise ValueError("Unexpected end of the status response")
+        yield
+
+    def _peek(self) -> Generator[None, None, str]:
+        """Return the next character that is not whitespace."""
+        while True:
+            while self._pos < len(self._buffer):
+                char = self._buffer[self._pos]
+                if char not in WHITESPACE:
+                    return char
+                self._pos += 1
+            yield from self._more()
+
+    def _next(self, expected: str) -> Generator[None, None, str]:
+        """Consume the next character, which must be one of expected."""
+        char = yield from self._peek()
+        if char not in expected:
+            raise ValueError(f"Expected one of {expected!r} at {char!r}")
+        self._pos += 1
+        return char
+
+    def _value(self) -> Generator:
+        """Decode the next complete value."""
+        yield from self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The value is not complete yet
+                yield from self._more()
+                continue
+            if end < len(self._buffer) or self._eof:
+                self._pos = end
+                return value
+            # A number at the end of the buffer may continue in the next chunk
+            yield from self._more()
+
+    def _parse_document(self) -> Generator:
+        """Parse the whole response."""
+        yield
+        yield from self._parse_object(wrapped=True)
+
+    def _parse_object(self, wrapped: bool) -> Generator:
+        """Parse an object holding the categories, or the data wrapper."""
+        yield from self._next("{")
+        if (yield from self._peek()) == "}":
+            self._pos += 1
+            return
+        while True:
+            key = yield from self._value()
+            yield from self._next(":")
+            char = yield from self._peek()
+            if wrapped and key == "data" and char == "{":
+                yield from self._parse_object(wrapped=False)
+            elif key in self.result and char == "[":
+                yield from self._parse_devices(self.result[key])
+            else:
+                # Anything else is skipped
+                yield from self._value()
+            if (yield from self._next(",}")) == "}":
+                return
+
+    def _parse_devices(self, records: dict) -> Generator:
+        """Parse a list of devices into their status by local id."""
+        yield from self._next("[")
+        if (yield from self._peek()) == "]":
+            self._pos += 1
+            return
+        while True:
+            # Decode the devices that are complete in the buffer right away,
+            # only an incomplete one needs the slower path that waits for data
+            buffer = self._buffer
+            try:
+                device, end = _decoder.raw_decode(
+                    buffer, _skip_whitespace(buffer, self._pos).end()
+                )
+                end = _skip_whitespace(buffer, end).end()
+                separator = buffer[end]
+            except (json.JSONDecodeError, IndexError):
+                device = yield from self._value()
+                separator = yield from self._next(",]")
+            else:
+                if separator not in ",]":
+                    raise ValueError(f"Expected one of ',]' at {separator!r}")
+                self._pos = end + 1
+            if not isinstance(device, dict) or "local_id" not in device:
+                raise ValueError(f"Invalid device {device!r}")
+            records[device["local_id"]] = device.get("status")
+            if separator == "]":
+                return
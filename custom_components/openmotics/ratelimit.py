@@ -0,0 +1,147 @@
+"""Client side rate limiting of the OpenMotics cloud API."""
+from __future__ import annotations
+
+import asyncio
+from email.utils import parsedate_to_datetime
+import heapq
+import itertools
+import random
+import time
+
+# The sustained number of requests per second, and the size of a burst
+RATE = 5
+BURST = 10
+
+# Commands are served before the background polls
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+
+# The backoff after a 429 without a Retry-After header
+BACKOFF_BASE = 1
+BACKOFF_MAX = 60
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return the jittered exponential backoff of a retry."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    # Equal jitter, so retries of several clients do not line up
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the seconds of a Retry-After header, in seconds or as a date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class OpenMoticsRateLimiter:
+    """A token bucket that serves the waiting requests by priority.
+
+    Requests take a token from the bucket, which refills at ``rate`` tokens
+    per second up to ``burst``. When the bucket is empty the requests wait,
+    and the ones with the lowest priority number go first. After a 429 the
+    limiter is paused, so no request at all is sent until the API is ready.
+    """
+
+    def __init__(self, rate: float = RATE, burst: int = BURST) -> None:
+        """Initialize the limiter."""
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+        # The number of requests that waited, and how long
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of requests waiting for a token."""
+        return sum(not future.done() for _, _, future in self._waiters)
+
+    async def async_acquire(self, priority: int = PRIORITY_POLL) -> None:
+        """Wait until the request may be sent."""
+        if not self._waiters and self._take():
+            return
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._schedule()
+        await future
+        wait = time.monotonic() - start
+        self.waits += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def pause(self, seconds: float) -> None:
+        """Send no request for the given number of seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        # The bucket starts empty after the pause, there is no burst
+        self._tokens = 0.0
+        self._updated = self._paused_until
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._schedule()
+
+    def diagnostics(self) -> dict:
+        """Return the statistics of the limiter."""
+        return {
+            "queue_depth": self.pending,
+            "waits": self.waits,
+            "average_wait": round(self.total_wait / self.waits, 3) if self.waits else 0,
+            "max_wait": round(self.max_wait, 3),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 3),
+        }
+
+    def _take(self) -> bool:
+        """Take a token if one is available."""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return False
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _release(self) -> None:
+        """Let the waiting requests go, as far as the tokens allow."""
+        self._wakeup = None
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():
+                # The request was cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if not self._take():
+                break
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """Wake up when the next token is available."""
+        if self._wakeup is not None or not self._waiters:
+            return
+        ready = max(
+            self._paused_until, self._updated + (1 - self._tokens) / self._rate
+        )
+        self._wakeup = asyncio.get_running_loop().call_later(
+            max(0.0, ready - time.monotonic()), self._release
+        )
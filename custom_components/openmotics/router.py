@@ -0,0 +1,232 @@
+"""Routing of the API calls over the cloud and the local gateway."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from .exceptions import OpenMoticsException
+from .latency import smoothed_latency
+
+_LOGGER = logging.getLogger(__name__)
+
+# Unhealthy transports are checked this many seconds apart
+HEALTH_CHECK_INTERVAL = 30
+# The number of passed health checks before a transport is used again
+HEALTHY_AFTER = 2
+
+
+class TransportStats:
+    """The latency and error statistics of a transport."""
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.healthy = True
+        # The moving average of the latency in seconds, None until measured
+        self.latency: float | None = None
+        self.requests = 0
+        self.errors = 0
+        self.last_error: str | None = None
+        self._checks_passed = 0
+
+    def succeeded(self, latency: float) -> None:
+        """Register a successful call."""
+        self.requests += 1
+        self.latency = smoothed_latency(self.latency, latency)
+
+    def failed(self, err: Exception) -> None:
+        """Register a failed call, the transport is not used until it recovers."""
+        self.requests += 1
+        self.errors += 1
+        self.last_error = str(err)
+        self.healthy = False
+        self._checks_passed = 0
+
+    def check_passed(self, latency: float) -> None:
+        """Register a passed health check."""
+        self.succeeded(latency)
+        self._checks_passed += 1
+        if self._checks_passed >= HEALTHY_AFTER:
+            self.healthy = True
+
+    def as_dict(self) -> dict:
+        """Return the statistics for the diagnostics."""
+        return {
+            "healthy": self.healthy,
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+            "requests": self.requests,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class OpenMoticsTransportRouter:
+    """Send every call over the fastest healthy transport.
+
+    The router has the same methods as the clients it routes over. A call
+    that fails is retried over the next transport, and the failed transport
+    is skipped until its health checks pass again.
+    """
+
+    def __init__(self, transports: dict[str, Any], installation_id) -> None:
+        """Initialize the router, the transports are given by preference."""
+        self._transports = transports
+        self._installation_id = installation_id
+        self.stats = {name: TransportStats() for name in transports}
+        self._health_task: asyncio.Task | None = None
+        # Events are pushed by the first transport that supports them
+        self._events = next(
+            (api for api in transports.values() if api.ws_url is not None),
+            next(iter(transports.values())),
+        )
+
+    @property
+    def session(self):
+        """Return the client session of the events."""
+        return self._events.session
+
+    @property
+    def ws_url(self) -> str | None:
+        """Return the base url of the websockets."""
+        return self._events.ws_url
+
+    async def get_valid_token(self) -> str:
+        """Return a valid token for the events."""
+        return await self._events.get_valid_token()
+
+    async def get_token(self) -> str:
+        """Log in on all transports, one is enough to continue."""
+        names = list(self._transports)
+        results = await asyncio.gather(
+            *(self._transports[name].get_token() for name in names),
+            return_exceptions=True,
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, OpenMoticsException):
+                self.stats[name].failed(result)
+            elif isinstance(result, BaseException):
+                raise result
+        for result in results:
+            if not isinstance(result, BaseException):
+                return result
+        raise results[0]
+
+    def close(self) -> None:
+        """Stop the health checks, the transports are closed by their owners."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+
+    def diagnostics(self) -> dict:
+        """Return the statistics of every transport."""
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def _ordered(self) -> list[str]:
+        """Return the transports to try, the fastest healthy one first."""
+        healthy = [name for name in self._transports if self.stats[name].healthy]
+        # Sorting is stable, so unmeasured transports keep their preference
+        healthy.sort(key=lambda name: self.stats[name].latency or 0)
+        return healthy + [name for name in self._transports if name not in healthy]
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        """Call a method over the best transport, failing over on errors."""
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._run_health_checks())
+        error: OpenMoticsException | None = None
+        for name in self._ordered():
+            stats = self.stats[name]
+            start = time.monotonic()
+            try:
+                result = await getattr(self._transports[name], method)(*args, **kwargs)
+            except OpenMoticsException as err:
+                if stats.healthy:
+                    _LOGGER.warning(
+                        "OpenMotics %s transport failed, failing over: %s", name, err
+                    )
+                stats.failed(err)
+                error = err
+                continue
+            stats.succeeded(time.monotonic() - start)
+            return result
+        raise error
+
+    async def _run_health_checks(self) -> None:
+        """Check the unhealthy and unmeasured transports now and then."""
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            await asyncio.gather(
+                *(
+                    self._async_check(name)
+                    for name, stats in self.stats.items()
+                    if not stats.healthy or stats.latency is None
+                )
+            )
+
+    async def _async_check(self, name: str) -> None:
+        """Check a single transport."""
+        stats = self.stats[name]
+        start = time.monotonic()
+        try:
+            await self._transports[name].get_installation(self._installation_id)
+        except OpenMoticsException as err:
+            stats.failed(err)
+            return
+        healthy = stats.healthy
+        stats.check_passed(time.monotonic() - start)
+        if stats.healthy and not healthy:
+            _LOGGER.info("OpenMotics %s transport recovered", name)
+
+    async def get_installations(self) -> list:
+        """Return all installations."""
+        return await self._call("get_installations")
+
+    async def get_installation(self, installation_id: str) -> dict:
+        """Return the details of an installation."""
+        return await self._call("get_installation", installation_id)
+
+    async def get_configuration(self, installation_id: str) -> dict:
+        """Return the configured devices of an installation by category."""
+        return await self._call("get_configuration", installation_id)
+
+    async def get_status(self, installation_id: str) -> dict:
+        """Return the live status of the devices of an installation."""
+        return await self._call("get_status", installation_id)
+
+    async def get_sensor_status(self, installation_id: str) -> dict:
+        """Return the live status of the sensors of an installation."""
+        return await self._call("get_sensor_status", installation_id)
+
+    async def output_turn_on(
+        self, installation_id: str, output_id: int, value: int | None = None
+    ) -> dict | None:
+        """Turn on an output."""
+        return await self._call("output_turn_on", installation_id, output_id, value)
+
+    async def output_turn_off(
+        self, installation_id: str, output_id: int
+    ) -> dict | None:
+        """Turn off an output."""
+        return await self._call("output_turn_off", installation_id, output_id)
+
+    async def shutter_up(self, installation_id: str, shutter_id: int) -> dict | None:
+        """Move a shutter up."""
+        return await self._call("shutter_up", installation_id, shutter_id)
+
+    async def shutter_down(
+        self, installation_id: str, shutter_id: int
+    ) -> dict | None:
+        """Move a shutter down."""
+        return await self._call("shutter_down", installation_id, shutter_id)
+
+    async def shutter_stop(
+        self, installation_id: str, shutter_id: int
+    ) -> dict | None:
+        """Stop a shutter."""
+        return await self._call("shutter_stop", installation_id, shutter_id)
+
+    async def groupaction_trigger(
+        self, installation_id: str, groupaction_id: int
+    ) -> dict | None:
+        """Trigger a group action (scene)."""
+        return await self._call("groupaction_trigger", installation_id, groupaction_id)
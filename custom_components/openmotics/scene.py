@@ -11,7 +11,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 
-from .const import DOMAIN, NOT_IN_USE
+from .const import DOMAIN
 from .coordinator import OpenMoticsDataUpdateCoordinator
 from .entity import OpenMoticsDevice
 
@@ -33,12 +33,8 @@ async def async_setup_entry(
 
     coordinator: OpenMoticsDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    for om_scene in coordinator.data["groupactions"]:
-        if (
-            om_scene["name"] is None
-            or om_scene["name"] == ""
-            or om_scene["name"] == NOT_IN_USE
-        ):
+    for om_scene in coordinator.configuration["groupactions"].values():
+        if not om_scene.in_use:
             continue
         # print("- {}".format(om_scene))
         entities.append(OpenMoticsScene(coordinator, om_scene))
@@ -54,6 +50,7 @@ class OpenMoticsScene(OpenMoticsDevice, Scene):
     """Representation of a OpenMotics group action."""
 
     coordinator: OpenMoticsDataUpdateCoordinator
+    _category = "groupactions"
 
     def __init__(self, coordinator: OpenMoticsDataUpdateCoordinator, om_scene):
         """Initialize the scene."""
@@ -62,8 +59,4 @@ class OpenMoticsScene(OpenMoticsDevice, Scene):
 
     async def async_activate(self, **kwargs: Any) -> None:
         """Activate the scene."""
-        await self.hass.async_add_executor_job(
-            self.coordinator.backenclient.base.installations.groupactions.trigger,
-            self.install_id,
-            self.device_id,
-        )
+        await self.coordinator.async_trigger_group_action(self.device_id)
@@ -1,4 +1,4 @@
-"""Support for HomeAssistant lights."""
+"""Support for HomeAssistant sensors."""
 from __future__ import annotations
 
 from dataclasses import dataclass
@@ -16,7 +16,7 @@ from homeassistant.const import (
     ATTR_TEMPERATURE,
     # DEVICE_CLASS_BATTERY,
     DEVICE_CLASS_HUMIDITY,
-    DEVICE_CLASS_ILLUMINANCE,
+    # DEVICE_CLASS_ILLUMINANCE,
     # DEVICE_CLASS_POWER,
     # DEVICE_CLASS_PRESSURE,
     DEVICE_CLASS_TEMPERATURE,
@@ -26,12 +26,13 @@ from homeassistant.const import (
     # PRESSURE_HPA,
     TEMP_CELSIUS,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, NOT_IN_USE
+from .const import CONF_SENSOR_PRECISION, DEFAULT_SENSOR_PRECISION, DOMAIN
 from .coordinator import OpenMoticsDataUpdateCoordinator
 from .entity import OpenMoticsDevice
+from .models import DeviceModel
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -46,31 +47,43 @@ class OpenMoticsSensorDescription(SensorEntityDescription):
     attributes: tuple = ()
 
 
+# The descriptions by the physical quantity the API reports
 SENSOR_TYPES = {
-    ATTR_TEMPERATURE: OpenMoticsSensorDescription(
+    "temperature": OpenMoticsSensorDescription(
         key=ATTR_TEMPERATURE,
         name="Temperature",
         native_unit_of_measurement=TEMP_CELSIUS,
         device_class=DEVICE_CLASS_TEMPERATURE,
         state_class=STATE_CLASS_MEASUREMENT,
     ),
-    ATTR_HUMIDITY: OpenMoticsSensorDescription(
+    "humidity": OpenMoticsSensorDescription(
         key=ATTR_HUMIDITY,
         name="Humidity",
         native_unit_of_measurement=PERCENTAGE,
         device_class=DEVICE_CLASS_HUMIDITY,
         state_class=STATE_CLASS_MEASUREMENT,
     ),
-    ATTR_ILLUMINANCE: OpenMoticsSensorDescription(
+    # The brightness is a percentage, the illuminance class requires lux
+    "brightness": OpenMoticsSensorDescription(
         key=ATTR_ILLUMINANCE,
         name="Illuminance",
+        icon="mdi:brightness-5",
         native_unit_of_measurement=PERCENTAGE,
-        device_class=DEVICE_CLASS_ILLUMINANCE,
         state_class=STATE_CLASS_MEASUREMENT,
     ),
 }
 
 
+def significant_change(old, new, precision: float) -> bool:
+    """Return True if a sensor value changed by at least the precision."""
+    if old == new:
+        return False
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        # Rounded, so a change of exactly the precision is not lost to floats
+        return round(abs(new - old), 6) >= precision
+    return True
+
+
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Component doesn't support configuration through configuration.yaml."""
     return
@@ -85,16 +98,23 @@ async def async_setup_entry(
     entities = []
 
     coordinator: OpenMoticsDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    precision = entry.options.get(CONF_SENSOR_PRECISION, DEFAULT_SENSOR_PRECISION)
 
-    for om_sensor in coordinator.data["sensors"]:
-        if (
-            om_sensor["name"] is None
-            or om_sensor["name"] == ""
-            or om_sensor["name"] == NOT_IN_USE
-        ):
+    for om_sensor in coordinator.configuration["sensors"].values():
+        if not om_sensor.in_use:
             continue
-        # if om_sensor["physical_quantity"] == "temperature":
-        #     entities.append(OpenMoticsLight(coordinator, om_sensor, "Temperature"))
+        # An entity per quantity, a sensor of the gateway can measure several
+        for quantity in om_sensor.physical_quantities:
+            if quantity not in SENSOR_TYPES:
+                _LOGGER.debug(
+                    "Unsupported OpenMotics sensor %s: %s", om_sensor.name, quantity
+                )
+                continue
+            entities.append(
+                OpenMoticsSensor(
+                    coordinator, om_sensor, quantity, SENSOR_TYPES[quantity], precision
+                )
+            )
 
     if not entities:
         _LOGGER.info("No OpenMotics sensors added")
@@ -104,25 +124,37 @@ async def async_setup_entry(
 
 
 class OpenMoticsSensor(OpenMoticsDevice, SensorEntity):
-    """Representation of a OpenMotics light."""
+    """Representation of a OpenMotics sensor."""
 
     coordinator: OpenMoticsDataUpdateCoordinator
+    _category = "sensors"
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         coordinator: OpenMoticsDataUpdateCoordinator,
-        om_sensor,
-        description: SensorEntityDescription,
+        om_sensor: DeviceModel,
+        quantity: str,
+        description: OpenMoticsSensorDescription,
+        precision: float = DEFAULT_SENSOR_PRECISION,
     ):
-        """Initialize the light."""
+        """Initialize the sensor."""
         super().__init__(coordinator, om_sensor, "sensor")
         self.coordinator = coordinator
         self.entity_description = description
-        self.sensor_name = om_sensor["name"]
+        self._quantity = quantity
+        self.sensor_name = om_sensor.name
         self._state = None
+        self._precision = precision
+        # What the last written state showed
+        self._written: tuple | None = None
 
         self._attr_name = f"{self.sensor_name} {description.name}"
 
+    @property
+    def unique_id(self) -> str:
+        """Return a unique ID."""
+        return f"{self.install_id}-{self.device_id}-{self.entity_description.key}"
+
     @property
     def native_value(self):
         """Return the state of the sensor."""
@@ -131,11 +163,35 @@ class OpenMoticsSensor(OpenMoticsDevice, SensorEntity):
 
         return self._state
 
+    def _read_value(self):
+        """Return the current value of the sensor from the coordinator data."""
+        status = self.coordinator.get_status("sensors", self.device_id)
+        if not isinstance(status, dict):
+            return None
+        # The gateway reports a value per quantity, the cloud a single value
+        if self._quantity in status:
+            return status[self._quantity]
+        if self._quantity == self._device.physical_quantity:
+            return status.get("value")
+        return None
+
     async def async_update(self):
-        """Refresh the state of the light."""
-        for om_sensor in self.coordinator.data["sensors"]:
-            if om_sensor["id"] == self.device_id:
-                if om_sensor["status"] is not None:
-                    self._state = om_sensor["status"]
-                else:
-                    self._state = None
+        """Refresh the state of the sensor."""
+        self._state = self._read_value()
+        self._written = (self._state, self.available, self.assumed_state)
+
+    @callback
+    def _async_update_callback(self) -> None:
+        """Write the state only when it changed by at least the precision."""
+        value = self._read_value()
+        if self._written is not None:
+            state, available, assumed_state = self._written
+            if (
+                available == self.available
+                and assumed_state == self.assumed_state
+                and not significant_change(state, value, self._precision)
+            ):
+                return
+        self._state = value
+        self._written = (value, self.available, self.assumed_state)
+        self.async_write_ha_state()
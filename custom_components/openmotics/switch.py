@@ -12,7 +12,7 @@ from homeassistant.const import STATE_OFF, STATE_ON
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, NOT_IN_USE
+from .const import DOMAIN
 from .coordinator import OpenMoticsDataUpdateCoordinator
 from .entity import OpenMoticsDevice
 
@@ -34,16 +34,12 @@ async def async_setup_entry(
 
     coordinator: OpenMoticsDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    for om_outlet in coordinator.data["outputs"]:
-        if (
-            om_outlet["name"] is None
-            or om_outlet["name"] == ""
-            or om_outlet["name"] == NOT_IN_USE
-        ):
+    for om_outlet in coordinator.configuration["outputs"].values():
+        if not om_outlet.in_use:
             continue
 
         # Outputs can contain outlets and lights, so filter out only the outlets (aka switches)
-        if om_outlet["type"] == "OUTLET":
+        if om_outlet.type == "OUTLET":
             # print("- {}".format(om_outlet))
             entities.append(OpenMoticsSwitch(coordinator, om_outlet))
 
@@ -69,38 +65,27 @@ class OpenMoticsSwitch(OpenMoticsDevice, SwitchEntity):
 
     async def async_turn_on(self, **kwargs):
         """Turn devicee off."""
-        await self.hass.async_add_executor_job(
-            self.coordinator.backenclient.base.installations.outputs.turn_on,
-            self.install_id,
+        await self.coordinator.async_output_turn_on(
             self.device_id,
             100,  # value is required but an outlet goes only on/off so we set it to 100
         )
-        self._state = STATE_ON
-        # self.schedule_update_ha_state()
-        # await self.coordinator._async_update_data()
-        await self.coordinator.async_request_refresh()
+        # Show the new state right away, a refresh verifies it later on
+        self.coordinator.async_set_optimistic("outputs", self.device_id, {"on": True})
 
     async def async_turn_off(self, **kwargs):
         """Turn devicee off."""
-        await self.hass.async_add_executor_job(
-            self.coordinator.backenclient.base.installations.outputs.turn_off,
-            self.install_id,
+        await self.coordinator.async_output_turn_off(
             self.device_id,
         )
-        self._state = STATE_OFF
-        # self.schedule_update_ha_state()
-        # await self.coordinator._async_update_data()
-        await self.coordinator.async_request_refresh()
+        self.coordinator.async_set_optimistic("outputs", self.device_id, {"on": False})
 
     async def async_update(self):
         """Refresh the state of the switch."""
-        for om_outlet in self.coordinator.data["outputs"]:
-            if om_outlet["id"] == self.device_id:
-                if om_outlet["status"] is not None:
-                    status = om_outlet["status"]
-                    if status["on"] is True:
-                        self._state = STATE_ON
-                    else:
-                        self._state = STATE_OFF
-                else:
-                    self._state = None
+        status = self.coordinator.get_status("outputs", self.device_id)
+        if status is not None:
+            if status["on"] is True:
+                self._state = STATE_ON
+            else:
+                self._state = STATE_OFF
+        else:
+            self._state = None
@@ -0,0 +1,136 @@
+"""Subscriber for the OpenMotics event websocket."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+import aiohttp
+
+from .exceptions import OpenMoticsException
+
+_LOGGER = logging.getLogger(__name__)
+
+WS_PATH = "/ws/events"
+
+EVENT_OUTPUT_CHANGE = "OUTPUT_CHANGE"
+EVENT_SHUTTER_CHANGE = "SHUTTER_CHANGE"
+EVENT_SENSOR_CHANGE = "SENSOR_CHANGE"
+
+# Map the event types to the category of the coordinator data they change
+EVENT_CATEGORIES = {
+    EVENT_OUTPUT_CHANGE: "outputs",
+    EVENT_SHUTTER_CHANGE: "shutters",
+    EVENT_SENSOR_CHANGE: "sensors",
+}
+
+HEARTBEAT = 30
+RECONNECT_MIN = 1
+RECONNECT_MAX = 300
+
+
+class OpenMoticsEventListener:
+    """Keep a websocket open and pass the events of an installation on."""
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        get_token: Callable[[], Awaitable[str]],
+        installation_id,
+        on_event: Callable[[dict], None],
+        on_connection: Callable[[bool], None] | None = None,
+    ) -> None:
+        """Initialize the listener."""
+        self._session = session
+        self._url = url
+        self._get_token = get_token
+        self._installation_id = installation_id
+        self._on_event = on_event
+        self._on_connection = on_connection
+        self._task: asyncio.Task | None = None
+        self.connected = False
+
+    def start(self) -> None:
+        """Start listening in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop listening and close the websocket."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.connected = False
+
+    def _set_connected(self, connected: bool) -> None:
+        """Report a change of the connection state."""
+        if connected == self.connected:
+            return
+        self.connected = connected
+        if self._on_connection is not None:
+            self._on_connection(connected)
+
+    async def _run(self) -> None:
+        """Connect, and reconnect with a backoff when the connection drops."""
+        delay = RECONNECT_MIN
+        while True:
+            try:
+                await self._listen()
+                delay = RECONNECT_MIN
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                OpenMoticsException,
+            ) as err:
+                _LOGGER.debug("OpenMotics event websocket error: %s", err)
+            self._set_connected(False)
+            _LOGGER.debug("Reconnecting the OpenMotics event websocket in %ss", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    async def _listen(self) -> None:
+        """Listen on a single websocket connection until it closes."""
+        token = await self._get_token()
+        async with self._session.ws_connect(
+            self._url,
+            headers={"Authorization": f"Bearer {token}"},
+            heartbeat=HEARTBEAT,
+        ) as websocket:
+            await websocket.send_json(
+                {
+                    "type": "ACTION",
+                    "data": {
+                        "action": "set_subscription",
+                        "types": list(EVENT_CATEGORIES),
+                        "installation_ids": [self._installation_id],
+                    },
+                }
+            )
+            self._set_connected(True)
+            async for message in websocket:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    break
+                try:
+                    self._handle_message(message.json())
+                except ValueError:
+                    _LOGGER.debug("Invalid OpenMotics event: %s", message.data)
+
+    def _handle_message(self, message: Any) -> None:
+        """Pass the events of our installation on."""
+        if not isinstance(message, dict) or message.get("type") != "EVENT":
+            return
+        event = message.get("data")
+        if not isinstance(event, dict) or event.get("type") not in EVENT_CATEGORIES:
+            return
+        installation_id = event.get("installation_id")
+        if installation_id is not None and str(installation_id) != str(
+            self._installation_id
+        ):
+            return
+        self._on_event(event)
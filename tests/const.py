@@ -1,5 +1,5 @@
-"""Constants for integration_blueprint tests."""
-from custom_components.integration_blueprint.const import CONF_PASSWORD, CONF_USERNAME
+"""Constants for openmotics tests."""
+from homeassistant.const import CONF_CLIENT_ID, CONF_CLIENT_SECRET
 
 # Mock config data to be used across multiple tests
 MOCK_CONFIG = {CONF_CLIENT_ID: "test_username", CONF_CLIENT_SECRET: "test_password"}
@@ -0,0 +1,55 @@
+"""Test the sharing of an account between installations."""
+import asyncio
+import time
+from unittest.mock import Mock
+
+from custom_components.openmotics.account import (
+    OpenMoticsPollScheduler,
+    async_get_account,
+    async_release_account,
+)
+from custom_components.openmotics.const import DOMAIN_DATA
+
+
+async def test_poll_scheduler():
+    """Test simultaneous polls are spread over the budget."""
+    scheduler = OpenMoticsPollScheduler(budget=600)
+    polls = []
+
+    async def poll():
+        await scheduler.async_slot()
+        polls.append(time.monotonic())
+
+    await asyncio.gather(*(poll() for _ in range(5)))
+    gaps = [later - earlier for earlier, later in zip(polls, polls[1:])]
+    # 600 polls per minute leaves 0.1 seconds between the polls
+    assert min(gaps) > 0.09
+    assert scheduler.delayed == 4
+
+
+async def test_shared_account(hass):
+    """Test installations with the same credentials share one client."""
+    created = []
+
+    def create_api():
+        created.append(Mock())
+        return created[-1]
+
+    key = ("cloud.openmotics.com", 443, "id", "secret")
+    first = async_get_account(hass, key, "entry1", create_api)
+    second = async_get_account(hass, key, "entry2", create_api)
+    other = async_get_account(hass, ("host", 443, "id", "secret"), "entry3", create_api)
+    assert first is second
+    assert first is not other
+    assert len(created) == 2
+    assert first.entries == {"entry1", "entry2"}
+
+    # The client is closed when the last installation releases it
+    async_release_account(hass, first, "entry1")
+    assert key in hass.data[DOMAIN_DATA]
+    assert not first.api.close.called
+    async_release_account(hass, first, "entry2")
+    assert key not in hass.data[DOMAIN_DATA]
+    assert first.api.close.called
+    async_release_account(hass, other, "entry3")
+    assert DOMAIN_DATA not in hass.data
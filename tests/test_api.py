@@ -1,86 +1,104 @@
-"""Tests for integration_blueprint api."""
+"""Tests for the OpenMotics api client."""
 import asyncio
 
 import aiohttp
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import pytest
 
-from custom_components.integration_blueprint.api import IntegrationBlueprintApiClient
+from custom_components.openmotics.api import OpenMoticsApiClient
+from custom_components.openmotics.exceptions import (
+    ApiError,
+    CannotConnect,
+    InvalidAuth,
+    TooManyRequests,
+)
 
+BASE_URL = "https://cloud.openmotics.com:443/api/v1"
+TOKEN_URL = f"{BASE_URL}/authentication/oauth2/token"
 
-async def test_api(hass, aioclient_mock, caplog):
-    """Test API calls."""
 
-    # To test the api submodule, we first create an instance of our API client
-    api = IntegrationBlueprintApiClient("test", "test", async_get_clientsession(hass))
+async def test_api(hass, aioclient_mock):
+    """Test API calls."""
+    api = OpenMoticsApiClient(async_get_clientsession(hass), "id", "secret")
 
-    # Use aioclient_mock which is provided by `pytest_homeassistant_custom_components`
-    # to mock responses to aiohttp requests. In this case we are telling the mock to
-    # return {"test": "test"} when a `GET` call is made to the specified URL. We then
-    # call `async_get_data` which will make that `GET` request.
+    aioclient_mock.post(TOKEN_URL, json={"access_token": "abc", "expires_in": 3600})
     aioclient_mock.get(
-        "https://jsonplaceholder.typicode.com/posts/1", json={"test": "test"}
-    )
-    assert await api.async_get_data() == {"test": "test"}
-
-    # We do the same for `async_set_title`. Note the difference in the mock call
-    # between the previous step and this one. We use `patch` here instead of `get`
-    # because we know that `async_set_title` calls `api_wrapper` with `patch` as the
-    # first parameter
-    aioclient_mock.patch("https://jsonplaceholder.typicode.com/posts/1")
-    assert await api.async_set_title("test") is None
-
-    # In order to get 100% coverage, we need to test `api_wrapper` to test the code
-    # that isn't already called by `async_get_data` and `async_set_title`. Because the
-    # only logic that lives inside `api_wrapper` that is not being handled by a third
-    # party library (aiohttp) is the exception handling, we also want to simulate
-    # raising the exceptions to ensure that the function handles them as expected.
-    # The caplog fixture allows access to log messages in tests. This is particularly
-    # useful during exception handling testing since often the only action as part of
-    # exception handling is a logging statement
-    caplog.clear()
-    aioclient_mock.put(
-        "https://jsonplaceholder.typicode.com/posts/1", exc=asyncio.TimeoutError
+        f"{BASE_URL}/base/installations",
+        json={"data": [{"id": 1, "name": "Home"}]},
     )
-    assert (
-        await api.api_wrapper("put", "https://jsonplaceholder.typicode.com/posts/1")
-        is None
-    )
-    assert (
-        len(caplog.record_tuples) == 1
-        and "Timeout error fetching information from" in caplog.record_tuples[0][2]
+    aioclient_mock.post(
+        f"{BASE_URL}/base/installations/1/outputs/5/turn_on",
+        json={"data": {"id": 5, "value": 40}},
     )
 
-    caplog.clear()
+    assert await api.get_installations() == [{"id": 1, "name": "Home"}]
+    assert api.token == "abc"
+    assert await api.output_turn_on(1, 5, 40) == {"id": 5, "value": 40}
+
+    # The token is requested once and reused for all requests
+    assert aioclient_mock.mock_calls[0][1].path.endswith("/oauth2/token")
+    assert len(aioclient_mock.mock_calls) == 3
+    assert aioclient_mock.mock_calls[2][2] == {"value": 40}
+    assert aioclient_mock.mock_calls[2][3]["Authorization"] == "Bearer abc"
+
+
+async def test_api_errors(hass, aioclient_mock):
+    """Test the api errors are translated."""
+    api = OpenMoticsApiClient(async_get_clientsession(hass), "id", "secret")
+
+    aioclient_mock.post(TOKEN_URL, status=401)
+    with pytest.raises(InvalidAuth):
+        await api.get_token()
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(TOKEN_URL, json={"access_token": "abc"})
+    aioclient_mock.get(f"{BASE_URL}/base/installations/1/status", status=500)
+    aioclient_mock.get(f"{BASE_URL}/base/installations/1", text="<html></html>")
     aioclient_mock.post(
-        "https://jsonplaceholder.typicode.com/posts/1", exc=aiohttp.ClientError
-    )
-    assert (
-        await api.api_wrapper("post", "https://jsonplaceholder.typicode.com/posts/1")
-        is None
+        f"{BASE_URL}/base/installations/1/shutters/2/up", exc=asyncio.TimeoutError
     )
-    assert (
-        len(caplog.record_tuples) == 1
-        and "Error fetching information from" in caplog.record_tuples[0][2]
+    aioclient_mock.post(
+        f"{BASE_URL}/base/installations/1/shutters/2/down", exc=aiohttp.ClientError
     )
 
-    caplog.clear()
-    aioclient_mock.post("https://jsonplaceholder.typicode.com/posts/2", exc=Exception)
-    assert (
-        await api.api_wrapper("post", "https://jsonplaceholder.typicode.com/posts/2")
-        is None
-    )
-    assert (
-        len(caplog.record_tuples) == 1
-        and "Something really wrong happened!" in caplog.record_tuples[0][2]
-    )
+    with pytest.raises(ApiError):
+        await api.get_status(1)
+    # A body that is not JSON is an error, not an empty result
+    with pytest.raises(ApiError):
+        await api.get_installation(1)
+    with pytest.raises(CannotConnect):
+        await api.shutter_up(1, 2)
+    with pytest.raises(CannotConnect):
+        await api.shutter_down(1, 2)
 
-    caplog.clear()
-    aioclient_mock.post("https://jsonplaceholder.typicode.com/posts/3", exc=TypeError)
-    assert (
-        await api.api_wrapper("post", "https://jsonplaceholder.typicode.com/posts/3")
-        is None
-    )
-    assert (
-        len(caplog.record_tuples) == 1
-        and "Error parsing information from" in caplog.record_tuples[0][2]
+
+async def test_api_token_rejected(hass, aioclient_mock):
+    """Test a rejected token is replaced and the request retried once."""
+    api = OpenMoticsApiClient(async_get_clientsession(hass), "id", "secret")
+
+    aioclient_mock.post(TOKEN_URL, json={"access_token": "abc"})
+    aioclient_mock.get(f"{BASE_URL}/base/installations", status=401)
+
+    with pytest.raises(InvalidAuth):
+        await api.get_installations()
+    # Token, request, new token, retried request
+    assert len(aioclient_mock.mock_calls) == 4
+    assert api.tokens.logins == 2
+    api.close()
+
+
+async def test_api_throttled(hass, aioclient_mock):
+    """Test a throttled request is retried after the Retry-After delay."""
+    api = OpenMoticsApiClient(async_get_clientsession(hass), "id", "secret")
+
+    aioclient_mock.post(TOKEN_URL, json={"access_token": "abc"})
+    aioclient_mock.get(
+        f"{BASE_URL}/base/installations", status=429, headers={"Retry-After": "0"}
     )
+
+    with pytest.raises(TooManyRequests):
+        await api.get_installations()
+    # The token and the first attempt, followed by the retries
+    assert len(aioclient_mock.mock_calls) == 5
+    assert api.throttled == 4
+    api.close()
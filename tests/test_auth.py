@@ -0,0 +1,72 @@
+"""Test the OpenMotics token lifecycle."""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.openmotics.auth import OpenMoticsTokenManager
+from custom_components.openmotics.exceptions import InvalidAuth
+
+
+async def test_single_flight_login():
+    """Test concurrent requests for a token share a single login."""
+    logins = []
+
+    async def login():
+        logins.append(1)
+        await asyncio.sleep(0.01)
+        return {"access_token": f"token{len(logins)}", "expires_in": 3600}
+
+    tokens = OpenMoticsTokenManager(login)
+    results = await asyncio.gather(*(tokens.async_get_token() for _ in range(10)))
+    assert results == ["token1"] * 10
+    assert tokens.logins == 1
+
+    # A valid token is reused
+    assert await tokens.async_get_token() == "token1"
+
+    # A rejected token is replaced once, however many requests reject it
+    tokens.invalidate("token1")
+    tokens.invalidate("token1")
+    results = await asyncio.gather(*(tokens.async_get_token() for _ in range(5)))
+    assert results == ["token2"] * 5
+    # An old token does not invalidate the new one
+    tokens.invalidate("token1")
+    assert tokens.valid
+    tokens.close()
+
+
+async def test_proactive_refresh():
+    """Test the token is refreshed before it expires."""
+    responses = [
+        {"access_token": "token1", "expires_in": 0.02},
+        {"access_token": "token2", "expires_in": 3600},
+    ]
+
+    async def login():
+        return responses.pop(0)
+
+    with patch("custom_components.openmotics.auth.REFRESH_MARGIN", 0.01):
+        tokens = OpenMoticsTokenManager(login)
+        assert await tokens.async_get_token() == "token1"
+        await asyncio.sleep(0.05)
+    assert tokens.token == "token2"
+    assert tokens.logins == 2
+    tokens.close()
+
+
+async def test_failed_login():
+    """Test all waiters get the error of a failed login."""
+
+    async def login():
+        await asyncio.sleep(0.01)
+        raise InvalidAuth
+
+    tokens = OpenMoticsTokenManager(login)
+    results = await asyncio.gather(
+        tokens.async_get_token(), tokens.async_get_token(), return_exceptions=True
+    )
+    assert all(isinstance(result, InvalidAuth) for result in results)
+    assert not tokens.valid
+    with pytest.raises(InvalidAuth):
+        await tokens.async_login()
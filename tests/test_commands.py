@@ -0,0 +1,78 @@
+"""Test the batching of OpenMotics commands."""
+import asyncio
+
+import pytest
+
+from custom_components.openmotics.commands import OpenMoticsCommandQueue
+
+
+async def test_command_queue():
+    """Test commands within a window are coalesced and sent concurrently."""
+    sent = []
+
+    async def send(output_id, value):
+        sent.append((output_id, value))
+        if output_id == 3:
+            raise ValueError("output 3 failed")
+        return {"id": output_id, "value": value}
+
+    queue = OpenMoticsCommandQueue(max_parallel=2)
+    results = await asyncio.gather(
+        queue.async_send(1, send, 1, 10),
+        queue.async_send(2, send, 2, 20),
+        # The last command for an output wins
+        queue.async_send(1, send, 1, 30),
+        queue.async_send(3, send, 3, 40),
+        return_exceptions=True,
+    )
+
+    assert sorted(sent) == [(1, 30), (2, 20), (3, 40)]
+    assert results[0] == results[2] == {"id": 1, "value": 30}
+    assert results[1] == {"id": 2, "value": 20}
+    # Every output gets its own result
+    assert isinstance(results[3], ValueError)
+    assert queue.batches_sent == 1
+    assert queue.commands_sent == 3
+    assert queue.latency is not None
+
+
+async def test_command_queue_bulk():
+    """Test a batch is sent as one request when a bulk sender is available."""
+    bulks = []
+
+    async def send_bulk(commands):
+        bulks.append(commands)
+        return {key: {"id": key} for key in commands}
+
+    async def send(output_id):
+        pytest.fail("single commands are not sent")
+
+    queue = OpenMoticsCommandQueue(send_bulk=send_bulk)
+    results = await asyncio.gather(*(queue.async_send(i, send, i) for i in range(5)))
+
+    assert len(bulks) == 1
+    assert results == [{"id": i} for i in range(5)]
+
+
+async def test_command_queue_keeps_order():
+    """Test a command waits for the command of a previous batch for its key."""
+    events = []
+
+    async def send(output_id, value, delay):
+        events.append(("start", output_id, value))
+        await asyncio.sleep(delay)
+        events.append(("done", output_id, value))
+
+    queue = OpenMoticsCommandQueue()
+    first = asyncio.create_task(queue.async_send(1, send, 1, 10, 0.2))
+    # The next batch, while the first command is on its way
+    await asyncio.sleep(0.1)
+    await asyncio.gather(
+        queue.async_send(1, send, 1, 0, 0), queue.async_send(2, send, 2, 50, 0)
+    )
+    await first
+
+    assert queue.batches_sent == 2
+    # Output 2 does not wait for output 1
+    assert events.index(("done", 2, 50)) < events.index(("done", 1, 10))
+    assert events.index(("done", 1, 10)) < events.index(("start", 1, 0))
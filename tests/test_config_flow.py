@@ -8,24 +8,36 @@ from pytest_homeassistant_custom_component.common import MockConfigEntry
 from homeassistant.const import (
     CONF_PORT,
     CONF_HOST,
+    CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    CONF_USERNAME,
     CONF_VERIFY_SSL,
 )
 
 from custom_components.openmotics.const import (
-    DOMAIN,
-    PLATFORMS,
-    LIGHT,
-)
-
-from .const import MOCK_CONFIG
-
-from .const import (
+    CONF_GATEWAY,
+    CONF_INSTALLATION_ID,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_SENSOR_PRECISION,
+    CONF_SENSOR_SCAN_INTERVAL,
+    CONF_STALENESS_BUDGET,
+    CONF_TRANSPORT,
+    CONF_VERIFY_DELAY,
+    DEFAULT_GATEWAY_PORT,
     DEFAULT_HOST,
     DEFAULT_PORT,
     DEFAULT_VERIFY_SSL,
     DOMAIN,
-    PLATFORMS,
+    TRANSPORT_CLOUD,
+    TRANSPORT_HYBRID,
+    TRANSPORT_LOCAL,
 )
+from custom_components.openmotics.exceptions import CannotConnect, InvalidAuth
+
+from .const import MOCK_CONFIG
+
+INSTALLATIONS = [{"id": 1, "name": "Home"}, {"id": 2, "name": "Office"}]
+GATEWAY = {CONF_HOST: "192.168.0.2", CONF_USERNAME: "admin", CONF_PASSWORD: "secret"}
 
 # This fixture bypasses the actual setup of the integration
 # since we only want to test the config flow. We test the
@@ -33,60 +45,173 @@ from .const import (
 @pytest.fixture(autouse=True)
 def bypass_setup_fixture():
     """Prevent setup."""
-    with patch("custom_components.openmotics.async_setup", return_value=True,), patch(
+    with patch(
         "custom_components.openmotics.async_setup_entry",
         return_value=True,
     ):
         yield
 
 
-# Here we simiulate a successful config flow from the backend.
-# Note that we use the `bypass_get_data` fixture here because
-# we want the config flow validation to succeed during the test.
-async def test_successful_config_flow(hass, bypass_get_data):
-    """Test a successful config flow."""
-    # Initialize a config flow
+def mock_client(client, installations=None, side_effect=None):
+    """Patch the login and the installations of a client of the config flow."""
+    path = f"custom_components.openmotics.config_flow.{client}"
+    return patch(f"{path}.get_token", side_effect=side_effect), patch(
+        f"{path}.get_installations", return_value=installations
+    )
+
+
+async def start_flow(hass, transport):
+    """Start a config flow and choose how to reach the installation."""
     result = await hass.config_entries.flow.async_init(
         DOMAIN, context={"source": config_entries.SOURCE_USER}
     )
-
-    # Check that the config flow shows the user form as the first step
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
     assert result["step_id"] == "user"
+    return await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={CONF_TRANSPORT: transport}
+    )
+
+
+async def test_cloud_config_flow(hass):
+    """Test a config flow over the cloud."""
+    result = await start_flow(hass, TRANSPORT_CLOUD)
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "cloud"
+
+    login, installations = mock_client("OpenMoticsApiClient", INSTALLATIONS)
+    with login, installations:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=MOCK_CONFIG
+        )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "select_installation"
 
-    # If a user were to enter `test_username` for username and `test_password`
-    # for password, it would result in this function call
     result = await hass.config_entries.flow.async_configure(
-        result["flow_id"], user_input=MOCK_CONFIG
+        result["flow_id"], user_input={CONF_INSTALLATION_ID: 2}
     )
-
-    # Check that the config flow is complete and a new entry is created with
-    # the input data
     assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
-    assert result["title"] == "test_username"
-    assert result["data"] == MOCK_CONFIG
-    assert result["result"]
+    assert result["title"] == f"{DEFAULT_HOST}-2"
+    assert result["data"] == {
+        CONF_TRANSPORT: TRANSPORT_CLOUD,
+        **MOCK_CONFIG,
+        CONF_HOST: DEFAULT_HOST,
+        CONF_PORT: DEFAULT_PORT,
+        CONF_VERIFY_SSL: DEFAULT_VERIFY_SSL,
+        CONF_INSTALLATION_ID: 2,
+    }
+
+
+async def test_cloud_config_flow_invalid_auth(hass):
+    """Test the cloud form is shown again when the credentials are rejected."""
+    result = await start_flow(hass, TRANSPORT_CLOUD)
+
+    login, installations = mock_client("OpenMoticsApiClient", side_effect=InvalidAuth)
+    with login, installations:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=MOCK_CONFIG
+        )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "cloud"
+    assert result["errors"] == {"base": "invalid_auth"}
 
 
-# In this case, we want to simulate a failure during the config flow.
-# We use the `error_on_get_data` mock instead of `bypass_get_data`
-# (note the function parameters) to raise an Exception during
-# validation of the input config.
-async def test_failed_config_flow(hass, error_on_get_data):
-    """Test a failed config flow due to credential validation failure."""
-    result = await hass.config_entries.flow.async_init(
-        DOMAIN, context={"source": config_entries.SOURCE_USER}
+async def test_local_config_flow(hass):
+    """Test a config flow over the local API of a gateway."""
+    result = await start_flow(hass, TRANSPORT_LOCAL)
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "local"
+
+    login, installations = mock_client(
+        "OpenMoticsGatewayClient", [{"id": GATEWAY[CONF_HOST], "name": "Gateway"}]
     )
+    with login, installations:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=GATEWAY
+        )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "select_installation"
 
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], user_input={CONF_INSTALLATION_ID: GATEWAY[CONF_HOST]}
+    )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert result["title"] == f"{GATEWAY[CONF_HOST]}-{GATEWAY[CONF_HOST]}"
+    assert result["data"] == {
+        CONF_TRANSPORT: TRANSPORT_LOCAL,
+        **GATEWAY,
+        CONF_PORT: DEFAULT_GATEWAY_PORT,
+        CONF_VERIFY_SSL: DEFAULT_VERIFY_SSL,
+        CONF_INSTALLATION_ID: GATEWAY[CONF_HOST],
+    }
+
+
+async def test_local_config_flow_cannot_connect(hass):
+    """Test the gateway form is shown again when the gateway is unreachable."""
+    result = await start_flow(hass, TRANSPORT_LOCAL)
+
+    login, installations = mock_client(
+        "OpenMoticsGatewayClient", side_effect=CannotConnect
+    )
+    with login, installations:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=GATEWAY
+        )
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
-    assert result["step_id"] == "user"
+    assert result["step_id"] == "local"
+    assert result["errors"] == {"base": "cannot_connect"}
+
+
+async def test_hybrid_config_flow(hass):
+    """Test a config flow over the cloud and the local API of the gateway."""
+    result = await start_flow(hass, TRANSPORT_HYBRID)
+    assert result["step_id"] == "cloud"
 
+    login, installations = mock_client("OpenMoticsApiClient", INSTALLATIONS)
+    with login, installations:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=MOCK_CONFIG
+        )
     result = await hass.config_entries.flow.async_configure(
-        result["flow_id"], user_input=MOCK_CONFIG
+        result["flow_id"], user_input={CONF_INSTALLATION_ID: 1}
     )
+    # The installation is selected in the cloud, then the gateway is asked for
+    assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
+    assert result["step_id"] == "local"
 
+    # The gateway is unreachable at first
+    login, installations = mock_client(
+        "OpenMoticsGatewayClient", side_effect=CannotConnect
+    )
+    with login, installations:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=GATEWAY
+        )
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
-    assert result["errors"] == {"base": "auth"}
+    assert result["step_id"] == "local"
+    assert result["errors"] == {"base": "cannot_connect"}
+
+    login, installations = mock_client("OpenMoticsGatewayClient")
+    with login, installations as get_installations:
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], user_input=GATEWAY
+        )
+    # The gateway only has to accept the login
+    get_installations.assert_not_called()
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert result["title"] == f"{DEFAULT_HOST}-1"
+    assert result["data"] == {
+        CONF_TRANSPORT: TRANSPORT_HYBRID,
+        **MOCK_CONFIG,
+        CONF_HOST: DEFAULT_HOST,
+        CONF_PORT: DEFAULT_PORT,
+        CONF_VERIFY_SSL: DEFAULT_VERIFY_SSL,
+        CONF_GATEWAY: {
+            **GATEWAY,
+            CONF_PORT: DEFAULT_GATEWAY_PORT,
+            CONF_VERIFY_SSL: DEFAULT_VERIFY_SSL,
+        },
+        CONF_INSTALLATION_ID: 1,
+    }
 
 
 # Our config flow also has an options flow, so we must test it as well.
@@ -96,23 +221,35 @@ async def test_options_flow(hass):
     # flow entirely)
     entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
     entry.add_to_hass(hass)
+    # The setup of the entry is bypassed, but it loads the integration
+    await hass.config_entries.async_setup(entry.entry_id)
 
     # Initialize an options flow
     result = await hass.config_entries.options.async_init(entry.entry_id)
 
-    # Verify that the first options step is a user form
+    # Verify that the first options step is a form
     assert result["type"] == data_entry_flow.RESULT_TYPE_FORM
-    assert result["step_id"] == "user"
+    assert result["step_id"] == "init"
 
     # Enter some fake data into the form
     result = await hass.config_entries.options.async_configure(
         result["flow_id"],
-        user_input={platform: platform != SENSOR for platform in PLATFORMS},
+        user_input={
+            CONF_SCAN_INTERVAL: 10,
+            CONF_MAX_SCAN_INTERVAL: 600,
+            CONF_VERIFY_DELAY: 1,
+        },
     )
 
     # Verify that the flow finishes
     assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
-    assert result["title"] == "test_username"
 
     # Verify that the options were updated
-    assert entry.options == {BINARY_SENSOR: True, SENSOR: False, SWITCH: True}
+    assert entry.options == {
+        CONF_SCAN_INTERVAL: 10,
+        CONF_MAX_SCAN_INTERVAL: 600,
+        CONF_VERIFY_DELAY: 1.0,
+        CONF_STALENESS_BUDGET: 900,
+        CONF_SENSOR_SCAN_INTERVAL: 15,
+        CONF_SENSOR_PRECISION: 0.1,
+    }
@@ -0,0 +1,377 @@
+"""Test the OpenMotics data update coordinator."""
+import asyncio
+import copy
+from datetime import timedelta
+import json
+from unittest.mock import patch
+
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.openmotics.cache import SAVE_DELAY, from_cache, to_cache
+from custom_components.openmotics.const import (
+    CONF_INSTALLATION_ID,
+    CONF_STALENESS_BUDGET,
+    CONF_VERIFY_DELAY,
+    DOMAIN,
+)
+from custom_components.openmotics.coordinator import (
+    AdaptivePollInterval,
+    OpenMoticsDataUpdateCoordinator,
+    changed_devices,
+)
+from custom_components.openmotics.exceptions import CannotConnect
+from custom_components.openmotics.models import index_models
+
+from .const import MOCK_CONFIG
+
+OUTPUTS = [
+    {"id": 10, "local_id": 0, "name": "Kitchen", "status": {"on": True}},
+    {"id": 11, "local_id": 1, "name": "Hall", "status": {"on": False}},
+]
+
+
+def test_changed_devices():
+    """Test only the devices that differ between snapshots are reported."""
+    old = {"outputs": {0: {"on": True}, 1: {"on": False}}, "shutters": {}}
+    assert changed_devices(None, old) == {("outputs", 0), ("outputs", 1)}
+
+    new = {"outputs": {0: {"on": True}, 1: {"on": True}, 2: None}, "shutters": {}}
+    assert changed_devices(old, new) == {("outputs", 1), ("outputs", 2)}
+    assert changed_devices(new, new) == set()
+
+    # Devices that disappear are reported as well
+    assert changed_devices(new, {"outputs": {}, "shutters": {}}) == {
+        ("outputs", 0),
+        ("outputs", 1),
+        ("outputs", 2),
+    }
+
+
+def mock_status(outputs=OUTPUTS):
+    """Patch the status api to return a fresh copy of the output statuses."""
+    return patch(
+        "custom_components.openmotics.coordinator.OpenMoticsApiClient.get_status",
+        side_effect=lambda installation_id: {
+            "outputs": {
+                output["local_id"]: copy.deepcopy(output["status"])
+                for output in outputs
+            },
+            "shutters": {},
+            "sensors": {},
+        },
+    )
+
+
+def create_coordinator(hass, options=None):
+    """Create a coordinator for a mock config entry with known outputs."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={**MOCK_CONFIG, CONF_INSTALLATION_ID: 1},
+        options=options or {},
+    )
+    coordinator = OpenMoticsDataUpdateCoordinator(hass, entry)
+    coordinator.configuration["outputs"] = index_models(OUTPUTS)
+    coordinator.async_start_updates()
+    return coordinator
+
+
+async def test_optimistic_verification(hass):
+    """Test a burst of commands is verified with one refresh and rolled back."""
+    coordinator = create_coordinator(hass, {CONF_VERIFY_DELAY: 1})
+    with mock_status() as get_status:
+        await coordinator.async_refresh()
+        updates = []
+        coordinator.async_add_device_listener("outputs", 1, lambda: updates.append(1))
+
+        coordinator.async_set_optimistic("outputs", 0, {"on": True})
+        coordinator.async_set_optimistic("outputs", 1, {"on": True})
+        assert coordinator.get_status("outputs", 1) == {"on": True}
+        assert updates == [1]
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+        await hass.async_block_till_done()
+
+    # One verification refresh for both commands
+    assert get_status.call_count == 2
+    # Output 1 did not turn on, so its optimistic state is rolled back
+    assert coordinator.rollbacks == 1
+    assert coordinator.get_status("outputs", 1) == {"on": False}
+    assert updates == [1, 1]
+
+
+async def test_keep_last_good_status(hass):
+    """Test a failed refresh keeps the status until the staleness budget."""
+    coordinator = create_coordinator(hass, {CONF_STALENESS_BUDGET: 60})
+    with mock_status():
+        await coordinator.async_refresh()
+    updates = []
+    coordinator.async_add_device_listener("outputs", 0, lambda: updates.append(0))
+
+    with patch(
+        "custom_components.openmotics.coordinator.OpenMoticsApiClient.get_status",
+        side_effect=CannotConnect,
+    ):
+        await coordinator.async_refresh()
+        assert not coordinator.last_update_success
+        assert coordinator.get_status("outputs", 0) == {"on": True}
+        assert not coordinator.is_expired("outputs", 0)
+        assert updates == []
+
+        # Only the devices that exceed the budget expire, also when the
+        # coordinator listeners are not called after repeated failures
+        coordinator.updated_at[("outputs", 0)] -= 61
+        coordinator._dispatch_unsub()  # pylint: disable=protected-access
+        coordinator._dispatch_unsub = None  # pylint: disable=protected-access
+        await coordinator.async_refresh()
+        assert updates == [0]
+        coordinator.async_start_updates()
+        await coordinator.async_refresh()
+        assert coordinator.is_expired("outputs", 0)
+        assert not coordinator.is_expired("outputs", 1)
+        assert updates == [0]
+
+    with mock_status():
+        await coordinator.async_refresh()
+    assert not coordinator.is_expired("outputs", 0)
+    assert updates == [0, 0]
+
+
+async def test_device_availability(hass):
+    """Test the availability follows the status of every device."""
+    coordinator = create_coordinator(hass)
+    outputs = copy.deepcopy(OUTPUTS)
+    updates = []
+    with mock_status(outputs):
+        await coordinator.async_refresh()
+        coordinator.async_add_device_listener("outputs", 0, lambda: updates.append(0))
+        coordinator.async_add_device_listener("outputs", 1, lambda: updates.append(1))
+        assert coordinator.is_available("outputs", 0)
+
+        # The module of output 0 went offline, output 1 is not touched
+        outputs[0]["status"] = {"on": True, "online": False}
+        await coordinator.async_refresh()
+        assert not coordinator.is_available("outputs", 0)
+        assert coordinator.is_available("outputs", 1)
+        assert coordinator.unavailable_devices == {("outputs", 0): "offline"}
+        assert updates == [0]
+
+        # A configured device missing from the status is unavailable
+        del outputs[1]
+        await coordinator.async_refresh()
+        assert coordinator.unavailable_devices[("outputs", 1)] == "missing"
+        assert updates == [0, 1]
+
+        outputs[0]["status"] = {"on": True}
+        await coordinator.async_refresh()
+    assert coordinator.is_available("outputs", 0)
+    assert updates == [0, 1, 0]
+
+
+def test_adaptive_poll_interval():
+    """Test the interval backs off while idle and resets on activity."""
+    interval = AdaptivePollInterval(
+        timedelta(seconds=30), timedelta(seconds=100), backoff=2
+    )
+    assert [interval.next().total_seconds() for _ in range(4)] == [60, 100, 100, 100]
+
+    interval.activity()
+    assert interval.interval == timedelta(seconds=30)
+    # The interval stays at the minimum while the installation is active
+    assert interval.next() == timedelta(seconds=30)
+
+
+def test_cache_round_trip():
+    """Test the configuration and status survive the JSON cache."""
+    configuration = {"outputs": index_models(OUTPUTS)}
+    data = {"outputs": {0: {"on": True}, 1: None}}
+    cache = json.loads(json.dumps(to_cache(configuration, data)))
+
+    cached_configuration, cached_data = from_cache(cache)
+    assert cached_configuration["outputs"] == configuration["outputs"]
+    assert cached_configuration["shutters"] == {}
+    assert cached_data["outputs"] == {0: {"on": True}, 1: None}
+
+
+async def test_refresh_sensors(hass):
+    """Test the sensor poll only notifies the sensors that changed."""
+    coordinator = create_coordinator(hass)
+    with mock_status():
+        await coordinator.async_refresh()
+    coordinator.data["sensors"] = {0: {"value": 21.0}, 1: {"value": 40}}
+    updates = []
+    coordinator.async_add_device_listener("sensors", 0, lambda: updates.append(0))
+    coordinator.async_add_device_listener("sensors", 1, lambda: updates.append(1))
+
+    with patch(
+        "custom_components.openmotics.coordinator.OpenMoticsApiClient.get_sensor_status",
+        return_value={0: {"value": 21.5}, 1: {"value": 40}, 2: {"value": 1}},
+    ) as get_sensor_status:
+        await coordinator.async_refresh_sensors()
+    get_sensor_status.assert_called_once_with(1)
+    assert coordinator.get_status("sensors", 0) == {"value": 21.5}
+    assert ("sensors", 1) in coordinator.updated_at
+    # Unknown sensors are left to the full poll
+    assert coordinator.get_status("sensors", 2) is None
+    assert updates == [0]
+
+
+async def test_shutter_commands(hass):
+    """Test the shutters of a group are moved at once and reconciled once."""
+    coordinator = create_coordinator(hass, {CONF_VERIFY_DELAY: 1})
+    with mock_status() as get_status:
+        await coordinator.async_refresh()
+        coordinator.data["shutters"] = {
+            shutter_id: {"state": "UP"} for shutter_id in range(3)
+        }
+
+        async def shutter_down(installation_id, shutter_id):
+            if shutter_id == 2:
+                raise CannotConnect
+            return None
+
+        with patch(
+            "custom_components.openmotics.coordinator.OpenMoticsApiClient.shutter_down",
+            side_effect=shutter_down,
+        ) as down:
+            # Home Assistant calls the entities of a group concurrently
+            results = await asyncio.gather(
+                *(
+                    coordinator.async_shutter_command(shutter_id, "down")
+                    for shutter_id in range(3)
+                ),
+                return_exceptions=True,
+            )
+        assert down.call_count == 3
+        assert results[0] is None
+        assert isinstance(results[2], CannotConnect)
+        assert coordinator.get_status("shutters", 0) == {"state": "GOING_DOWN"}
+        assert coordinator.get_status("shutters", 2) == {"state": "UP"}
+        # The commands were sent as one batch
+        assert coordinator.commands.batches_sent == 1
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+        await hass.async_block_till_done()
+    # A single refresh reconciles all shutters
+    assert get_status.call_count == 2
+
+
+async def test_suppress_known_state(hass):
+    """Test a command for the state an output is in already is not sent."""
+    coordinator = create_coordinator(hass)
+    with mock_status():
+        await coordinator.async_refresh()
+    with patch(
+        "custom_components.openmotics.coordinator.OpenMoticsApiClient.output_turn_on",
+        return_value=None,
+    ) as turn_on:
+        # Output 0 is on, output 1 is off
+        await coordinator.async_output_turn_on(0)
+        await coordinator.async_output_turn_on(1)
+    assert turn_on.call_count == 1
+    assert coordinator.suppressed_commands == 1
+
+
+async def test_trigger_group_action(hass):
+    """Test a group action shows its predicted result and is verified once."""
+    coordinator = create_coordinator(hass, {CONF_VERIFY_DELAY: 1})
+    coordinator.configuration["groupactions"] = index_models(
+        [{"id": 13, "local_id": 3, "name": "Night", "actions": "161,1,162,0,101,0"}]
+    )
+    with mock_status() as get_status:
+        await coordinator.async_refresh()
+        coordinator.data["shutters"] = {0: {"state": "UP"}}
+        updates = []
+        for key in (("outputs", 0), ("outputs", 1), ("shutters", 0)):
+            coordinator.async_add_device_listener(
+                *key, lambda key=key: updates.append(key)
+            )
+
+        with patch(
+            "custom_components.openmotics.coordinator.OpenMoticsApiClient.groupaction_trigger",
+            return_value=None,
+        ) as trigger:
+            await coordinator.async_trigger_group_action(3)
+        trigger.assert_called_once_with(1, 3)
+        # Output 1 turns on, output 0 is toggled off and shutter 0 goes down
+        assert coordinator.get_status("outputs", 0) == {"on": False}
+        assert coordinator.get_status("outputs", 1) == {"on": True}
+        assert coordinator.get_status("shutters", 0) == {"state": "GOING_DOWN"}
+        assert len(updates) == 3
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=2))
+        await hass.async_block_till_done()
+    # A single refresh reconciles the predicted devices
+    assert get_status.call_count == 2
+
+
+async def test_unload_stops_polling(hass):
+    """Test an unloaded coordinator does not poll anymore."""
+    coordinator = create_coordinator(hass)
+    with mock_status() as get_status:
+        await coordinator.async_refresh()
+        await coordinator.async_unload()
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(minutes=10))
+        await hass.async_block_till_done()
+    assert get_status.call_count == 1
+
+
+async def test_configuration_change_saves_cache(hass, hass_storage):
+    """Test a changed configuration is cached before the entry reloads."""
+    coordinator = create_coordinator(hass)
+    with mock_status():
+        await coordinator.async_refresh()
+    added = {"id": 12, "local_id": 2, "name": "Garage", "status": {"on": False}}
+
+    with patch(
+        "custom_components.openmotics.coordinator.OpenMoticsApiClient.get_configuration",
+        return_value={"outputs": [*OUTPUTS, added]},
+    ), patch.object(hass.config_entries, "async_reload") as reload:
+        await coordinator.async_refresh_configuration()
+        # The reloaded entry reads the new configuration from the cache
+        cache = hass_storage[f"{DOMAIN}.{coordinator.entry.entry_id}"]["data"]
+        assert len(cache["configuration"]["outputs"]) == 3
+        await hass.async_block_till_done()
+    reload.assert_called_once_with(coordinator.entry.entry_id)
+
+
+async def test_frequent_refreshes_save_cache(hass, hass_storage):
+    """Test the cache is written within the save delay while polling faster."""
+    coordinator = create_coordinator(hass)
+    key = f"{DOMAIN}.{coordinator.entry.entry_id}"
+    start = dt_util.utcnow()
+    with mock_status():
+        for elapsed in range(0, SAVE_DELAY, 20):
+            async_fire_time_changed(hass, start + timedelta(seconds=elapsed))
+            await coordinator.async_refresh()
+            await hass.async_block_till_done()
+        assert key not in hass_storage
+
+        async_fire_time_changed(hass, start + timedelta(seconds=SAVE_DELAY + 1))
+        await hass.async_block_till_done()
+    assert len(hass_storage[key]["data"]["configuration"]["outputs"]) == 2
+    await coordinator.async_unload()
+
+
+async def test_sensor_changes_are_no_activity(hass):
+    """Test drifting sensors do not keep the poll interval at its minimum."""
+    coordinator = create_coordinator(hass)
+    with mock_status():
+        await coordinator.async_refresh()
+    coordinator.poll_interval.interval = coordinator.poll_interval.maximum
+    coordinator.poll_interval._last_activity = None  # pylint: disable=protected-access
+
+    with patch(
+        "custom_components.openmotics.coordinator.OpenMoticsApiClient.get_status",
+        return_value={
+            "outputs": {0: {"on": True}, 1: {"on": False}},
+            "shutters": {},
+            "sensors": {0: {"value": 21.5}},
+        },
+    ):
+        await coordinator.async_refresh()
+    assert coordinator.update_interval == coordinator.poll_interval.maximum
@@ -0,0 +1,41 @@
+"""Test the position of the OpenMotics shutters."""
+from custom_components.openmotics.cover import (
+    DIRECTION_DOWN,
+    DIRECTION_UP,
+    ShutterPosition,
+)
+
+
+def test_shutter_position():
+    """Test the position is interpolated from the travel times."""
+    position = ShutterPosition(travel_up=20, travel_down=10)
+    assert position.can_estimate
+    assert position.current() is None
+
+    # The position is only known after a full travel
+    position.start(DIRECTION_DOWN, now=0)
+    assert position.current(now=5) is None
+    assert position.current(now=10) == 0
+    position.stop(now=10)
+
+    position.start(DIRECTION_UP, now=100)
+    assert position.current(now=105) == 25
+    assert position.current(now=200) == 100
+    position.stop(now=110)
+    assert position.current() == 50
+    assert position.direction == 0
+
+    # Closing is faster than opening
+    assert position.time_to(75) == 5
+    assert position.time_to(25) == 2.5
+
+
+def test_shutter_position_unknown_travel():
+    """Test a shutter without travel times only knows its ends."""
+    position = ShutterPosition(travel_up=None, travel_down=None)
+    assert not position.can_estimate
+    position.start(DIRECTION_UP, now=0)
+    assert position.current(now=1000) is None
+    position.stop(100)
+    assert position.current() == 100
+    assert position.time_to(50) is None
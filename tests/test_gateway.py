@@ -0,0 +1,132 @@
+"""Test the local gateway client against a stub gateway."""
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.openmotics.exceptions import InvalidAuth
+from custom_components.openmotics.gateway import (
+    OpenMoticsGatewayClient,
+    create_gateway_session,
+)
+
+RESPONSES = {
+    "/get_version": {"version": "3.143.79", "gateway": "2.20.2"},
+    "/get_output_configurations": {
+        "config": [
+            {"id": 0, "name": "Kitchen", "module_type": "D", "type": 255, "room": 2},
+            {"id": 1, "name": "Plug", "module_type": "O", "type": 0, "room": 255},
+        ]
+    },
+    "/get_shutter_configurations": {"config": [{"id": 0, "name": "Bedroom"}]},
+    "/get_group_action_configurations": {"config": [{"id": 3, "name": "Night"}]},
+    "/get_sensor_configurations": {"config": [{"id": 0, "name": "Living"}]},
+    "/get_output_status": {
+        "status": [{"id": 0, "status": 1, "dimmer": 40}, {"id": 1, "status": 0}]
+    },
+    "/get_shutter_status": {"detail": {"0": {"state": "going_up", "position": 10}}},
+    "/get_sensor_temperature_status": {"status": [21.5]},
+    "/get_sensor_humidity_status": {"status": [None]},
+    "/get_sensor_brightness_status": {"status": [80]},
+    "/set_output": {},
+}
+
+
+@pytest.fixture
+async def gateway(loop):
+    """Run a stub gateway and return its requests."""
+    requests = []
+    tokens = iter(["abc", "def"])
+
+    async def login(request):
+        data = await request.post()
+        if data["password"] != "secret":
+            return web.json_response({"success": False, "msg": "invalid"}, status=401)
+        return web.json_response({"success": True, "token": next(tokens)})
+
+    async def handler(request):
+        data = dict(await request.post())
+        requests.append((request.path, data))
+        if data.pop("token") == "expired":
+            return web.json_response({"success": False, "msg": "invalid_token"})
+        return web.json_response({"success": True, **RESPONSES[request.path]})
+
+    app = web.Application()
+    app.router.add_post("/login", login)
+    app.router.add_post("/{path}", handler)
+    async with TestServer(app) as server:
+        session = create_gateway_session(False)
+        api = OpenMoticsGatewayClient(
+            session, "user", "secret", server.host, server.port, use_ssl=False
+        )
+        yield api, requests
+        api.close()
+        await session.close()
+
+
+async def test_gateway_client(gateway):
+    """Test the gateway records are translated to the cloud format."""
+    api, requests = gateway
+
+    installation = await api.get_installation("gw")
+    assert installation["id"] == "gw"
+    assert installation["version"] == "2.20.2"
+
+    configuration = await api.get_configuration("gw")
+    assert configuration["outputs"][0] == {
+        "id": 0,
+        "local_id": 0,
+        "name": "Kitchen",
+        "type": "LIGHT",
+        "capabilities": ["ON_OFF", "RANGE"],
+        "location": {"room_id": 2},
+    }
+    assert configuration["outputs"][1]["type"] == "OUTLET"
+    assert configuration["outputs"][1]["location"] == {}
+    assert configuration["groupactions"][0]["local_id"] == 3
+    # A sensor measures every quantity it has a value for
+    assert configuration["sensors"][0]["physical_quantities"] == [
+        "temperature",
+        "brightness",
+    ]
+    assert configuration["sensors"][0]["physical_quantity"] == "temperature"
+
+    status = await api.get_status("gw")
+    assert status["outputs"] == {
+        0: {"on": True, "value": 40},
+        1: {"on": False, "value": None},
+    }
+    assert status["shutters"] == {0: {"state": "GOING_UP", "position": 10}}
+    assert status["sensors"] == {0: {"temperature": 21.5, "brightness": 80}}
+
+    assert await api.output_turn_on("gw", 0, 60) == {"value": 60}
+    assert requests[-1] == ("/set_output", {"id": "0", "is_on": "true", "dimmer": "60"})
+
+    # The token is reused for all requests
+    assert api.tokens.logins == 1
+
+
+async def test_gateway_token_rejected(gateway):
+    """Test a rejected token is replaced and the request retried."""
+    api, requests = gateway
+    api.tokens._token = "expired"  # pylint: disable=protected-access
+    api.tokens._expires_at = float("inf")  # pylint: disable=protected-access
+
+    await api.output_turn_off("gw", 1)
+    assert len(requests) == 2
+    assert api.token == "abc"
+
+
+async def test_gateway_invalid_auth():
+    """Test a refused login raises InvalidAuth."""
+    app = web.Application()
+    app.router.add_post(
+        "/login", lambda request: web.json_response({"success": False}, status=401)
+    )
+    async with TestServer(app) as server:
+        session = create_gateway_session(False)
+        api = OpenMoticsGatewayClient(
+            session, "user", "wrong", server.host, server.port, use_ssl=False
+        )
+        with pytest.raises(InvalidAuth):
+            await api.get_token()
+        await session.close()
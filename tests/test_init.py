@@ -1,56 +1,166 @@
-"""Test integration_blueprint setup process."""
-from homeassistant.exceptions import ConfigEntryNotReady
+"""Test the setup of the OpenMotics integration."""
+from unittest.mock import patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.helpers import device_registry as dr, entity_registry as er
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.integration_blueprint import (
-    BlueprintDataUpdateCoordinator,
-    async_reload_entry,
-    async_setup_entry,
-    async_unload_entry,
-)
-from custom_components.integration_blueprint.const import DOMAIN
+from custom_components.openmotics.const import CONF_INSTALLATION_ID, DOMAIN
+from custom_components.openmotics.exceptions import CannotConnect
 
 from .const import MOCK_CONFIG
 
+API = "custom_components.openmotics.coordinator.OpenMoticsApiClient"
 
-# We can pass fixtures as defined in conftest.py to tell pytest to use the fixture
-# for a given test. We can also leverage fixtures and mocks that are available in
-# Home Assistant using the pytest_homeassistant_custom_component plugin.
-# Assertions allow you to verify that the return value of whatever is on the left
-# side of the assertion matches with the right side.
-async def test_setup_unload_and_reload_entry(hass, bypass_get_data):
-    """Test entry setup and unload."""
-    # Create a mock entry so we don't have to go through config flow
-    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
-
-    # Set up the entry and assert that the values set during setup are where we expect
-    # them to be. Because we have patched the BlueprintDataUpdateCoordinator.async_get_data
-    # call, no code from custom_components/integration_blueprint/api.py actually runs.
-    assert await async_setup_entry(hass, config_entry)
-    assert DOMAIN in hass.data and config_entry.entry_id in hass.data[DOMAIN]
-    assert (
-        type(hass.data[DOMAIN][config_entry.entry_id]) == BlueprintDataUpdateCoordinator
+INSTALLATION = {"id": 1, "name": "Home"}
+CONFIGURATION = {
+    "outputs": [
+        {"id": 10, "local_id": 0, "name": "Kitchen", "type": "LIGHT"},
+        {"id": 11, "local_id": 1, "name": "Plug", "type": "OUTLET"},
+    ],
+    "shutters": [],
+    "groupactions": [],
+    "sensors": [
+        {"id": 20, "local_id": 0, "name": "Living", "physical_quantity": "temperature"},
+        # A sensor of the gateway that measures several quantities
+        {
+            "id": 1,
+            "local_id": 1,
+            "name": "Hall",
+            "physical_quantity": "temperature",
+            "physical_quantities": ["temperature", "brightness"],
+        },
+    ],
+}
+STATUS = {
+    "outputs": {0: {"on": True}, 1: {"on": False}},
+    "shutters": {},
+    "sensors": {0: {"value": 21.5}, 1: {"temperature": 19.0, "brightness": 80}},
+}
+
+
+@pytest.fixture(name="api_calls")
+def api_calls_fixture():
+    """Patch the cloud api and return the calls, in the order they were made."""
+    calls = []
+
+    def record(name, result):
+        async def call(*args):
+            calls.append(name)
+            return result
+
+        return call
+
+    with patch(f"{API}.get_token", side_effect=record("login", "abc")), patch(
+        f"{API}.get_installation", side_effect=record("installation", INSTALLATION)
+    ), patch(
+        f"{API}.get_configuration", side_effect=record("configuration", CONFIGURATION)
+    ), patch(
+        f"{API}.get_status", side_effect=record("status", STATUS)
+    ), patch(
+        "custom_components.openmotics.coordinator."
+        "OpenMoticsDataUpdateCoordinator.async_start_events"
+    ):
+        yield calls
+
+
+def create_entry(hass, version=2):
+    """Add a mock config entry for installation 1."""
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={**MOCK_CONFIG, CONF_INSTALLATION_ID: 1}, version=version
     )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def test_setup_and_unload_entry(hass, api_calls):
+    """Test the setup logs in once, then fetches everything concurrently."""
+    entry = create_entry(hass)
+    with patch(
+        "custom_components.openmotics.async_setup_openmotics_installation",
+        return_value=True,
+    ) as setup_installation:
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
 
-    # Reload the entry and assert that the data from above is still there
-    assert await async_reload_entry(hass, config_entry) is None
-    assert DOMAIN in hass.data and config_entry.entry_id in hass.data[DOMAIN]
+    assert entry.state is ConfigEntryState.LOADED
+    # A single login, before the fetches that use its token
+    assert api_calls[0] == "login"
+    assert sorted(api_calls) == ["configuration", "installation", "login", "status"]
+    setup_installation.assert_called_once_with(hass, entry, INSTALLATION)
+
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    assert set(coordinator.setup_timings) == {
+        "login",
+        "installation",
+        "configuration",
+        "status",
+        "total",
+    }
+    assert coordinator.get_status("outputs", 0) == {"on": True}
+    assert hass.states.get("light.kitchen").state == "on"
+    assert hass.states.get("sensor.living_temperature").state == "21.5"
+    # An entity per quantity of the gateway sensor
+    assert hass.states.get("sensor.hall_temperature").state == "19.0"
+    illuminance = hass.states.get("sensor.hall_illuminance")
+    assert illuminance.state == "80"
+    assert "device_class" not in illuminance.attributes
+    # Output 0 and sensor 0 are different devices
+    registry = er.async_get(hass)
     assert (
-        type(hass.data[DOMAIN][config_entry.entry_id]) == BlueprintDataUpdateCoordinator
+        registry.async_get("light.kitchen").device_id
+        != registry.async_get("sensor.living_temperature").device_id
     )
 
-    # Unload the entry and verify that the data has been removed
-    assert await async_unload_entry(hass, config_entry)
-    assert config_entry.entry_id not in hass.data[DOMAIN]
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.NOT_LOADED
+    assert entry.entry_id not in hass.data.get(DOMAIN, {})
+
+
+async def test_setup_entry_not_ready(hass, api_calls):
+    """Test the entry is retried when the api cannot be reached."""
+    entry = create_entry(hass)
+    with patch(f"{API}.get_token", side_effect=CannotConnect):
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    # Nothing is fetched without a token
+    assert api_calls == []
+
 
+async def test_migrate_device_identifiers(hass, api_calls):
+    """Test the devices identified by local id alone get their category."""
+    entry = create_entry(hass, version=1)
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+    # Output 0 and shutter 0 shared a device
+    shared = device_registry.async_get_or_create(
+        config_entry_id=entry.entry_id, identifiers={(DOMAIN, "1-0")}
+    )
+    light = entity_registry.async_get_or_create(
+        "light", DOMAIN, "1-0", config_entry=entry, device_id=shared.id
+    )
+    entity_registry.async_get_or_create(
+        "cover", DOMAIN, "1-0", config_entry=entry, device_id=shared.id
+    )
+    plug = device_registry.async_get_or_create(
+        config_entry_id=entry.entry_id, identifiers={(DOMAIN, "1-1")}
+    )
+    switch = entity_registry.async_get_or_create(
+        "switch", DOMAIN, "1-1", config_entry=entry, device_id=plug.id
+    )
 
-async def test_setup_entry_exception(hass, error_on_get_data):
-    """Test ConfigEntryNotReady when API raises an exception during entry setup."""
-    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
 
-    # In this case we are testing the condition where async_setup_entry raises
-    # ConfigEntryNotReady using the `error_on_get_data` fixture which simulates
-    # an error.
-    with pytest.raises(ConfigEntryNotReady):
-        assert await async_setup_entry(hass, config_entry)
+    assert entry.version == 2
+    assert device_registry.async_get(shared.id).identifiers == {
+        (DOMAIN, "1-outputs-0")
+    }
+    assert device_registry.async_get(plug.id).identifiers == {(DOMAIN, "1-outputs-1")}
+    # The light and the plug keep their devices
+    assert entity_registry.async_get(light.entity_id).device_id == shared.id
+    assert entity_registry.async_get(switch.entity_id).device_id == plug.id
@@ -0,0 +1,148 @@
+"""Test the OpenMotics lights."""
+import asyncio
+from unittest.mock import AsyncMock, Mock, call, patch
+
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_TRANSITION
+
+from custom_components.openmotics.light import (
+    BRIGHTNESS_TO_PERCENTAGE,
+    MIN_STEP_INTERVAL,
+    PERCENTAGE_TO_BRIGHTNESS,
+    OpenMoticsOutputLight,
+    brightness_from_percentage,
+    step_interval,
+)
+from custom_components.openmotics.models import DeviceModel
+
+from .test_coordinator import create_coordinator, mock_status
+
+API = "custom_components.openmotics.coordinator.OpenMoticsApiClient"
+
+
+def create_light(hass, latency=None):
+    """Create a dimmable light with a mock coordinator."""
+    coordinator = Mock(install_id=1, commands=Mock(latency=latency))
+    coordinator.async_output_turn_on = AsyncMock(return_value=None)
+    coordinator.async_output_turn_off = AsyncMock(return_value=None)
+    light = OpenMoticsOutputLight(
+        coordinator, DeviceModel(0, 10, "Kitchen", "LIGHT", ["ON_OFF", "RANGE"])
+    )
+    light.hass = hass
+    return light, coordinator
+
+
+def test_brightness_round_trip():
+    """Test the brightness conversions are stable in both directions."""
+    for percent in range(101):
+        assert BRIGHTNESS_TO_PERCENTAGE[PERCENTAGE_TO_BRIGHTNESS[percent]] == percent
+    # A low brightness does not turn the light off
+    assert BRIGHTNESS_TO_PERCENTAGE[1] == 1
+    assert BRIGHTNESS_TO_PERCENTAGE[0] == 0
+    # The brightness set in Home Assistant survives the refresh
+    percent = BRIGHTNESS_TO_PERCENTAGE[100]
+    assert PERCENTAGE_TO_BRIGHTNESS[percent] != 100
+    assert brightness_from_percentage(percent, 100) == 100
+    assert brightness_from_percentage(percent + 1, 100) == PERCENTAGE_TO_BRIGHTNESS[
+        percent + 1
+    ]
+
+
+def test_step_interval():
+    """Test the steps of a transition slow down with the command latency."""
+    assert step_interval(None) == MIN_STEP_INTERVAL
+    assert step_interval(0.01) == MIN_STEP_INTERVAL
+    assert step_interval(0.5) == 1.0
+
+
+async def test_light_transition(hass):
+    """Test a transition steps the brightness up to the target."""
+    light, coordinator = create_light(hass)
+    with patch.object(light, "async_write_ha_state"):
+        await light.async_turn_on(**{ATTR_BRIGHTNESS: 255, ATTR_TRANSITION: 1})
+        await hass.async_block_till_done()
+
+    values = [call.args[1] for call in coordinator.async_output_turn_on.call_args_list]
+    assert values == sorted(values)
+    assert values[-1] == 100
+    # A few steps, not one per percent
+    assert 2 < len(values) <= 6
+    # Every step is known to the coordinator, the last one is the target
+    assert coordinator.async_set_optimistic.call_count == len(values)
+    assert coordinator.async_set_optimistic.call_args == call(
+        "outputs", 0, {"on": True, "value": 100}
+    )
+
+
+async def test_light_transition_cancelled(hass):
+    """Test a newer command cancels the pending steps of a transition."""
+    light, coordinator = create_light(hass)
+    with patch.object(light, "async_write_ha_state"):
+        await light.async_turn_on(**{ATTR_BRIGHTNESS: 255, ATTR_TRANSITION: 10})
+        await light.async_turn_off()
+        await hass.async_block_till_done()
+
+    coordinator.async_output_turn_off.assert_called_once_with(0)
+    assert coordinator.async_set_optimistic.call_args == call(
+        "outputs", 0, {"on": False}
+    )
+
+
+async def test_turn_off_during_transition(hass):
+    """Test a light fading in from off can be turned off halfway."""
+    coordinator = create_coordinator(hass)
+    with mock_status():
+        await coordinator.async_refresh()
+    # Output 1 is off
+    light = OpenMoticsOutputLight(
+        coordinator, DeviceModel(1, 11, "Hall", "LIGHT", ["ON_OFF", "RANGE"])
+    )
+    light.hass = hass
+    with patch(f"{API}.output_turn_on", return_value=None) as turn_on, patch(
+        f"{API}.output_turn_off", return_value=None
+    ) as turn_off, patch.object(light, "async_write_ha_state"):
+        await light.async_turn_on(**{ATTR_BRIGHTNESS: 255, ATTR_TRANSITION: 10})
+        # Let the first steps go out
+        await asyncio.sleep(1)
+        assert turn_on.call_count >= 1
+        assert coordinator.get_status("outputs", 1)["on"] is True
+
+        await light.async_turn_off()
+        await hass.async_block_till_done()
+    # The off command is sent, not taken for a no-op
+    turn_off.assert_called_once_with(1, 1)
+    assert coordinator.suppressed_commands == 0
+    assert coordinator.get_status("outputs", 1)["on"] is False
+    await coordinator.async_unload()
+
+
+async def test_turn_off_after_step_in_flight(hass):
+    """Test the step a transition is sending does not land after a newer command."""
+    coordinator = create_coordinator(hass)
+    with mock_status():
+        await coordinator.async_refresh()
+    light = OpenMoticsOutputLight(
+        coordinator, DeviceModel(1, 11, "Hall", "LIGHT", ["ON_OFF", "RANGE"])
+    )
+    light.hass = hass
+    events = []
+
+    async def turn_on(installation_id, output_id, value):
+        events.append("step sent")
+        await asyncio.sleep(0.3)
+        events.append("step done")
+
+    async def turn_off(installation_id, output_id):
+        events.append("off sent")
+
+    with patch(f"{API}.output_turn_on", side_effect=turn_on), patch(
+        f"{API}.output_turn_off", side_effect=turn_off
+    ), patch.object(light, "async_write_ha_state"):
+        await light.async_turn_on(**{ATTR_BRIGHTNESS: 255, ATTR_TRANSITION: 10})
+        while not events:
+            await asyncio.sleep(0.01)
+        await light.async_turn_off()
+        await hass.async_block_till_done()
+
+    assert events == ["step sent", "step done", "off sent"]
+    assert coordinator.get_status("outputs", 1)["on"] is False
+    await coordinator.async_unload()
@@ -0,0 +1,82 @@
+"""Test the models of the configured devices."""
+from custom_components.openmotics.models import (
+    LOCATION_UNKNOWN,
+    DeviceModel,
+    index_models,
+)
+
+RECORDS = [
+    {
+        "id": 10,
+        "local_id": 0,
+        "name": "Kitchen",
+        "type": "LIGHT",
+        "capabilities": ["ON_OFF", "RANGE"],
+        "location": {"floor_id": 0, "room_id": 2},
+        "status": {"on": True},
+    },
+    {
+        "id": 11,
+        "local_id": 1,
+        "name": "NOT_IN_USE",
+        "type": "OUTLET",
+        "capabilities": ["RANGE", "ON_OFF"],
+        "location": None,
+    },
+]
+
+
+def test_device_model():
+    """Test the location and capabilities are resolved up front."""
+    kitchen, unused = index_models(RECORDS).values()
+    assert kitchen.local_id == 0
+    assert kitchen.floor == 0
+    assert kitchen.room == 2
+    assert "RANGE" in kitchen.capabilities
+    assert kitchen.in_use
+    assert unused.room == LOCATION_UNKNOWN
+    assert not unused.in_use
+    # Equal capabilities share one set
+    assert kitchen.capabilities is unused.capabilities
+    assert not hasattr(kitchen, "__dict__")
+
+
+def test_device_model_round_trip():
+    """Test a model survives the conversion to an API record."""
+    kitchen, unused = index_models(RECORDS).values()
+    assert DeviceModel.from_api(kitchen.as_dict()) == kitchen
+    assert unused.as_dict()["location"] == {}
+    assert DeviceModel.from_api(unused.as_dict()) == unused
+    assert kitchen != unused
+
+
+def test_group_action_model():
+    """Test the basic actions of a group action are parsed."""
+    night = DeviceModel.from_api(
+        {"id": 3, "local_id": 3, "name": "Night", "actions": "160,0,101,2"}
+    )
+    assert night.actions == ((160, 0), (101, 2))
+    assert DeviceModel.from_api(night.as_dict()) == night
+    assert DeviceModel.from_api({"local_id": 4, "actions": "160,x"}).actions == ()
+
+
+def test_sensor_model():
+    """Test a sensor measures its physical quantity, or the quantities given."""
+    cloud = DeviceModel.from_api(
+        {"id": 20, "local_id": 0, "name": "Living", "physical_quantity": "humidity"}
+    )
+    assert cloud.physical_quantities == ("humidity",)
+    assert "physical_quantities" not in cloud.as_dict()
+
+    gateway = DeviceModel.from_api(
+        {
+            "id": 1,
+            "local_id": 1,
+            "name": "Hall",
+            "physical_quantity": "temperature",
+            "physical_quantities": ["temperature", "brightness"],
+        }
+    )
+    assert gateway.physical_quantities == ("temperature", "brightness")
+    assert DeviceModel.from_api(gateway.as_dict()) == gateway
+    assert DeviceModel.from_api(RECORDS[0]).physical_quantities == ()
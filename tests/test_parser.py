@@ -0,0 +1,53 @@
+"""Test the incremental parsing of the status response."""
+import json
+
+import pytest
+
+from custom_components.openmotics.parser import StatusStreamParser
+
+STATUS = {
+    "data": {
+        "installation": {"id": 1, "name": "Hôme"},
+        "outputs": [
+            {"local_id": 0, "name": "Kitchen", "status": {"on": True, "value": 100}},
+            {"local_id": 1, "name": "Hall", "status": None},
+        ],
+        "shutters": [],
+        "inputs": [{"local_id": 3, "status": {"on": False}}],
+        "sensors": [{"local_id": 7, "status": {"temperature": 21.25}}],
+    }
+}
+
+
+def parse(document, chunk_size):
+    """Feed a document to a parser in chunks and return the result."""
+    parser = StatusStreamParser()
+    for start in range(0, len(document), chunk_size):
+        parser.feed(document[start : start + chunk_size])
+    return parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64 * 1024])
+def test_parse_status(chunk_size):
+    """Test the status is parsed the same, however it is chunked."""
+    document = json.dumps(STATUS, ensure_ascii=False, indent=1).encode()
+    assert parse(document, chunk_size) == {
+        "outputs": {0: {"on": True, "value": 100}, 1: None},
+        "shutters": {},
+        "sensors": {7: {"temperature": 21.25}},
+    }
+
+
+def test_parse_unwrapped():
+    """Test a response without the data wrapper."""
+    document = json.dumps({"outputs": [{"local_id": 2, "status": 1}]}).encode()
+    assert parse(document, 3)["outputs"] == {2: 1}
+
+
+def test_parse_invalid():
+    """Test an incomplete or invalid response raises a ValueError."""
+    document = json.dumps(STATUS).encode()
+    with pytest.raises(ValueError):
+        parse(document[:-2], 16)
+    with pytest.raises(ValueError):
+        parse(b'{"outputs": [1]}', 16)
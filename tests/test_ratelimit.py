@@ -0,0 +1,61 @@
+"""Test the rate limiting of the cloud API."""
+import asyncio
+from unittest.mock import patch
+
+from custom_components.openmotics import ratelimit
+from custom_components.openmotics.ratelimit import (
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+    OpenMoticsRateLimiter,
+    backoff_delay,
+    parse_retry_after,
+)
+
+
+async def test_rate_limiter_priority():
+    """Test commands waiting for a token go before the polls."""
+    limiter = OpenMoticsRateLimiter(rate=50, burst=1)
+    order = []
+
+    async def request(name, priority):
+        await limiter.async_acquire(priority)
+        order.append(name)
+
+    # The first poll takes the only token, the others have to wait
+    await request("poll1", PRIORITY_POLL)
+    await asyncio.gather(
+        request("poll2", PRIORITY_POLL),
+        request("poll3", PRIORITY_POLL),
+        request("command", PRIORITY_COMMAND),
+    )
+    assert order == ["poll1", "command", "poll2", "poll3"]
+    diagnostics = limiter.diagnostics()
+    assert diagnostics["waits"] == 3
+    assert diagnostics["queue_depth"] == 0
+    assert diagnostics["max_wait"] >= 0.04
+
+
+async def test_rate_limiter_pause():
+    """Test no request is sent while the limiter is paused."""
+    limiter = OpenMoticsRateLimiter(rate=1000, burst=10)
+    limiter.pause(0.05)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await limiter.async_acquire()
+    assert loop.time() - start >= 0.04
+
+
+def test_backoff():
+    """Test the backoff grows, is jittered and is capped."""
+    with patch.object(ratelimit.random, "uniform", lambda low, high: high):
+        assert [backoff_delay(attempt) for attempt in range(3)] == [1, 2, 4]
+        assert backoff_delay(10) == ratelimit.BACKOFF_MAX
+    assert 2 <= backoff_delay(2) <= 4
+
+
+def test_parse_retry_after():
+    """Test Retry-After in seconds and as a date."""
+    assert parse_retry_after("7") == 7
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
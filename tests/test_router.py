@@ -0,0 +1,83 @@
+"""Test the routing over the cloud and the local gateway."""
+import asyncio
+from unittest.mock import patch
+
+from custom_components.openmotics import router
+from custom_components.openmotics.exceptions import CannotConnect
+from custom_components.openmotics.router import OpenMoticsTransportRouter
+
+
+class FakeTransport:
+    """A transport with a fixed latency that can be taken down."""
+
+    def __init__(self, name, latency, ws_url=None):
+        """Initialize the transport."""
+        self.name = name
+        self.latency = latency
+        self.ws_url = ws_url
+        self.down = False
+        self.calls = 0
+
+    async def _answer(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.down:
+            raise CannotConnect(f"{self.name} is down")
+        return self.name
+
+    async def get_installation(self, installation_id):
+        return await self._answer()
+
+    async def output_turn_on(self, installation_id, output_id, value=None):
+        return await self._answer()
+
+    def close(self):
+        pass
+
+
+async def test_router_failover():
+    """Test the router prefers the fastest transport and fails over and back."""
+    local = FakeTransport("local", 0.001)
+    cloud = FakeTransport("cloud", 0.02, ws_url="wss://cloud")
+    api = OpenMoticsTransportRouter({"local": local, "cloud": cloud}, 1)
+    assert api.ws_url == "wss://cloud"
+
+    with patch.object(router, "HEALTH_CHECK_INTERVAL", 0.01):
+        assert await api.output_turn_on(1, 5) == "local"
+        # A failing transport is skipped until it recovers
+        local.down = True
+        assert await api.output_turn_on(1, 5) == "cloud"
+        assert await api.output_turn_on(1, 5) == "cloud"
+        stats = api.diagnostics()
+        assert not stats["local"]["healthy"]
+        assert stats["local"]["errors"] >= 1
+        assert stats["local"]["last_error"] == "local is down"
+
+        # Fail back once the health checks pass
+        local.down = False
+        await asyncio.sleep(0.1)
+        assert api.stats["local"].healthy
+        assert await api.output_turn_on(1, 5) == "local"
+
+        # When all transports fail, the last error is raised
+        local.down = cloud.down = True
+        try:
+            await api.output_turn_on(1, 5)
+        except CannotConnect as err:
+            assert str(err) == "cloud is down"
+        else:
+            assert False
+    api.close()
+
+
+async def test_router_latency():
+    """Test the calls go over the transport with the lowest latency."""
+    slow = FakeTransport("slow", 0.02)
+    fast = FakeTransport("fast", 0.001)
+    api = OpenMoticsTransportRouter({"slow": slow, "fast": fast}, 1)
+    # The first calls go to the preferred transport, until the other one is measured
+    assert await api.output_turn_on(1, 5) == "slow"
+    api.stats["fast"].succeeded(0.001)
+    assert await api.output_turn_on(1, 5) == "fast"
+    assert api.diagnostics()["slow"]["latency_ms"] >= 20
+    api.close()
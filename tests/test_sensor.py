@@ -0,0 +1,12 @@
+"""Test the OpenMotics sensors."""
+from custom_components.openmotics.sensor import significant_change
+
+
+def test_significant_change():
+    """Test small changes of a sensor value do not update its state."""
+    assert not significant_change(21.0, 21.05, 0.1)
+    assert significant_change(21.0, 21.1, 0.1)
+    assert significant_change(0.3, 0.2, 0.1)
+    assert not significant_change(21.0, 21.0, 0)
+    assert significant_change(None, 21.0, 0.1)
+    assert significant_change(21.0, None, 0.1)
@@ -0,0 +1,65 @@
+"""Test the OpenMotics event websocket against a local fake server."""
+import asyncio
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+
+from custom_components.openmotics.websocket import OpenMoticsEventListener
+
+EVENTS = [
+    # An event of another installation is ignored
+    {"type": "EVENT", "data": {"type": "OUTPUT_CHANGE", "installation_id": 2}},
+    # Unknown event types are ignored
+    {"type": "EVENT", "data": {"type": "INPUT_CHANGE", "data": {"id": 3}}},
+    {
+        "type": "EVENT",
+        "data": {
+            "type": "OUTPUT_CHANGE",
+            "installation_id": 1,
+            "data": {"id": 5, "status": {"on": True, "value": 40}},
+        },
+    },
+]
+
+
+async def test_event_listener():
+    """Test the listener subscribes and passes the events of its installation."""
+    subscriptions = []
+
+    async def websocket_handler(request):
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        assert request.headers["Authorization"] == "Bearer abc"
+        subscriptions.append(await websocket.receive_json())
+        for event in EVENTS:
+            await websocket.send_json(event)
+        await asyncio.sleep(10)
+        return websocket
+
+    app = web.Application()
+    app.router.add_get("/ws/events", websocket_handler)
+    received = asyncio.Queue()
+    connections = []
+
+    async def get_token():
+        return "abc"
+
+    async with TestServer(app) as server, ClientSession() as session:
+        listener = OpenMoticsEventListener(
+            session,
+            str(server.make_url("/ws/events")),
+            get_token,
+            1,
+            received.put_nowait,
+            connections.append,
+        )
+        listener.start()
+        event = await asyncio.wait_for(received.get(), 5)
+        await listener.stop()
+
+    assert subscriptions[0]["data"]["action"] == "set_subscription"
+    assert subscriptions[0]["data"]["installation_ids"] == [1]
+    assert event["data"] == {"id": 5, "status": {"on": True, "value": 40}}
+    assert received.empty()
+    assert connections == [True]
+    assert not listener.connected